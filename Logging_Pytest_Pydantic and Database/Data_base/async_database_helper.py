@@ -0,0 +1,79 @@
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import database_helper
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    # One worker per pooled connection: no worker ever sits waiting for a free connection
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=database_helper.pool.size, thread_name_prefix='database')
+        return _executor
+
+
+def shutdown():
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+async def run(func, *args):
+    # Cancelling the awaiting task cancels the call if it has not started yet;
+    # a query already running finishes on its thread, but nobody waits for it
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), functools.partial(func, *args))
+
+
+async def gather(*calls):
+    # Like asyncio.gather, but the first failure cancels the calls still pending
+    tasks = [asyncio.ensure_future(call) for call in calls]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+
+
+async def get_all_data():
+    return await run(lambda: list(database_helper.stream_all_data()))
+
+
+async def get_by_date(date):
+    return await run(database_helper.fetch_by_date, date)
+
+
+async def get_by_id(id):
+    return await run(database_helper.fetch_by_id, id)
+
+
+async def get_by_ids(ids):
+    return await run(database_helper.get_by_ids, ids)
+
+
+async def insert_data(id, date, amount, category, notes):
+    return await run(database_helper.insert_data, id, date, amount, category, notes)
+
+
+async def insert_many(rows, chunk_size=None):
+    return await run(database_helper.insert_many, rows, chunk_size)
+
+
+async def delete_data(ids):
+    return await run(database_helper.delete_data, ids)
+
+
+async def delete_many(ids, chunk_size=None):
+    return await run(database_helper.delete_many, ids, chunk_size)
+
+
+async def replace_day(date, rows, chunk_size=None):
+    return await run(database_helper.replace_day, date, rows, chunk_size)
@@ -0,0 +1,52 @@
+import argparse
+import random
+import time
+import database_helper
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def rows_per_sec(rows, seconds):
+    return round(rows / seconds) if seconds > 0 else float('inf')
+
+
+def run_benchmark(rows=10000, single_rows=500, chunk_size=None, seed=0):
+    # Every benchmark row is tagged in notes and removed again at the end; replace_day
+    # works on 1900-01-01 so no real day is touched
+    rng = random.Random(seed)
+    categories = ['Food', 'Rent', 'Shopping', 'Entertainment', 'Other']
+    data = [(None, '2024-%02d-%02d' % (rng.randint(1, 12), rng.randint(1, 28)), round(rng.uniform(1, 500), 2),
+             rng.choice(categories), 'benchmark') for _ in range(rows)]
+    results = {'rows': rows, 'chunk_size': chunk_size or database_helper.CHUNK_SIZE}
+
+    _, seconds = timed(lambda: [database_helper.insert_data(*row) for row in data[:single_rows]])
+    results['insert_data'] = rows_per_sec(single_rows, seconds)
+    _, seconds = timed(database_helper.insert_many, data, chunk_size)
+    results['insert_many'] = rows_per_sec(rows, seconds)
+
+    ids = [row['id'] for row in database_helper.iter_rows("select id from expenses where notes = %s ;", ('benchmark',))]
+    fetched, seconds = timed(database_helper.get_by_ids, ids, chunk_size)
+    results['get_by_ids'] = rows_per_sec(len(fetched), seconds)
+
+    day_rows = [(None, amount, category, 'benchmark') for _, _, amount, category, _ in data[:1000]]
+    _, seconds = timed(database_helper.replace_day, '1900-01-01', day_rows, chunk_size)
+    results['replace_day'] = rows_per_sec(len(day_rows), seconds)
+
+    ids = [row['id'] for row in database_helper.iter_rows("select id from expenses where notes = %s ;", ('benchmark',))]
+    deleted, seconds = timed(database_helper.delete_many, ids, chunk_size)
+    results['delete_many'] = rows_per_sec(deleted, seconds)
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Rows/sec of the bulk database_helper functions')
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--single-rows', type=int, default=500, help='Rows inserted one by one for comparison')
+    parser.add_argument('--chunk-size', type=int, default=None)
+    args = parser.parse_args()
+    for name, value in run_benchmark(args.rows, args.single_rows, args.chunk_size).items():
+        print(f'{name}: {value}')
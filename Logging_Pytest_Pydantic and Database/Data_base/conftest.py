@@ -0,0 +1,97 @@
+import sqlite3
+import threading
+import pytest
+import database_helper
+from connection_pool import ConnectionPool
+from read_cache import ReadCache
+
+
+# Stand-in for mysql.connector: same calls, backed by a SQLite file
+class StandInCursor:
+    def __init__(self, connection, dictionary=False):
+        self.connection = connection
+        self.dictionary = dictionary
+        self._cursor = connection.db.cursor()
+
+    def _row(self, row):
+        if row is None or not self.dictionary:
+            return row
+        return dict(zip([column[0] for column in self._cursor.description], row))
+
+    def execute(self, sql, params=()):
+        self.connection.driver.statements.append(sql)
+        self._cursor.execute(sql.replace('%s', '?'), tuple(params))
+
+    def executemany(self, sql, rows):
+        self.connection.driver.statements.append(sql)
+        self._cursor.executemany(sql.replace('%s', '?'), [tuple(row) for row in rows])
+
+    def fetchone(self):
+        return self._row(self._cursor.fetchone())
+
+    def fetchmany(self, size=1):
+        return [self._row(row) for row in self._cursor.fetchmany(size)]
+
+    def fetchall(self):
+        return [self._row(row) for row in self._cursor.fetchall()]
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    def close(self):
+        self._cursor.close()
+
+
+class StandInConnection:
+    def __init__(self, driver):
+        self.driver = driver
+        self.db = sqlite3.connect(driver.path, check_same_thread=False, timeout=10)
+        self.alive = True
+
+    def is_connected(self):
+        return self.alive
+
+    def cursor(self, dictionary=False, **kwargs):
+        return StandInCursor(self, dictionary)
+
+    def commit(self):
+        self.db.commit()
+
+    def rollback(self):
+        self.db.rollback()
+
+    def close(self):
+        self.alive = False
+        self.db.close()
+
+
+class StandInDriver:
+    def __init__(self, path):
+        self.path = path
+        self.connections = []
+        self.statements = []
+        self._lock = threading.Lock()
+        with sqlite3.connect(path) as db:
+            db.execute('CREATE TABLE expenses (id INTEGER PRIMARY KEY AUTOINCREMENT, expense_date TEXT NOT NULL, '
+                       'amount REAL NOT NULL, category TEXT NOT NULL, notes TEXT)')
+
+    def connect(self):
+        connection = StandInConnection(self)
+        with self._lock:
+            self.connections.append(connection)
+        return connection
+
+
+@pytest.fixture
+def driver(tmp_path):
+    return StandInDriver(str(tmp_path / 'expense_manager.db'))
+
+
+@pytest.fixture
+def pool(driver, monkeypatch):
+    pool = ConnectionPool(driver.connect, size=3, timeout=0.5)
+    monkeypatch.setattr(database_helper, 'pool', pool)
+    monkeypatch.setattr(database_helper, 'cache', ReadCache())
+    yield pool
+    pool.close()
@@ -0,0 +1,141 @@
+import threading
+import time
+from collections import deque
+
+
+class PoolTimeout(TimeoutError):
+    pass
+
+
+class ConnectionPool:
+    """
+    Bounded pool of DB-API connections.
+    connect is any function returning a new connection, so the pool works
+    with mysql.connector or with a stand-in driver in tests.
+    """
+
+    def __init__(self, connect, size=5, timeout=5.0, max_idle=300.0, max_lifetime=3600.0):
+        self.connect = connect
+        self.size = size
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.max_lifetime = max_lifetime
+        self._idle = deque()       # (connection, created_at, last_used), most recently used last
+        self._created_at = {}      # id(connection) -> created_at, for connections checked out
+        self._open = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._stats = {'created': 0, 'recycled': 0, 'broken': 0, 'checkouts': 0, 'timeouts': 0,
+                       'wait_total': 0.0, 'wait_max': 0.0, 'peak_in_use': 0}
+
+    def _expired(self, created_at, last_used, now):
+        return now - created_at > self.max_lifetime or now - last_used > self.max_idle
+
+    def _discard(self, connect, reason):
+        # Called without the lock held: closing may block on the network
+        try:
+            connect.close()
+        except Exception:
+            pass
+        with self._cond:
+            self._open -= 1
+            self._stats[reason] += 1
+            self._cond.notify()
+
+    def acquire(self):
+        started = time.monotonic()
+        deadline = started + self.timeout
+        while True:
+            candidate = None
+            with self._cond:
+                while True:
+                    if self._closed:
+                        raise RuntimeError('Connection pool is closed')
+                    if self._idle or self._open < self.size:
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._stats['timeouts'] += 1
+                        raise PoolTimeout(f'No free connection within {self.timeout} seconds')
+                    self._cond.wait(remaining)
+                if self._idle:
+                    candidate = self._idle.pop()
+                else:
+                    # Reserve the slot before connecting so the pool never goes over size
+                    self._open += 1
+
+            if candidate is None:
+                try:
+                    connect = self.connect()
+                except Exception:
+                    with self._cond:
+                        self._open -= 1
+                        self._cond.notify()
+                    raise
+                created_at = time.monotonic()
+                with self._cond:
+                    self._stats['created'] += 1
+            else:
+                connect, created_at, last_used = candidate
+                if self._expired(created_at, last_used, time.monotonic()):
+                    self._discard(connect, 'recycled')
+                    continue
+                # Health check on checkout: a connection the server dropped is replaced
+                try:
+                    healthy = connect.is_connected()
+                except Exception:
+                    healthy = False
+                if not healthy:
+                    self._discard(connect, 'broken')
+                    continue
+
+            waited = time.monotonic() - started
+            with self._cond:
+                self._created_at[id(connect)] = created_at
+                stats = self._stats
+                stats['checkouts'] += 1
+                stats['wait_total'] += waited
+                stats['wait_max'] = max(stats['wait_max'], waited)
+                stats['peak_in_use'] = max(stats['peak_in_use'], self._open - len(self._idle))
+            return connect
+
+    def release(self, connect, broken=False):
+        now = time.monotonic()
+        with self._cond:
+            created_at = self._created_at.pop(id(connect))
+            keep = not broken and not self._closed and now - created_at <= self.max_lifetime
+            if keep:
+                self._idle.append((connect, created_at, now))
+                self._cond.notify()
+        if not keep:
+            self._discard(connect, 'broken' if broken else 'recycled')
+
+    def prune(self):
+        """
+        Close idle connections that passed max_idle or max_lifetime
+        """
+        now = time.monotonic()
+        with self._cond:
+            expired = [item for item in self._idle if self._expired(item[1], item[2], now)]
+            for item in expired:
+                self._idle.remove(item)
+        for connect, _, _ in expired:
+            self._discard(connect, 'recycled')
+
+    def stats(self):
+        with self._cond:
+            stats = dict(self._stats)
+            in_use = self._open - len(self._idle)
+            stats.update(size=self.size, open=self._open, idle=len(self._idle), in_use=in_use,
+                         utilization=in_use / self.size,
+                         wait_avg=stats['wait_total'] / stats['checkouts'] if stats['checkouts'] else 0.0)
+        return stats
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._cond.notify_all()
+        for connect, _, _ in idle:
+            self._discard(connect, 'recycled')
@@ -1,62 +1,235 @@
-import mysql.connector
 from contextlib import contextmanager
+from connection_pool import ConnectionPool
+from read_cache import ReadCache
+
+DB_CONFIG = {
+    'host': 'localhost',
+    'user': 'root',
+    'password': '12345',
+    'database': 'expense_manager'
+}
+
+POOL_SIZE = 5
+
+# Rows per fetchmany round trip when streaming a result
+BATCH_SIZE = 1000
+
+# Rows per multi-row INSERT and ids per IN (...) list in the bulk functions
+CHUNK_SIZE = 500
+
+# Entries kept by the read cache of get_by_date/get_by_id, and seconds each one stays valid
+CACHE_SIZE = 1024
+CACHE_TTL = 30.0
+
+
+def mysql_connect():
+    # Imported here so the pool can also run on a stand-in driver without MySQL installed
+    import mysql.connector
+    return mysql.connector.connect(**DB_CONFIG)
+
+
+pool = ConnectionPool(mysql_connect, size=POOL_SIZE, timeout=5.0, max_idle=300.0, max_lifetime=3600.0)
+
+cache = ReadCache(max_size=CACHE_SIZE, ttl=CACHE_TTL)
 
 
 @contextmanager
 def connection(commit=False):
-    connect = mysql.connector.connect(
-        host = 'localhost',
-        user = 'root',
-        password = '12345',
-        database = 'expense_manager'
-    )
+    connect = pool.acquire()
+    cursor = None
+    broken = False
+    try:
+        cursor = connect.cursor(dictionary=True)
+        yield cursor
+        if commit:
+            connect.commit()
+        else:
+            # End the read transaction so the next user of this connection sees fresh data
+            connect.rollback()
+    except BaseException:
+        # Nothing half-done stays on a connection that goes back to the pool
+        try:
+            connect.rollback()
+        except Exception:
+            broken = True
+        raise
+    finally:
+        try:
+            if cursor is not None:
+                cursor.close()
+        except Exception:
+            broken = True
+        pool.release(connect, broken)
+
+
+@contextmanager
+def streaming_cursor():
+    connect = pool.acquire()
+    try:
+        # Unbuffered: rows stay on the server until fetched
+        cursor = connect.cursor(dictionary=True, buffered=False)
+        yield cursor
+    except BaseException:
+        # Also reached when the consumer stops early: the unread rows are still
+        # on the wire, and closing the connection is cheaper than draining them
+        pool.release(connect, broken=True)
+        raise
+    try:
+        cursor.close()
+        connect.rollback()
+    except Exception:
+        pool.release(connect, broken=True)
+        raise
+    pool.release(connect)
 
-    if connect.is_connected():
-        print('Connection Successful')
-    else:
-        print('Connection Error')
 
-    cursor = connect.cursor(dictionary=True)
+def iter_batches(query, params=(), batch_size=None):
+    batch_size = batch_size or BATCH_SIZE
+    with streaming_cursor() as cursor:
+        cursor.execute(query, params)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                return
+            yield rows
 
-    yield cursor
 
-    if commit:
-        connect.commit()
-    cursor.close()
-    connect.close()
+def iter_rows(query, params=(), batch_size=None):
+    for rows in iter_batches(query, params, batch_size):
+        yield from rows
+
+
+def stream_all_data(batch_size=None):
+    return iter_rows("SELECT * FROM expenses;", (), batch_size)
+
+
+def stream_by_date(date, batch_size=None):
+    return iter_rows("SELECT * FROM expenses where expense_date= %s ;", (date,), batch_size)
+
 
 def get_all_data():
-    with connection() as cursor:
-        cursor.execute("SELECT * FROM expenses;")
-        expenses = cursor.fetchall()
-        for data in expenses:
-            print(data)
+    for data in stream_all_data():
+        print(data)
+
+
+def date_key(date):
+    return ('date', str(date))
+
+
+def id_key(id):
+    return ('id', id)
+
+
+def fetch_by_date(date):
+    # Cached rows are shared between callers and must not be modified
+    return cache.get(date_key(date), lambda: list(stream_by_date(date)))
+
+
+def fetch_by_id(id):
+    return cache.get(id_key(id), lambda: next(iter(get_by_ids([id])), None))
 
 
 def get_by_date(date):
-    with connection() as cursor:
-        cursor.execute("SELECT * FROM expenses where expense_date= %s ;",(date,))
-        expenses = cursor.fetchall()
-        for data in expenses:
-            print(data)
+    for data in fetch_by_date(date):
+        print(data)
 
 
 def insert_data(id,date,amount,category,notes):
     with connection(commit=True) as cursor:
         cursor.execute("insert into expenses (id,expense_date,amount,category,notes) values (%s,%s,%s,%s,%s);",
                        (id,date,amount,category,notes))
+    cache.invalidate(date_key(date), id_key(id))
 
 
 def delete_data(ids):
     with connection(commit=True) as cursor:
+        keys = _cache_keys(cursor, ids)
         cursor.execute("delete from expenses where id = %s ;",ids)
+    cache.invalidate(*keys)
 
 def get_by_id(ids):
-    with connection() as cursor:
-        cursor.execute("select * from expenses where id = %s ;",ids)
-        expenses = cursor.fetchall()
-        for data in expenses:
+    for id in ids:
+        data = fetch_by_id(id)
+        if data is not None:
             print(data)
 
+def chunks(items, chunk_size=None):
+    chunk_size = chunk_size or CHUNK_SIZE
+    items = list(items)
+    for start in range(0, len(items), chunk_size):
+        yield items[start:start + chunk_size]
+
+
+def _cache_keys(cursor, ids, chunk_size=None):
+    # Keys of the rows about to change, read in the same transaction that changes them
+    keys = set()
+    for chunk in chunks(ids, chunk_size):
+        cursor.execute("select id, expense_date from expenses where id in (" + ','.join(['%s'] * len(chunk)) + ");",
+                       chunk)
+        for row in cursor.fetchall():
+            keys.update((id_key(row['id']), date_key(row['expense_date'])))
+    return keys | {id_key(id) for id in ids}
+
+
+def _insert_rows(cursor, rows, chunk_size):
+    # rows are (id, expense_date, amount, category, notes); id None lets the database assign one
+    for chunk in chunks(rows, chunk_size):
+        values = ','.join(['(%s,%s,%s,%s,%s)'] * len(chunk))
+        cursor.execute("insert into expenses (id,expense_date,amount,category,notes) values " + values + ";",
+                       [value for row in chunk for value in row])
+
+
+def insert_many(rows, chunk_size=None):
+    rows = list(rows)
+    # One connection and one commit for all rows: either all of them are stored or none
+    with connection(commit=True) as cursor:
+        _insert_rows(cursor, rows, chunk_size)
+    cache.invalidate(*{date_key(row[1]) for row in rows}, *{id_key(row[0]) for row in rows if row[0] is not None})
+    return len(rows)
+
+
+def delete_many(ids, chunk_size=None):
+    ids = list(ids)
+    deleted = 0
+    with connection(commit=True) as cursor:
+        keys = _cache_keys(cursor, ids, chunk_size)
+        for chunk in chunks(ids, chunk_size):
+            cursor.execute("delete from expenses where id in (" + ','.join(['%s'] * len(chunk)) + ");", chunk)
+            deleted += cursor.rowcount
+    cache.invalidate(*keys)
+    return deleted
+
+
+def get_by_ids(ids, chunk_size=None):
+    expenses = []
+    with connection() as cursor:
+        for chunk in chunks(ids, chunk_size):
+            cursor.execute("select * from expenses where id in (" + ','.join(['%s'] * len(chunk)) + ");", chunk)
+            expenses += cursor.fetchall()
+    return expenses
+
+
+def replace_day(date, rows, chunk_size=None):
+    # rows are (id, amount, category, notes); the day is swapped in a single transaction,
+    # so readers see either the old or the new expenses, never a mix
+    rows = list(rows)
+    with connection(commit=True) as cursor:
+        cursor.execute("select id from expenses where expense_date = %s ;", (date,))
+        keys = {id_key(row['id']) for row in cursor.fetchall()} | {id_key(row[0]) for row in rows if row[0] is not None}
+        cursor.execute("delete from expenses where expense_date = %s ;", (date,))
+        _insert_rows(cursor, [(id, date, amount, category, notes) for id, amount, category, notes in rows],
+                     chunk_size)
+    cache.invalidate(date_key(date), *keys)
+
+
+def pool_stats():
+    return pool.stats()
+
+
+def cache_stats():
+    return cache.stats()
+
 if __name__ == '__main__':
-    get_by_id([2])
\ No newline at end of file
+    get_by_id([2])
+    print(pool_stats())
+    print(cache_stats())
\ No newline at end of file
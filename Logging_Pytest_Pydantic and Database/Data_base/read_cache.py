@@ -0,0 +1,96 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class _Flight:
+    # One load in progress; callers asking for the same key wait for it instead of querying again
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+        self.stale = False
+
+
+class ReadCache:
+    """
+    Read-through cache with a bounded LRU size and a TTL per entry.
+    Concurrent misses for the same key share a single load, and invalidate()
+    drops a key, including a load of it that is still running.
+    """
+
+    def __init__(self, max_size=1024, ttl=30.0, clock=time.monotonic):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.clock = clock
+        self._entries = OrderedDict()   # key -> (value, expires_at), least recently used first
+        self._flights = {}
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'coalesced': 0, 'evictions': 0, 'expirations': 0,
+                       'invalidations': 0}
+
+    def get(self, key, load):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[1] > self.clock():
+                    self._entries.move_to_end(key)
+                    self._stats['hits'] += 1
+                    return entry[0]
+                del self._entries[key]
+                self._stats['expirations'] += 1
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self._stats['misses'] += 1
+            else:
+                self._stats['coalesced'] += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = load()
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+                # None is not cached: a row that does not exist yet may be inserted with an unknown id
+                if flight.error is None and not flight.stale and flight.value is not None:
+                    self._entries[key] = (flight.value, self.clock() + self.ttl)
+                    self._entries.move_to_end(key)
+                    while len(self._entries) > self.max_size:
+                        self._entries.popitem(last=False)
+                        self._stats['evictions'] += 1
+            flight.done.set()
+        return flight.value
+
+    def invalidate(self, *keys):
+        with self._lock:
+            for key in keys:
+                if self._entries.pop(key, None) is not None:
+                    self._stats['invalidations'] += 1
+                # A load that started before the write may have read the old rows
+                flight = self._flights.get(key)
+                if flight is not None:
+                    flight.stale = True
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            for flight in self._flights.values():
+                flight.stale = True
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['size'] = len(self._entries)
+        lookups = stats['hits'] + stats['misses'] + stats['coalesced']
+        stats['hit_ratio'] = (stats['hits'] + stats['coalesced']) / lookups if lookups else 0.0
+        return stats
@@ -0,0 +1,86 @@
+import asyncio
+import time
+import pytest
+import database_helper
+import async_database_helper as adb
+from conftest import StandInCursor
+
+
+@pytest.fixture
+def slow_queries(pool, monkeypatch):
+    # Every SELECT takes 0.2 seconds, like a slow round trip to the server
+    execute = StandInCursor.execute
+
+    def slow_execute(self, sql, params=()):
+        if sql.lower().startswith('select'):
+            time.sleep(0.2)
+        execute(self, sql, params)
+
+    monkeypatch.setattr(StandInCursor, 'execute', slow_execute)
+    yield
+    adb.shutdown()
+
+
+def test_fan_out_runs_queries_concurrently(pool, slow_queries):
+    database_helper.insert_many([(None, '2024-08-0%d' % day, float(day), 'Food', '') for day in (1, 2, 2, 3)])
+
+    async def main():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        clock = asyncio.create_task(ticker())
+        started = time.monotonic()
+        days = await adb.gather(*(adb.get_by_date('2024-08-0%d' % day) for day in (1, 2, 3)))
+        elapsed = time.monotonic() - started
+        clock.cancel()
+        return days, elapsed, ticks
+
+    days, elapsed, ticks = asyncio.run(main())
+    assert [len(rows) for rows in days] == [1, 2, 1]
+    # Three slow queries on three connections overlap, and the loop kept running meanwhile
+    assert elapsed < 0.5 and ticks >= 10
+    assert adb.get_executor()._max_workers == pool.size
+
+
+def test_cancellation(pool, slow_queries, driver):
+    database_helper.insert_many([(id, '2024-08-01', 1.0, 'Food', '') for id in range(1, pool.size + 2)])
+
+    async def main():
+        calls = [asyncio.create_task(adb.get_by_id(id)) for id in range(1, pool.size + 2)]
+        await asyncio.sleep(0.05)
+        # The last call is still queued behind the busy workers, so it never reaches the database
+        calls[-1].cancel()
+        done = await asyncio.gather(*calls, return_exceptions=True)
+        return done
+
+    done = asyncio.run(main())
+    assert [row['id'] for row in done[:-1]] == list(range(1, pool.size + 1))
+    assert isinstance(done[-1], asyncio.CancelledError)
+    assert sum(sql.startswith('select') for sql in driver.statements) == pool.size
+
+
+def test_failure_cancels_pending_calls(pool, slow_queries):
+    cancelled = []
+
+    async def fail():
+        raise ValueError('query failed')
+
+    async def slow():
+        try:
+            return await adb.get_by_date('2024-08-01')
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    async def main():
+        with pytest.raises(ValueError):
+            await adb.gather(slow(), fail())
+        await asyncio.sleep(0)
+
+    asyncio.run(main())
+    assert cancelled == [True]
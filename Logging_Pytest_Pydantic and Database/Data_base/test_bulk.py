@@ -0,0 +1,49 @@
+import pytest
+import database_helper
+import benchmark_bulk
+
+
+def count(query, params=()):
+    with database_helper.connection() as cursor:
+        cursor.execute(query, params)
+        return cursor.fetchone()['n']
+
+
+def test_insert_many_uses_chunked_statements(pool, driver):
+    rows = [(None, '2024-08-01', float(i), 'Food', '') for i in range(1050)]
+    assert database_helper.insert_many(rows, chunk_size=500) == 1050
+    inserts = [sql for sql in driver.statements if sql.startswith('insert')]
+    assert [sql.count('(%s,%s,%s,%s,%s)') for sql in inserts] == [500, 500, 50]
+    assert count("select count(*) as n from expenses;") == 1050
+    assert pool.stats()['checkouts'] == 2
+
+
+def test_insert_many_is_one_transaction(pool, driver):
+    database_helper.insert_data(7, '2024-08-01', 1.0, 'Food', '')
+    rows = [(None, '2024-08-02', 1.0, 'Food', '')] * 10 + [(7, '2024-08-02', 1.0, 'Food', '')]
+    with pytest.raises(Exception):
+        database_helper.insert_many(rows, chunk_size=4)
+    assert count("select count(*) as n from expenses;") == 1
+
+
+def test_fetch_and_delete_by_id_lists(pool, driver):
+    database_helper.insert_many([(None, '2024-08-01', float(i), 'Rent', '') for i in range(30)])
+    assert [row['id'] for row in database_helper.get_by_ids(range(1, 31, 2), chunk_size=4)] == list(range(1, 31, 2))
+    assert database_helper.delete_many(list(range(1, 21)) + [999], chunk_size=8) == 20
+    assert sum(sql.startswith('delete from expenses where id in') for sql in driver.statements) == 3
+    assert count("select count(*) as n from expenses;") == 10
+
+
+def test_replace_day(pool, driver):
+    database_helper.insert_many([(None, '2024-08-0%d' % day, 1.0, 'Food', '') for day in (1, 1, 2)])
+    database_helper.replace_day('2024-08-01', [(None, 9.5, 'Rent', 'new'), (None, 3.0, 'Food', 'new')])
+    rows = list(database_helper.stream_by_date('2024-08-01'))
+    assert sorted((row['amount'], row['notes']) for row in rows) == [(3.0, 'new'), (9.5, 'new')]
+    assert count("select count(*) as n from expenses where expense_date = %s ;", ('2024-08-02',)) == 1
+
+
+def test_benchmark_reports_rows_per_sec(pool, driver):
+    results = benchmark_bulk.run_benchmark(rows=2000, single_rows=50, chunk_size=250)
+    for name in ('insert_data', 'insert_many', 'get_by_ids', 'replace_day', 'delete_many'):
+        assert results[name] > 0
+    assert count("select count(*) as n from expenses;") == 0
@@ -0,0 +1,83 @@
+import threading
+import time
+import pytest
+import database_helper
+from connection_pool import ConnectionPool, PoolTimeout
+
+
+def test_connections_are_reused(pool, driver):
+    for i in range(1, 11):
+        database_helper.insert_data(i, '2024-08-01', 10.0, 'Food', 'lunch')
+        database_helper.get_by_id([i])
+
+    stats = pool.stats()
+    assert len(driver.connections) == 1
+    assert stats['checkouts'] == 20
+    assert stats['idle'] == 1 and stats['in_use'] == 0
+
+
+def test_pool_is_bounded_and_times_out(pool, driver):
+    held = [pool.acquire() for _ in range(3)]
+    started = time.monotonic()
+    with pytest.raises(PoolTimeout):
+        pool.acquire()
+    assert time.monotonic() - started >= 0.5
+    assert pool.stats()['utilization'] == 1.0
+
+    # A waiting caller gets the connection as soon as it is released
+    threading.Timer(0.1, pool.release, args=(held.pop(),)).start()
+    held.append(pool.acquire())
+    stats = pool.stats()
+    assert stats['timeouts'] == 1 and stats['wait_max'] >= 0.1
+    assert len(driver.connections) == 3
+    for connect in held:
+        pool.release(connect)
+
+
+def test_broken_and_stale_connections_are_replaced(driver):
+    pool = ConnectionPool(driver.connect, size=2, timeout=0.5, max_idle=0.05)
+    first = pool.acquire()
+    pool.release(first)
+    first.alive = False
+    second = pool.acquire()
+    assert second is not first and pool.stats()['broken'] == 1
+
+    pool.release(second)
+    time.sleep(0.1)
+    third = pool.acquire()
+    assert third is not second and pool.stats()['recycled'] == 1
+    pool.release(third, broken=True)
+    assert pool.stats()['open'] == 0
+    pool.close()
+
+
+def test_rollback_on_exception(pool, driver):
+    with pytest.raises(ValueError):
+        with database_helper.connection(commit=True) as cursor:
+            cursor.execute("insert into expenses (expense_date,amount,category,notes) values (%s,%s,%s,%s);",
+                           ('2024-08-01', 5.0, 'Food', ''))
+            raise ValueError('fail after the insert')
+
+    with database_helper.connection() as cursor:
+        cursor.execute("select count(*) as n from expenses;")
+        assert cursor.fetchone()['n'] == 0
+    assert pool.stats()['in_use'] == 0
+
+
+def test_concurrent_callers_share_the_pool(pool, driver):
+    def work(worker):
+        for i in range(20):
+            database_helper.insert_data(worker * 100 + i + 1, '2024-08-02', 1.0, 'Rent', '')
+
+    threads = [threading.Thread(target=work, args=(worker,)) for worker in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    stats = pool.stats()
+    assert len(driver.connections) <= 3 and stats['peak_in_use'] <= 3
+    assert stats['checkouts'] == 160
+    with database_helper.connection() as cursor:
+        cursor.execute("select count(*) as n from expenses;")
+        assert cursor.fetchone()['n'] == 160
@@ -0,0 +1,89 @@
+import threading
+import time
+import pytest
+import database_helper
+from read_cache import ReadCache
+
+
+def selects(driver):
+    # Reads that reached the database: by date (stream_by_date) and by id (get_by_ids)
+    return sum(sql.startswith('SELECT') or sql.startswith('select * from expenses where id in') for sql in driver.statements)
+
+
+def test_lru_and_ttl():
+    now = [0.0]
+    cache = ReadCache(max_size=2, ttl=10.0, clock=lambda: now[0])
+    loads = []
+
+    def load(key):
+        return lambda: loads.append(key) or key.upper()
+
+    assert cache.get('a', load('a')) == 'A'
+    assert cache.get('b', load('b')) == 'B'
+    assert cache.get('a', load('a')) == 'A'
+    cache.get('c', load('c'))              # evicts b, the least recently used
+    cache.get('b', load('b'))
+    assert loads == ['a', 'b', 'c', 'b']
+
+    now[0] = 11.0
+    cache.get('b', load('b'))
+    stats = cache.stats()
+    assert loads[-1] == 'b' and stats['expirations'] == 1
+    assert stats['evictions'] == 2 and stats['size'] == 2
+    assert stats['hits'] == 1 and stats['hit_ratio'] == pytest.approx(1 / 6)
+
+
+def test_concurrent_misses_share_one_load():
+    cache = ReadCache()
+    started = threading.Event()
+    loads = []
+
+    def slow_load():
+        loads.append(1)
+        started.set()
+        time.sleep(0.1)
+        return 'value'
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get('k', slow_load))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == ['value'] * 8 and loads == [1]
+    assert cache.stats()['coalesced'] == 7
+
+    # A write during the load keeps its (possibly old) result out of the cache
+    started.clear()
+    reader = threading.Thread(target=cache.get, args=('x', slow_load))
+    reader.start()
+    started.wait()
+    cache.invalidate('x')
+    reader.join()
+    assert cache.stats()['size'] == 1
+
+
+def test_reads_are_cached_and_writes_invalidate(pool, driver):
+    database_helper.insert_many([(None, '2024-08-0%d' % day, 1.0, 'Food', '') for day in (1, 1, 2)])
+    for _ in range(5):
+        assert len(database_helper.fetch_by_date('2024-08-01')) == 2
+        assert database_helper.fetch_by_id(3)['expense_date'] == '2024-08-02'
+    assert selects(driver) == 2
+
+    database_helper.insert_data(10, '2024-08-01', 5.0, 'Rent', '')
+    assert len(database_helper.fetch_by_date('2024-08-01')) == 3
+    assert database_helper.fetch_by_id(3) is not None
+    assert selects(driver) == 3
+
+    # Deleting by id drops that row's date as well, and only that date
+    database_helper.delete_data([3])
+    assert database_helper.fetch_by_id(3) is None
+    assert database_helper.fetch_by_date('2024-08-02') == []
+    assert len(database_helper.fetch_by_date('2024-08-01')) == 3
+    assert selects(driver) == 5
+
+    database_helper.replace_day('2024-08-01', [(None, 2.0, 'Food', 'new')])
+    assert database_helper.fetch_by_id(10) is None
+    assert [row['notes'] for row in database_helper.fetch_by_date('2024-08-01')] == ['new']
+    stats = database_helper.cache_stats()
+    assert stats['invalidations'] >= 3 and 0 < stats['hit_ratio'] < 1
@@ -0,0 +1,40 @@
+import database_helper
+from conftest import StandInCursor
+
+
+def fill(rows):
+    with database_helper.connection(commit=True) as cursor:
+        for i in range(rows):
+            cursor.execute("insert into expenses (expense_date,amount,category,notes) values (%s,%s,%s,%s);",
+                           ('2024-08-0%d' % (i % 3 + 1), float(i), 'Food', ''))
+
+
+def test_rows_arrive_in_batches(pool, monkeypatch):
+    fill(250)
+    fetched = []
+    fetchmany = StandInCursor.fetchmany
+    monkeypatch.setattr(StandInCursor, 'fetchmany', lambda self, size=1: fetched.append(size) or fetchmany(self, size))
+
+    batches = database_helper.iter_batches("SELECT * FROM expenses;", batch_size=100)
+    # Nothing is queried until the first batch is asked for
+    assert pool.stats()['in_use'] == 0
+    assert [len(rows) for rows in batches] == [100, 100, 50]
+    assert fetched == [100, 100, 100, 100]
+
+    rows = list(database_helper.stream_by_date('2024-08-02', batch_size=7))
+    assert len(rows) == 83 and {row['expense_date'] for row in rows} == {'2024-08-02'}
+    assert pool.stats()['in_use'] == 0 and pool.stats()['broken'] == 0
+
+
+def test_stopping_early_releases_the_connection(pool, driver):
+    fill(50)
+    rows = database_helper.stream_all_data(batch_size=10)
+    assert next(rows)['id'] == 1
+    assert pool.stats()['in_use'] == 1
+    rows.close()
+
+    # The half-read connection is closed rather than handed to the next caller
+    stats = pool.stats()
+    assert stats['in_use'] == 0 and stats['open'] == 0 and stats['broken'] == 1
+    assert not driver.connections[-1].alive
+    assert len(list(database_helper.stream_all_data())) == 50
@@ -0,0 +1,222 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from functools import partial
+from typing import List, Literal, Optional
+import asyncio
+import calendar
+import os
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pydantic import BaseModel
+import db_helper
+import export
+import metrics
+
+try:
+    import orjson  # noqa: F401  (ORJSONResponse needs it)
+    from fastapi.responses import ORJSONResponse as DefaultResponse
+except ImportError:
+    DefaultResponse = JSONResponse
+
+# Storage calls block on file or database I/O, so they run on a bounded pool
+# and the event loop stays free to serve other sessions
+STORAGE_WORKERS = int(os.environ.get('EXPENSE_API_WORKERS', 8))
+_executor = ThreadPoolExecutor(max_workers=STORAGE_WORKERS, thread_name_prefix='storage')
+
+app = FastAPI(title='Expense Tracking API', default_response_class=DefaultResponse)
+
+
+class Expense(BaseModel):
+    amount: float
+    category: str
+    notes: str = ''
+
+
+class ExpenseRecord(Expense):
+    expense_date: date
+
+
+class DateRange(BaseModel):
+    start_date: date
+    end_date: date
+
+
+async def run_storage(func, *args):
+    """
+    Run a blocking db_helper call on the storage pool
+    Args:
+        func: db_helper function
+        args: Its arguments
+    Returns:
+        The function's result
+    """
+    return await asyncio.get_running_loop().run_in_executor(_executor, partial(func, *args))
+
+
+async def versioned(request: Request, build, *key) -> Response:
+    """
+    Answer a read with an ETag taken from the data version, or 304 if the client's copy is current
+    Args:
+        request: Incoming request, checked for If-None-Match
+        build: Coroutine function producing the response body
+        key: Anything besides the stored data the body depends on
+    Returns:
+        Response with ETag and Cache-Control headers
+    """
+    # The version is read before the data: a write landing in between leaves a
+    # stale tag on fresh data, so the client just fetches again next time
+    version = await run_storage(db_helper.data_version)
+    etag = '"' + '-'.join(str(part) for part in (version, *key)) + '"'
+    headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+
+    if_none_match = request.headers.get('if-none-match', '')
+    if etag in (tag.strip().removeprefix('W/') for tag in if_none_match.split(',')):
+        return Response(status_code=304, headers=headers)
+    return DefaultResponse(await build(), headers=headers)
+
+
+# Declared before /expenses/{expense_date} so 'export' is not parsed as a date
+@app.get('/expenses/export')
+@metrics.timer
+async def export_expenses(start_date: date, end_date: date, category: Optional[str] = None,
+                          format: Literal['csv', 'ndjson'] = 'csv', gzip: bool = False):
+    """
+    Stream the expenses of a date range as CSV or newline-delimited JSON, optionally gzipped
+    """
+    blocks = db_helper.export_expenses(start_date, end_date, category, format, gzip)
+    filename = f'expenses_{start_date}_{end_date}.{format}' + ('.gz' if gzip else '')
+    # Starlette pulls the blocks on its worker threads, so memory stays at one chunk
+    return StreamingResponse(
+        blocks,
+        media_type='application/gzip' if gzip else export.MEDIA_TYPES[format],
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'}
+    )
+
+
+@app.get('/expenses/{expense_date}')
+@metrics.timer
+async def get_expenses(expense_date: date, request: Request):
+    """
+    List the expenses of one date
+    """
+    return await versioned(request, partial(run_storage, db_helper.get_by_date, expense_date))
+
+
+# Declared before /expenses/{expense_date} so 'bulk' is not parsed as a date
+@app.post('/expenses/bulk')
+@metrics.timer
+async def import_expenses(expenses: List[ExpenseRecord]):
+    """
+    Import a batch of expenses across any number of dates in one write
+    """
+    if not await run_storage(db_helper.insert_many, [expense.model_dump() for expense in expenses]):
+        raise HTTPException(status_code=500, detail='Failed to import expenses')
+    return {'message': 'Expenses imported successfully', 'inserted': len(expenses)}
+
+
+@app.post('/expenses/{expense_date}')
+@metrics.timer
+async def add_or_update_expenses(expense_date: date, expenses: List[Expense]):
+    """
+    Replace the expenses of one date with the submitted list
+    """
+    if not await run_storage(db_helper.replace_day, expense_date, [expense.model_dump() for expense in expenses]):
+        raise HTTPException(status_code=500, detail='Failed to update expenses')
+    return {'message': 'Expenses updated successfully'}
+
+
+async def category_breakdown(start_date: date, end_date: date) -> dict:
+    """
+    Total and share of spending per category in a date range
+    Args:
+        start_date: First date of the range
+        end_date: Last date of the range
+    Returns:
+        Dictionary of category -> {Total, Percentage}
+    """
+    summary = await run_storage(db_helper.fetch_sum_date, start_date, end_date)
+    total = sum(row['Total'] for row in summary)
+    return {
+        row['category']: {
+            'Total': row['Total'],
+            'Percentage': (row['Total'] / total) * 100 if total else 0.0
+        }
+        for row in summary
+    }
+
+
+@app.get('/analytic/date')
+@metrics.timer
+async def analytics_by_category(start_date: date, end_date: date, request: Request):
+    """
+    Total and share of spending per category in a date range; cacheable, unlike the POST form
+    """
+    return await versioned(request, partial(category_breakdown, start_date, end_date))
+
+
+@app.post('/analytic/date')
+@metrics.timer
+async def analytics_by_category_post(date_range: DateRange):
+    """
+    Total and share of spending per category in a date range
+    """
+    version = await run_storage(db_helper.data_version)
+    return DefaultResponse(
+        await category_breakdown(date_range.start_date, date_range.end_date),
+        headers={'ETag': f'"{version}"'}
+    )
+
+
+@app.get('/analytic/rollup')
+@metrics.timer
+async def analytics_rollup(start_date: date, end_date: date, request: Request,
+                           granularity: Literal['day', 'week', 'month', 'quarter', 'year'] = 'month'):
+    """
+    Total spending per period and category in a date range, across years
+    """
+    return await versioned(request, partial(run_storage, db_helper.fetch_rollup, start_date, end_date, granularity))
+
+
+@app.get('/analytic/top')
+@metrics.timer
+async def analytics_top(start_date: date, end_date: date, request: Request, n: int = Query(20, ge=1, le=1000)):
+    """
+    The n largest expenses of each category in a date range
+    """
+    return await versioned(request, partial(run_storage, db_helper.fetch_top_expenses, start_date, end_date, n))
+
+
+@app.get('/analytic/percentiles')
+@metrics.timer
+async def analytics_percentiles(start_date: date, end_date: date, request: Request):
+    """
+    p50, p90 and p99 of the expense amounts of each category in a date range
+    """
+    return await versioned(request, partial(run_storage, db_helper.fetch_percentiles, start_date, end_date))
+
+
+async def month_breakdown() -> dict:
+    """
+    Returns:
+        Dictionary of month name -> {Total} for the current year
+    """
+    summary = await run_storage(db_helper.fetch_sum_months)
+    return {calendar.month_name[row['month']]: {'Total': row['total']} for row in summary}
+
+
+@app.get('/analytic/month')
+@metrics.timer
+async def analytics_by_month(request: Request):
+    """
+    Total spending per month of the current year
+    """
+    # The year is part of the tag: the summary changes on 1 January without any write
+    return await versioned(request, month_breakdown, date.today().year)
+
+
+@app.get('/metrics')
+async def prometheus_metrics():
+    """
+    Latency histograms and call/error counters of the storage calls and handlers, in Prometheus text format
+    """
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
@@ -0,0 +1,217 @@
+from typing import List, Dict, Optional, Any
+from datetime import date
+import json
+import mmap
+import os
+import struct
+
+try:
+    import numpy as np
+except ImportError:  # columnar snapshots are optional
+    np = None
+
+# File layout (little endian):
+#   8 bytes   magic
+#   8 bytes   header length (uint64)
+#   header    JSON: rows, categories, source, and {column: [offset, dtype, count]}
+#   columns   each starting on an 8 byte boundary:
+#             id int64, day int32 (date ordinal), amount float64,
+#             category int32 (index into the header's categories),
+#             note_offsets int64 (rows + 1 entries), notes uint8 (UTF-8 heap)
+# Rows are sorted by date so a date range is one contiguous slice.
+MAGIC = b'EXPCOL01'
+
+# date.toordinal() of 1970-01-01, the epoch of numpy's datetime64
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+def available() -> bool:
+    """
+    Returns:
+        bool: True if NumPy is installed and snapshots can be used
+    """
+    return np is not None
+
+
+def _align(size: int) -> int:
+    return (size + 7) & ~7
+
+
+def write_snapshot(path: str, expenses: List[Dict], source: Any = None) -> None:
+    """
+    Write expenses as a columnar snapshot, replacing the file atomically
+    Args:
+        path: Destination file
+        expenses: Expenses to store
+        source: JSON-serializable tag identifying the data the snapshot was built from
+    """
+    categories = sorted({exp['category'] for exp in expenses})
+    codes = {cat: i for i, cat in enumerate(categories)}
+
+    ids = np.fromiter((exp['id'] for exp in expenses), dtype='<i8', count=len(expenses))
+    # One vectorized parse instead of date.fromisoformat per record
+    days = (np.array([str(exp['expense_date']) for exp in expenses], dtype='datetime64[D]').astype('<i8')
+            + EPOCH_ORDINAL).astype('<i4')
+    order = np.lexsort((ids, days))
+
+    notes = [(expenses[i].get('notes') or '').encode('utf-8') for i in order]
+    note_offsets = np.zeros(len(notes) + 1, dtype='<i8')
+    np.cumsum(np.fromiter((len(note) for note in notes), dtype='<i8', count=len(notes)), out=note_offsets[1:])
+
+    columns = {
+        'id': ids[order],
+        'day': days[order],
+        'amount': np.fromiter((expenses[i]['amount'] for i in order), dtype='<f8', count=len(order)),
+        'category': np.fromiter((codes[expenses[i]['category']] for i in order), dtype='<i4', count=len(order)),
+        'note_offsets': note_offsets,
+        'notes': np.frombuffer(b''.join(notes), dtype='u1'),
+    }
+
+    # The header holds the column offsets, so size it first and lay out the data after it
+    layout = {name: [0, array.dtype.str, len(array)] for name, array in columns.items()}
+    header = {'rows': len(expenses), 'categories': categories, 'source': source, 'columns': layout}
+    header_size = len(json.dumps(header)) + 64 * len(columns)
+    offset = _align(16 + header_size)
+    for name, array in columns.items():
+        layout[name][0] = offset
+        offset = _align(offset + array.nbytes)
+    header_bytes = json.dumps(header).encode('utf-8').ljust(header_size)
+
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC + struct.pack('<Q', len(header_bytes)) + header_bytes)
+        for name, array in columns.items():
+            f.seek(layout[name][0])
+            f.write(array.tobytes())
+        f.truncate(max(offset, f.tell()))
+    os.replace(tmp_path, path)
+
+
+class ColumnarSnapshot:
+    """
+    Read-only, memory-mapped view of a columnar snapshot
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: Snapshot file written by write_snapshot
+        """
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mmap[:8] != MAGIC:
+            self._mmap.close()
+            raise ValueError(f"{path} is not an expense snapshot")
+
+        (header_size,) = struct.unpack('<Q', self._mmap[8:16])
+        header = json.loads(self._mmap[16:16 + header_size].decode('utf-8'))
+        self.rows = header['rows']
+        self.categories = header['categories']
+        self.source = header['source']
+        self._columns = {
+            name: np.frombuffer(self._mmap, dtype=dtype, count=count, offset=offset)
+            for name, (offset, dtype, count) in header['columns'].items()
+        }
+        self.ids = self._columns['id']
+        self.days = self._columns['day']
+        self.amounts = self._columns['amount']
+        self.codes = self._columns['category']
+
+    def _slice(self, start: str, end: str) -> slice:
+        """
+        Rows between two ISO dates, both inclusive
+        """
+        lo = np.searchsorted(self.days, date.fromisoformat(start).toordinal(), side='left')
+        hi = np.searchsorted(self.days, date.fromisoformat(end).toordinal(), side='right')
+        return slice(int(lo), int(hi))
+
+    def category_totals(self, start: str, end: str) -> Dict[str, List]:
+        """
+        Total and count per category between two ISO dates
+        Args:
+            start: First date of the range
+            end: Last date of the range
+        Returns:
+            Dictionary of category -> [total, count], only for categories with rows
+        """
+        rows = self._slice(start, end)
+        codes = self.codes[rows]
+        totals = np.bincount(codes, weights=self.amounts[rows], minlength=len(self.categories))
+        counts = np.bincount(codes, minlength=len(self.categories))
+        return {
+            self.categories[i]: [float(totals[i]), int(counts[i])]
+            for i in np.flatnonzero(counts)
+        }
+
+    def daily_totals(self, start: str, end: str) -> Dict[str, Dict[str, float]]:
+        """
+        Total per day and category between two ISO dates
+        Args:
+            start: First date of the range
+            end: Last date of the range
+        Returns:
+            Dictionary of ISO date -> {category: total}
+        """
+        rows = self._slice(start, end)
+        keys = self.days[rows].astype('<i8') * len(self.categories) + self.codes[rows]
+        unique, inverse = np.unique(keys, return_inverse=True)
+        totals = np.bincount(inverse.ravel(), weights=self.amounts[rows], minlength=len(unique))
+
+        result = {}
+        for key, total in zip(unique.tolist(), totals.tolist()):
+            day, code = divmod(key, len(self.categories))
+            result.setdefault(date.fromordinal(day).isoformat(), {})[self.categories[code]] = total
+        return result
+
+    def contains_ids(self, ids: List[int]) -> List[bool]:
+        """
+        Args:
+            ids: Expense IDs to look for
+        Returns:
+            List of flags, True where the ID is in the snapshot
+        """
+        return np.isin(np.asarray(ids, dtype='<i8'), self.ids).tolist()
+
+    def record(self, row: int) -> Dict:
+        """
+        Materialize one row as an expense dictionary
+        Args:
+            row: Row number in date order
+        Returns:
+            Expense record
+        """
+        offsets = self._columns['note_offsets']
+        notes = self._columns['notes'][offsets[row]:offsets[row + 1]].tobytes().decode('utf-8')
+        return {
+            'id': int(self.ids[row]),
+            'expense_date': date.fromordinal(int(self.days[row])).isoformat(),
+            'amount': float(self.amounts[row]),
+            'category': self.categories[self.codes[row]],
+            'notes': notes
+        }
+
+    def close(self) -> None:
+        """
+        Release the memory map
+        """
+        self._columns = {}
+        self.ids = self.days = self.amounts = self.codes = None
+        try:
+            self._mmap.close()
+        except BufferError:
+            # A caller still holds a slice of a column; the map goes away with it
+            pass
+
+
+def open_snapshot(path: Optional[str]) -> Optional[ColumnarSnapshot]:
+    """
+    Open a snapshot if NumPy is available and the file exists
+    Args:
+        path: Snapshot file, or None when snapshots are disabled
+    Returns:
+        Opened snapshot or None
+    """
+    if path is None or np is None or not os.path.exists(path):
+        return None
+    return ColumnarSnapshot(path)
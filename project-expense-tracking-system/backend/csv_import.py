@@ -0,0 +1,135 @@
+from typing import List, Dict, Optional, Tuple, Union, IO
+import os
+import numpy as np
+import pandas as pd
+from logging_setup import setup_logging
+import db_helper
+
+# Setup logger
+logger = setup_logging('csv_import')
+
+# Rows read, validated and written per step
+IMPORT_CHUNK_SIZE = 10000
+
+# Bad rows returned in the summary; the full list goes to the report file
+SAMPLE_SIZE = 100
+
+# Accepted header names (compared lower case, trimmed) -> expense field
+COLUMN_ALIASES = {
+    'expense_date': 'expense_date', 'date': 'expense_date',
+    'amount': 'amount',
+    'category': 'category',
+    'notes': 'notes', 'note': 'notes', 'description': 'notes'
+}
+
+REQUIRED_COLUMNS = ['expense_date', 'amount', 'category']
+
+
+def _rename_columns(chunk: pd.DataFrame) -> pd.DataFrame:
+    """
+    Map the CSV header onto expense fields
+    Args:
+        chunk: Raw chunk as read from the file
+    Returns:
+        Chunk with expense field names
+    Raises:
+        ValueError: If a required column is missing
+    """
+    renamed = chunk.rename(columns=lambda name: COLUMN_ALIASES.get(str(name).strip().lower(), name))
+    missing = [column for column in REQUIRED_COLUMNS if column not in renamed.columns]
+    if missing:
+        raise ValueError(f"CSV is missing required columns: {', '.join(missing)}")
+    if 'notes' not in renamed.columns:
+        renamed['notes'] = ''
+    return renamed
+
+
+def validate_chunk(chunk: pd.DataFrame, first_line: int, date_format: Optional[str] = None,
+                   categories: Optional[List[str]] = None) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Normalize and check a chunk with column-wide operations
+    Args:
+        chunk: Chunk with expense field names, all values as strings
+        first_line: Line number of the chunk's first row in the file
+        date_format: strptime format of the dates, None for ISO 8601
+        categories: Allowed categories (matched case-insensitively), None to accept any
+    Returns:
+        Tuple of (valid rows with expense_date, amount, category and notes;
+        rejected rows with their line, reason and original values)
+    """
+    dates = pd.to_datetime(chunk['expense_date'].str.strip(), format=date_format or 'ISO8601', errors='coerce')
+    # Currency symbols, thousands separators and spaces are dropped before parsing
+    amounts = pd.to_numeric(chunk['amount'].str.replace(r'[^\d.\-+eE]', '', regex=True), errors='coerce')
+    category = chunk['category'].str.strip().str.replace(r'\s+', ' ', regex=True)
+    if categories is not None:
+        canonical = {cat.lower(): cat for cat in categories}
+        category = category.str.lower().map(canonical)
+
+    bad_date = dates.isna()
+    bad_amount = amounts.isna() | ~(amounts > 0) | amounts.isin([float('inf')])
+    bad_category = category.isna() | (category == '')
+
+    reason = (
+        bad_date.map({True: 'invalid date; ', False: ''})
+        + bad_amount.map({True: 'amount must be a positive number; ', False: ''})
+        + bad_category.map({True: 'unknown category; ' if categories is not None else 'missing category; ', False: ''})
+    ).str.rstrip('; ')
+    bad = bad_date | bad_amount | bad_category
+
+    valid = pd.DataFrame({
+        'expense_date': dates[~bad].dt.strftime('%Y-%m-%d'),
+        'amount': amounts[~bad].astype(float),
+        'category': category[~bad],
+        'notes': chunk['notes'][~bad].str.strip()
+    })
+    rejected = chunk[bad].copy()
+    rejected.insert(0, 'reason', reason[bad])
+    rejected.insert(0, 'line', first_line + (np.flatnonzero(bad.to_numpy())))
+    return valid, rejected
+
+
+def import_csv(source: Union[str, IO], chunk_size: int = IMPORT_CHUNK_SIZE, date_format: Optional[str] = None,
+               categories: Optional[List[str]] = None, report_file: Optional[str] = None) -> Dict:
+    """
+    Import expenses from a CSV file, one validated chunk and one storage write at a time
+    Args:
+        source: Path or open file with a header row (date/expense_date, amount, category, optional notes)
+        chunk_size: Rows per chunk
+        date_format: strptime format of the dates, None for ISO 8601
+        categories: Allowed categories, None to accept any
+        report_file: Where to write every rejected row as CSV, None to skip
+    Returns:
+        Dictionary with rows, imported, rejected, failed (rows of chunks the store refused)
+        and samples (the first rejected rows)
+    """
+    summary = {'rows': 0, 'imported': 0, 'rejected': 0, 'failed': 0, 'samples': []}
+    if report_file is not None and os.path.exists(report_file):
+        os.remove(report_file)
+
+    # Everything is read as text so the checks see exactly what the file holds
+    reader = pd.read_csv(source, dtype=str, keep_default_na=False, chunksize=chunk_size, skipinitialspace=True)
+    # Line 1 is the header
+    first_line = 2
+    for chunk in reader:
+        chunk = _rename_columns(chunk)
+        valid, rejected = validate_chunk(chunk, first_line, date_format, categories)
+        first_line += len(chunk)
+        summary['rows'] += len(chunk)
+
+        if not valid.empty:
+            if db_helper.insert_many(valid.to_dict('records')):
+                summary['imported'] += len(valid)
+            else:
+                summary['failed'] += len(valid)
+
+        if not rejected.empty:
+            summary['rejected'] += len(rejected)
+            room = SAMPLE_SIZE - len(summary['samples'])
+            if room > 0:
+                summary['samples'] += rejected.head(room).to_dict('records')
+            if report_file is not None:
+                rejected.to_csv(report_file, mode='a', index=False, header=not os.path.exists(report_file))
+
+    logger.info(f"Imported {summary['imported']} of {summary['rows']} rows, "
+                f"rejected {summary['rejected']}, failed {summary['failed']}")
+    return summary
@@ -1,46 +1,172 @@
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Iterator, Optional, Any
 from datetime import date
-import json
+import argparse
 import os
+import threading
 from logging_setup import setup_logging
+from storage_backend import ExpenseBackend
+from json_backend import JsonBackend
+from sqlite_backend import SqliteBackend
+import export
+import rollup
+import stream_stats
+import metrics
 
 # Setup logger
 logger = setup_logging('db_helper')
 
-# File path for storing expenses
+# Storage engine used by the functions below: 'json' or 'sqlite'
+BACKEND = os.environ.get('EXPENSE_BACKEND', 'json')
+
+# File path for storing expenses (compacted snapshot)
 DATA_FILE = 'expenses.json'
 
+# Append-only log of writes made since the last snapshot, one JSON entry per line
+LOG_FILE = 'expenses.log'
+
+# Persisted counter holding the last ID handed out
+SEQ_FILE = 'expenses.seq'
+
+# Fold the log into the snapshot once it grows past this many bytes
+COMPACT_THRESHOLD = 1024 * 1024
+
+# Memory-mapped columnar copy written on compaction (needs NumPy), None to disable
+COLUMNAR_FILE = 'expenses.col'
+
+# Database file used by the SQLite backend
+SQLITE_FILE = 'expenses.db'
+
+# fsync policy for writes: 'none', 'batch' (once per flush) or 'always' (every write)
+DURABILITY = os.environ.get('EXPENSE_DURABILITY', 'batch')
+
+# Coalesce JSON writes arriving within this many milliseconds into one flush and one fsync.
+# Under 'batch' the default window is a few milliseconds: a lone write waits that much longer,
+# and in exchange concurrent writes share one fsync instead of paying for one each. Set 0 to
+# flush every write immediately, which makes 'batch' cost as much as 'always' under load.
+GROUP_COMMIT_MS = float(os.environ.get('EXPENSE_GROUP_COMMIT_MS', 2 if DURABILITY == 'batch' else 0))
+
+# Records per chunk when streaming an export
+EXPORT_CHUNK_SIZE = 1000
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def create_backend(name: str) -> ExpenseBackend:
+    """
+    Build a storage backend from the module settings
+    Args:
+        name: 'json' or 'sqlite'
+    Returns:
+        New backend instance
+    """
+    if name == 'json':
+        return JsonBackend(DATA_FILE, LOG_FILE, SEQ_FILE, COMPACT_THRESHOLD, COLUMNAR_FILE,
+                           durability=DURABILITY, group_commit_ms=GROUP_COMMIT_MS)
+    if name == 'sqlite':
+        return SqliteBackend(SQLITE_FILE, durability=DURABILITY)
+    raise ValueError(f"Unknown storage backend: {name}")
+
+
+def get_backend() -> ExpenseBackend:
+    """
+    Return the active storage backend, creating it from BACKEND on first use
+    Returns:
+        Active backend
+    """
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = create_backend(BACKEND)
+            logger.info(f'Using {_backend.name} storage backend')
+        return _backend
+
+
+def set_backend(backend: ExpenseBackend) -> None:
+    """
+    Swap the storage backend used by the db_helper functions
+    Args:
+        backend: Backend to use from now on
+    """
+    global _backend
+    with _backend_lock:
+        if _backend is not None and _backend is not backend:
+            _backend.close()
+        _backend = backend
+
+
+@metrics.timer
+def cache_stats() -> Dict[str, Any]:
+    """
+    Report how often reads were served from memory
+    Returns:
+        Dictionary with hits, misses and hit_ratio
+    """
+    return get_backend().cache_stats()
+
+
+@metrics.timer
+def reset_cache() -> None:
+    """
+    Drop any cached snapshot and zero the hit/miss counters
+    """
+    get_backend().reset_cache()
+
+
+@metrics.timer
+def data_version() -> int:
+    """
+    Current version of the stored data, for validating cached responses
+    Returns:
+        Counter that grows with every write
+    """
+    return get_backend().data_version()
+
+
+@metrics.timer
 def load_data() -> List[Dict]:
     """
-    Load expenses data from JSON file
+    Load expenses data from the active backend
     Returns:
-        List of expenses
+        List of expenses (may be shared with a cache, do not modify it in place)
     """
     try:
-        if os.path.exists(DATA_FILE):
-            with open(DATA_FILE, 'r') as f:
-                return json.load(f)
-        return []
+        return get_backend().all_expenses()
     except Exception as e:
         logger.error(f"Error loading data: {e}")
         return []
 
+@metrics.timer
 def save_data(data: List[Dict]) -> bool:
     """
-    Save expenses data to JSON file
+    Replace the stored expenses with the given list
     Args:
         data: List of expenses to save
     Returns:
         bool: True if successful, False otherwise
     """
     try:
-        with open(DATA_FILE, 'w') as f:
-            json.dump(data, f, indent=2, default=str)
+        get_backend().replace_all(data)
         return True
     except Exception as e:
         logger.error(f"Error saving data: {e}")
         return False
 
+@metrics.timer
+def compact() -> bool:
+    """
+    Compact the storage (fold the JSON append log into the snapshot)
+    Returns:
+        bool: True if successful, False otherwise
+    """
+    try:
+        get_backend().compact()
+        return True
+    except Exception as e:
+        logger.error(f"Error compacting data: {e}")
+        return False
+
+@metrics.timer
 def get_all_data() -> List[Dict]:
     """
     Fetch all expenses
@@ -48,8 +174,9 @@ def get_all_data() -> List[Dict]:
         List of all expenses
     """
     logger.info('Fetching all expenses')
-    return load_data()
+    return list(load_data())
 
+@metrics.timer
 def get_by_date(expense_date: date) -> List[Dict]:
     """
     Fetch expenses for a specific date
@@ -59,9 +186,22 @@ def get_by_date(expense_date: date) -> List[Dict]:
         List of expenses for the specified date
     """
     logger.info(f'Fetching expenses for date: {expense_date}')
-    expenses = load_data()
-    return [exp for exp in expenses if exp['expense_date'] == str(expense_date)]
+    return get_backend().by_date(str(expense_date))
+
+@metrics.timer
+def get_by_date_range(start_date: date, end_date: date) -> List[Dict]:
+    """
+    Fetch expenses for a date range
+    Args:
+        start_date: Start date of the range
+        end_date: End date of the range
+    Returns:
+        List of expenses in the range, ordered by date
+    """
+    logger.info(f'Fetching expenses from {start_date} to {end_date}')
+    return get_backend().by_date_range(str(start_date), str(end_date))
 
+@metrics.timer
 def insert_data(expense_date: date, amount: float, category: str, notes: str) -> bool:
     """
     Insert a new expense record
@@ -75,20 +215,64 @@ def insert_data(expense_date: date, amount: float, category: str, notes: str) ->
     """
     logger.info(f'Inserting expense for date {expense_date}')
     try:
-        expenses = load_data()
-        new_expense = {
-            'id': len(expenses) + 1,
-            'expense_date': str(expense_date),
-            'amount': amount,
-            'category': category,
-            'notes': notes
-        }
-        expenses.append(new_expense)
-        return save_data(expenses)
+        get_backend().insert(str(expense_date), amount, category, notes)
+        return True
     except Exception as e:
         logger.error(f"Error inserting expense: {e}")
         return False
 
+@metrics.timer
+def insert_many(expenses: List[Dict]) -> bool:
+    """
+    Insert a batch of expense records, across any number of dates, in one write
+    Args:
+        expenses: List of expenses with expense_date, amount, category and notes
+    Returns:
+        bool: True if successful, False otherwise
+    """
+    logger.info(f'Inserting {len(expenses)} expenses')
+    try:
+        get_backend().insert_many(expenses)
+        return True
+    except Exception as e:
+        logger.error(f"Error inserting expenses: {e}")
+        return False
+
+@metrics.timer
+def replace_days(expenses_by_date: Dict[date, List[Dict]]) -> bool:
+    """
+    Replace all expenses of several dates in one write
+    Args:
+        expenses_by_date: Mapping of date -> list of expenses with amount, category and notes
+    Returns:
+        bool: True if successful, False otherwise
+    """
+    logger.info(f'Replacing expenses for {len(expenses_by_date)} dates')
+    try:
+        batch = [
+            {**expense, 'expense_date': str(expense_date)}
+            for expense_date, expenses in expenses_by_date.items()
+            for expense in expenses
+        ]
+        get_backend().replace_days([str(expense_date) for expense_date in expenses_by_date], batch)
+        return True
+    except Exception as e:
+        logger.error(f"Error replacing expenses: {e}")
+        return False
+
+@metrics.timer
+def replace_day(expense_date: date, expenses: List[Dict]) -> bool:
+    """
+    Replace all expenses of one date in one write
+    Args:
+        expense_date: Date to replace expenses for
+        expenses: List of expenses with amount, category and notes
+    Returns:
+        bool: True if successful, False otherwise
+    """
+    return replace_days({expense_date: expenses})
+
+@metrics.timer
 def delete_data(expense_date: date) -> bool:
     """
     Delete expenses for a specific date
@@ -99,13 +283,13 @@ def delete_data(expense_date: date) -> bool:
     """
     logger.info(f'Deleting expenses for date {expense_date}')
     try:
-        expenses = load_data()
-        expenses = [exp for exp in expenses if exp['expense_date'] != str(expense_date)]
-        return save_data(expenses)
+        get_backend().delete_date(str(expense_date))
+        return True
     except Exception as e:
         logger.error(f"Error deleting expenses: {e}")
         return False
 
+@metrics.timer
 def get_by_id(expense_id: int) -> Optional[Dict]:
     """
     Fetch expense by ID
@@ -115,12 +299,9 @@ def get_by_id(expense_id: int) -> Optional[Dict]:
         Expense record if found, None otherwise
     """
     logger.info(f'Fetching expense with ID: {expense_id}')
-    expenses = load_data()
-    for expense in expenses:
-        if expense['id'] == expense_id:
-            return expense
-    return None
+    return get_backend().by_id(expense_id)
 
+@metrics.timer
 def fetch_sum_date(start_date: date, end_date: date) -> List[Dict]:
     """
     Fetch expense summary by category for a date range
@@ -132,22 +313,8 @@ def fetch_sum_date(start_date: date, end_date: date) -> List[Dict]:
     """
     logger.info(f'Fetching expense summary from {start_date} to {end_date}')
     try:
-        expenses = load_data()
-        filtered_expenses = [
-            exp for exp in expenses 
-            if start_date <= date.fromisoformat(exp['expense_date']) <= end_date
-        ]
-        
-        # Calculate totals by category
-        category_totals = {}
-        for expense in filtered_expenses:
-            category = expense['category']
-            amount = expense['amount']
-            if category in category_totals:
-                category_totals[category] += amount
-            else:
-                category_totals[category] = amount
-        
+        category_totals = get_backend().category_totals(str(start_date), str(end_date))
+
         # Convert to list of dictionaries
         return [
             {'category': cat, 'Total': total}
@@ -157,6 +324,7 @@ def fetch_sum_date(start_date: date, end_date: date) -> List[Dict]:
         logger.error(f"Error fetching expense summary: {e}")
         return []
 
+@metrics.timer
 def fetch_sum_months() -> List[Dict]:
     """
     Fetch monthly expense summary for the current year
@@ -165,25 +333,8 @@ def fetch_sum_months() -> List[Dict]:
     """
     logger.info('Fetching monthly expense summary')
     try:
-        expenses = load_data()
-        current_year = date.today().year
-        
-        # Filter expenses for current year
-        yearly_expenses = [
-            exp for exp in expenses 
-            if date.fromisoformat(exp['expense_date']).year == current_year
-        ]
-        
-        # Calculate monthly totals
-        monthly_totals = {}
-        for expense in yearly_expenses:
-            month = date.fromisoformat(expense['expense_date']).month
-            amount = expense['amount']
-            if month in monthly_totals:
-                monthly_totals[month] += amount
-            else:
-                monthly_totals[month] = amount
-        
+        monthly_totals = get_backend().month_totals(date.today().year)
+
         # Convert to list of dictionaries
         return [
             {'month': month, 'total': total}
@@ -193,7 +344,164 @@ def fetch_sum_months() -> List[Dict]:
         logger.error(f"Error fetching monthly summary: {e}")
         return []
 
+@metrics.timer
+def fetch_rollup(start_date: date, end_date: date, granularity: str = 'month') -> List[Dict]:
+    """
+    Fetch expense totals per period and category, across years
+    Args:
+        start_date: Start date of the range
+        end_date: End date of the range
+        granularity: 'day', 'week', 'month', 'quarter' or 'year'
+    Returns:
+        List of {period, start, category, total} ordered by period
+    """
+    logger.info(f'Fetching {granularity} rollup from {start_date} to {end_date}')
+    try:
+        return rollup.rollup(get_backend().daily_totals(str(start_date), str(end_date)), granularity)
+    except Exception as e:
+        logger.error(f"Error fetching rollup: {e}")
+        return []
+
+@metrics.timer
+def fetch_top_expenses(start_date: date, end_date: date, n: int = 20) -> Dict[str, List[Dict]]:
+    """
+    Fetch the largest expenses of each category in a date range, in one streaming pass
+    Args:
+        start_date: Start date of the range
+        end_date: End date of the range
+        n: How many expenses to keep per category
+    Returns:
+        Dictionary of category -> expenses, largest first
+    """
+    logger.info(f'Fetching top {n} expenses per category from {start_date} to {end_date}')
+    try:
+        return stream_stats.top_n_by_category(get_backend().iter_range(str(start_date), str(end_date)), n)
+    except Exception as e:
+        logger.error(f"Error fetching top expenses: {e}")
+        return {}
 
+@metrics.timer
+def fetch_percentiles(start_date: date, end_date: date, quantiles: tuple = (0.5, 0.9, 0.99)) -> Dict[str, Dict]:
+    """
+    Fetch spending percentiles per category in a date range, in one streaming pass
+    Args:
+        start_date: Start date of the range
+        end_date: End date of the range
+        quantiles: Quantiles to report, between 0 and 1
+    Returns:
+        Dictionary of category -> {'count': n, 'p50': value, ...}, values within 1% of the exact ones
+    """
+    logger.info(f'Fetching spending percentiles from {start_date} to {end_date}')
+    try:
+        sketches = stream_stats.sketch_by_category(get_backend().iter_range(str(start_date), str(end_date)))
+        return {
+            category: {'count': sketch.count, **{f'p{q * 100:g}': sketch.quantile(q) for q in quantiles}}
+            for category, sketch in sketches.items()
+        }
+    except Exception as e:
+        logger.error(f"Error fetching percentiles: {e}")
+        return {}
+
+@metrics.timer
+def iter_expense_chunks(start_date: date, end_date: date, category: Optional[str] = None,
+                        chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[List[Dict]]:
+    """
+    Stream the expenses of a date range in fixed-size chunks
+    Args:
+        start_date: Start date of the range
+        end_date: End date of the range
+        category: Only this category, None for all
+        chunk_size: Records per chunk
+    Returns:
+        Iterator over lists of at most chunk_size expenses, in date order
+    """
+    logger.info(f'Streaming expenses from {start_date} to {end_date}')
+    yield from export.chunked(get_backend().iter_range(str(start_date), str(end_date), category), chunk_size)
+
+def export_expenses(start_date: date, end_date: date, category: Optional[str] = None, fmt: str = 'csv',
+                    compress: bool = False, chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    Export the expenses of a date range as a stream of bytes, one block per chunk
+    Args:
+        start_date: Start date of the range
+        end_date: End date of the range
+        category: Only this category, None for all
+        fmt: 'csv' or 'ndjson'
+        compress: gzip the stream
+        chunk_size: Records per chunk
+    Returns:
+        Iterator over encoded blocks
+    Raises:
+        ValueError: If the format is unknown (checked before anything is read)
+    """
+    if fmt not in export.FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    return _export_stream(start_date, end_date, category, fmt, compress, chunk_size)
+
+@metrics.timer
+def _export_stream(start_date: date, end_date: date, category: Optional[str], fmt: str, compress: bool,
+                   chunk_size: int) -> Iterator[bytes]:
+    # A generator, so the timer covers the whole stream and not just setting it up.
+    # Once streaming has started a failure can only cut the stream short, so log it and re-raise
+    blocks = export.encode(iter_expense_chunks(start_date, end_date, category, chunk_size), fmt)
+    if compress:
+        blocks = export.gzipped(blocks)
+    try:
+        yield from blocks
+    except Exception as e:
+        logger.error(f"Error exporting expenses: {e}")
+        raise
+
+@metrics.timer
+def check_consistency() -> bool:
+    """
+    Check the incremental rollup against a full scan of the expenses
+    Returns:
+        bool: True if the aggregates match the records
+    """
+    consistent = get_backend().check_consistency()
+    if not consistent:
+        logger.error('Expense rollup does not match the stored records')
+    return consistent
+
+@metrics.timer
+def migrate_json_to_sqlite(json_file: str, sqlite_file: str) -> int:
+    """
+    Copy the expenses of a JSON store (snapshot plus append log) into a SQLite database
+    Args:
+        json_file: Path of the JSON snapshot
+        sqlite_file: Path of the SQLite database, created if missing
+    Returns:
+        Number of expenses copied
+    """
+    source = JsonBackend(json_file)
+    target = SqliteBackend(sqlite_file)
+    try:
+        expenses = source.all_expenses()
+        target.replace_all(expenses)
+        logger.info(f'Migrated {len(expenses)} expenses from {json_file} to {sqlite_file}')
+        return len(expenses)
+    finally:
+        target.close()
 
 
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Expense storage maintenance')
+    commands = parser.add_subparsers(dest='command', required=True)
+    migrate = commands.add_parser('migrate', help='Copy expenses.json into a SQLite database')
+    migrate.add_argument('source', nargs='?', default=DATA_FILE)
+    migrate.add_argument('target', nargs='?', default=SQLITE_FILE)
+    bulk = commands.add_parser('import', help='Import expenses from a CSV file')
+    bulk.add_argument('source')
+    bulk.add_argument('--chunk-size', type=int, default=10000)
+    bulk.add_argument('--date-format', default=None)
+    bulk.add_argument('--report', default=None, help='Write rejected rows to this CSV file')
+    args = parser.parse_args()
 
+    if args.command == 'migrate':
+        count = migrate_json_to_sqlite(args.source, args.target)
+        print(f'Copied {count} expenses into {args.target}')
+    elif args.command == 'import':
+        import csv_import
+        summary = csv_import.import_csv(args.source, args.chunk_size, args.date_format, report_file=args.report)
+        print(f"Imported {summary['imported']} of {summary['rows']} rows, rejected {summary['rejected']}")
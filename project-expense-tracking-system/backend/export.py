@@ -0,0 +1,74 @@
+from typing import List, Dict, Iterable, Iterator
+import csv
+import io
+import itertools
+import json
+import zlib
+
+FORMATS = ('csv', 'ndjson')
+
+FIELDS = ['id', 'expense_date', 'amount', 'category', 'notes']
+
+MEDIA_TYPES = {'csv': 'text/csv', 'ndjson': 'application/x-ndjson'}
+
+
+def chunked(records: Iterable[Dict], chunk_size: int) -> Iterator[List[Dict]]:
+    """
+    Group a stream of records into lists of at most chunk_size
+    Args:
+        records: Records, consumed lazily
+        chunk_size: Records per chunk
+    Returns:
+        Iterator over the chunks
+    """
+    records = iter(records)
+    while True:
+        chunk = list(itertools.islice(records, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def encode(chunks: Iterable[List[Dict]], fmt: str) -> Iterator[bytes]:
+    """
+    Serialize chunks of records, one block of bytes per chunk
+    Args:
+        chunks: Lists of expense records
+        fmt: 'csv' (with a header row) or 'ndjson'
+    Returns:
+        Iterator over UTF-8 encoded blocks
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    if fmt == 'csv':
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=FIELDS, extrasaction='ignore', lineterminator='\n')
+        writer.writeheader()
+        # The header goes out straight away so the client sees bytes before the first chunk is read
+        yield buffer.getvalue().encode('utf-8')
+        for chunk in chunks:
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerows(chunk)
+            yield buffer.getvalue().encode('utf-8')
+    else:
+        for chunk in chunks:
+            yield ''.join(
+                json.dumps({field: record.get(field) for field in FIELDS}, default=str) + '\n' for record in chunk
+            ).encode('utf-8')
+
+
+def gzipped(blocks: Iterable[bytes], level: int = 6) -> Iterator[bytes]:
+    """
+    Compress a byte stream into one gzip member, block by block
+    Args:
+        blocks: Uncompressed blocks
+        level: zlib compression level
+    Returns:
+        Iterator over compressed blocks
+    """
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for block in blocks:
+        # A sync flush per block lets the client decompress each chunk as it arrives
+        yield compressor.compress(block) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
@@ -0,0 +1,71 @@
+from contextlib import contextmanager
+import os
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# How hard a write has to reach the disk before it is acknowledged
+DURABILITY_LEVELS = ('none', 'batch', 'always')
+
+
+@contextmanager
+def locked(path: str, shared: bool = False):
+    """
+    Hold an advisory lock on a lock file, across processes
+    Args:
+        path: Lock file, created if missing
+        shared: Take a shared (reader) lock instead of an exclusive one
+    """
+    with open(path, 'a+') as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+        else:
+            # msvcrt only has exclusive byte-range locks
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def fsync_dir(path: str) -> None:
+    """
+    Make a rename in the directory of path durable (no-op where unsupported)
+    Args:
+        path: File whose directory entry changed
+    """
+    if fcntl is None:
+        return
+    fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def atomic_write(path: str, text: str, fsync: bool = True) -> None:
+    """
+    Replace a file with new contents so readers see either the old or the new file
+    Args:
+        path: File to replace
+        text: New contents
+        fsync: Flush the data and the rename to disk before returning
+    """
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w') as f:
+        f.write(text)
+        if fsync:
+            f.flush()
+            os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    if fsync:
+        fsync_dir(path)
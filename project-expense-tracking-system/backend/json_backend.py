@@ -0,0 +1,922 @@
+from contextlib import contextmanager
+from typing import List, Dict, Iterator, Optional, Any
+import bisect
+import calendar
+import json
+import math
+import os
+import threading
+import time
+from logging_setup import setup_logging
+from storage_backend import ExpenseBackend
+from file_lock import DURABILITY_LEVELS, atomic_write, locked
+import columnar_snapshot
+
+# Setup logger
+logger = setup_logging('json_backend')
+
+
+class ReadWriteLock:
+    """
+    Many readers or one writer, within one process. A waiting writer holds back
+    new readers, so a steady stream of reads cannot starve it. Not reentrant.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._readers = 0
+        self._writer = False
+        self._writers_waiting = 0
+
+    @contextmanager
+    def reading(self):
+        with self._cond:
+            while self._writer or self._writers_waiting:
+                self._cond.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                if not self._readers:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def writing(self):
+        with self._cond:
+            self._writers_waiting += 1
+            try:
+                while self._writer or self._readers:
+                    self._cond.wait()
+            finally:
+                self._writers_waiting -= 1
+            self._writer = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writer = False
+                self._cond.notify_all()
+
+
+class ExpenseIndex:
+    """
+    In-memory copy of the expenses with a hash index on id, a sorted date index
+    and a per-day x per-category rollup with prefix sums over the days.
+    Writes are patched in place under the write side of a reader/writer lock and
+    the public read methods take the read side, so a write costs the same at any
+    size and readers never see one half-applied.
+    """
+
+    def __init__(self, expenses: List[Dict]):
+        self.by_id = {}
+        self.by_date = {}
+        self.dates = []
+        # day -> {category: [total, count]}
+        self.day_totals = {}
+        # _prefix[i] holds {category: [total, count]} for dates[0..i]; entries
+        # past a changed day are dropped and rebuilt on the next range query
+        self._prefix = []
+        # Concurrent readers extend _prefix lazily, so building it takes this lock
+        self._prefix_lock = threading.Lock()
+        self._lock = ReadWriteLock()
+        self._records = None
+        for expense in expenses:
+            self.add(expense)
+
+    def _touch_day(self, day: str) -> None:
+        """
+        Drop the prefix sums from one day onwards
+        Args:
+            day: ISO date string that changed
+        """
+        with self._prefix_lock:
+            del self._prefix[bisect.bisect_left(self.dates, day):]
+
+    def add(self, expense: Dict) -> bool:
+        """
+        Add one expense, ignoring IDs that are already present; only for an index not yet shared
+        Args:
+            expense: Expense record to add
+        Returns:
+            bool: True if the record was added
+        """
+        if expense['id'] in self.by_id:
+            return False
+        self.by_id[expense['id']] = expense
+        day = expense['expense_date']
+        if day not in self.by_date:
+            self.by_date[day] = []
+            self.day_totals[day] = {}
+            bisect.insort(self.dates, day)
+        self.by_date[day].append(expense)
+
+        totals = self.day_totals[day].setdefault(expense['category'], [0, 0])
+        totals[0] += expense['amount']
+        totals[1] += 1
+        self._touch_day(day)
+        self._records = None
+        return True
+
+    def remove_date(self, day: str) -> List[Dict]:
+        """
+        Remove every expense on one date; only for an index not yet shared
+        Args:
+            day: ISO date string
+        Returns:
+            List of removed expenses
+        """
+        removed = self.by_date.pop(day, [])
+        if removed:
+            self._touch_day(day)
+            del self.day_totals[day]
+            del self.dates[bisect.bisect_left(self.dates, day)]
+            for expense in removed:
+                del self.by_id[expense['id']]
+            self._records = None
+        return removed
+
+    def get(self, expense_id: int) -> Optional[Dict]:
+        with self._lock.reading():
+            return self.by_id.get(expense_id)
+
+    def on_date(self, day: str) -> List[Dict]:
+        with self._lock.reading():
+            return list(self.by_date.get(day, ()))
+
+    def days(self, start: str, end: str, category: Optional[str] = None) -> List[str]:
+        """
+        List the dates between two ISO dates that have expenses
+        Args:
+            start: First date of the range
+            end: Last date of the range
+            category: Only dates with expenses in this category, None for all
+        Returns:
+            List of ISO dates in order
+        """
+        with self._lock.reading():
+            lo = bisect.bisect_left(self.dates, start)
+            hi = bisect.bisect_right(self.dates, end)
+            return [day for day in self.dates[lo:hi] if category is None or category in self.day_totals[day]]
+
+    def span(self) -> Optional[tuple]:
+        """
+        Returns:
+            Tuple of (first date, last date), or None if there are no expenses
+        """
+        with self._lock.reading():
+            return (self.dates[0], self.dates[-1]) if self.dates else None
+
+    def range(self, start: str, end: str) -> List[Dict]:
+        """
+        Collect the expenses between two ISO dates, both inclusive
+        Args:
+            start: First date of the range
+            end: Last date of the range
+        Returns:
+            List of expenses in date order
+        """
+        with self._lock.reading():
+            lo = bisect.bisect_left(self.dates, start)
+            hi = bisect.bisect_right(self.dates, end)
+            return [exp for day in self.dates[lo:hi] for exp in self.by_date[day]]
+
+    def _prefix_at(self, position: int) -> Dict[str, list]:
+        """
+        Cumulative category totals up to and including dates[position]
+        Args:
+            position: Index into the sorted dates, -1 for the empty prefix
+        Returns:
+            Dictionary of category -> [total, count]
+        """
+        if position < 0:
+            return {}
+        with self._prefix_lock:
+            while len(self._prefix) <= position:
+                i = len(self._prefix)
+                running = {cat: list(values) for cat, values in self._prefix[i - 1].items()} if i else {}
+                for cat, (total, count) in self.day_totals[self.dates[i]].items():
+                    values = running.setdefault(cat, [0, 0])
+                    values[0] += total
+                    values[1] += count
+                self._prefix.append(running)
+            return self._prefix[position]
+
+    def category_totals(self, start: str, end: str) -> Dict[str, float]:
+        """
+        Total spent per category between two ISO dates, both inclusive
+        Args:
+            start: First date of the range
+            end: Last date of the range
+        Returns:
+            Dictionary of category -> total
+        """
+        with self._lock.reading():
+            return self._category_totals(start, end)
+
+    def _category_totals(self, start: str, end: str) -> Dict[str, float]:
+        lo = bisect.bisect_left(self.dates, start)
+        hi = bisect.bisect_right(self.dates, end)
+        if lo >= hi:
+            return {}
+        upper = self._prefix_at(hi - 1)
+        lower = self._prefix_at(lo - 1)
+
+        result = {}
+        for cat, (total, count) in upper.items():
+            before_total, before_count = lower.get(cat, (0, 0))
+            # Counts tell "no expenses in range" apart from expenses that sum to zero
+            if count > before_count:
+                result[cat] = total - before_total
+        return result
+
+    def daily_totals(self, start: str, end: str) -> Dict[str, Dict[str, float]]:
+        """
+        Per-day category totals between two ISO dates, straight from the rollup
+        Args:
+            start: First date of the range
+            end: Last date of the range
+        Returns:
+            Dictionary of ISO date -> {category: total}
+        """
+        with self._lock.reading():
+            lo = bisect.bisect_left(self.dates, start)
+            hi = bisect.bisect_right(self.dates, end)
+            return {
+                day: {cat: total for cat, (total, _) in self.day_totals[day].items()}
+                for day in self.dates[lo:hi]
+            }
+
+    def check_consistency(self) -> bool:
+        """
+        Compare the rollup and prefix sums with a full scan of the records
+        Returns:
+            bool: True if they agree
+        """
+        with self._lock.reading():
+            scanned = {}
+            for expense in self.by_id.values():
+                values = scanned.setdefault(expense['expense_date'], {}).setdefault(expense['category'], [0, 0])
+                values[0] += expense['amount']
+                values[1] += 1
+
+            if scanned.keys() != self.day_totals.keys():
+                return False
+            for day, categories in scanned.items():
+                rolled = self.day_totals[day]
+                if categories.keys() != rolled.keys():
+                    return False
+                for cat, (total, count) in categories.items():
+                    if rolled[cat][1] != count or not math.isclose(rolled[cat][0], total, abs_tol=1e-6):
+                        return False
+
+            if not self.dates:
+                return True
+            expected = {}
+            for categories in scanned.values():
+                for cat, (total, _) in categories.items():
+                    expected[cat] = expected.get(cat, 0) + total
+            actual = self._category_totals(self.dates[0], self.dates[-1])
+            return actual.keys() == expected.keys() and all(
+                math.isclose(actual[cat], expected[cat], abs_tol=1e-6) for cat in expected
+            )
+
+    def records(self) -> List[Dict]:
+        """
+        List every expense in insertion order
+        Returns:
+            List of expenses (rebuilt only after a change)
+        """
+        with self._lock.reading():
+            records = self._records
+            if records is None:
+                # Readers racing here build equal lists; whichever is stored last is kept
+                records = self._records = list(self.by_id.values())
+            return records
+
+    def apply(self, entries: List[Dict]) -> None:
+        """
+        Apply append-log entries as one write
+        Args:
+            entries: Log entries to apply, in order
+        """
+        with self._lock.writing():
+            for entry in entries:
+                # Inserts are skipped when the ID is already present, so replaying a log
+                # that was already folded into the snapshot (crash during compaction) is safe
+                if entry['op'] == 'insert':
+                    self.add(entry['record'])
+                elif entry['op'] == 'delete':
+                    self.remove_date(entry['expense_date'])
+
+
+class JsonBackend(ExpenseBackend):
+    """
+    Expenses in a JSON snapshot plus an append-only log of later writes,
+    served from an in-memory index that is reused until the files change.
+    With a columnar file configured, compaction also writes a memory-mapped
+    columnar copy that answers the aggregates without parsing the JSON.
+
+    Several processes can share the files: writers hold an exclusive lock on
+    the .lock file, readers a shared one, and snapshots are replaced with an
+    atomic rename. With group commit on, writes arriving within the window are
+    appended and flushed together.
+    """
+
+    name = 'json'
+
+    def __init__(self, data_file: str, log_file: Optional[str] = None, seq_file: Optional[str] = None,
+                 compact_threshold: int = 1024 * 1024, columnar_file: Optional[str] = None,
+                 durability: str = 'batch', group_commit_ms: float = 0):
+        """
+        Args:
+            data_file: Path of the JSON snapshot
+            log_file: Path of the append log, defaults to the snapshot name with .log
+            seq_file: Path of the ID counter, defaults to the snapshot name with .seq
+            compact_threshold: Fold the log into the snapshot once it grows past this many bytes
+            columnar_file: Path of the columnar snapshot, None to disable it
+            durability: 'none' never fsyncs, 'batch' fsyncs once per flush (shared by
+                every write a group commit coalesced), 'always' fsyncs each write
+                on its own and so turns group commit off
+            group_commit_ms: How long the first writer waits for others to join its flush, 0 to disable
+        """
+        if durability not in DURABILITY_LEVELS:
+            raise ValueError(f"Unknown durability level: {durability}")
+        base = os.path.splitext(data_file)[0]
+        self.data_file = data_file
+        self.log_file = log_file or base + '.log'
+        self.seq_file = seq_file or base + '.seq'
+        self.lock_file = base + '.lock'
+        self.version_file = base + '.ver'
+        self.durability = durability
+        self.group_commit_ms = group_commit_ms
+        self.compact_threshold = compact_threshold
+        self.columnar_file = columnar_file if columnar_snapshot.available() else None
+
+        # Opened columnar snapshot and the log entries not yet folded into it
+        self._columnar = {'signature': None, 'snapshot': None}
+        self._overlay = {'signature': None, 'deleted': None, 'inserted': None}
+        self._columnar_lock = threading.Lock()
+
+        # Parsed snapshot, reused until the files on disk change
+        self._cache = {'signature': None, 'index': None, 'hits': 0, 'misses': 0}
+        self._cache_lock = threading.Lock()
+
+        # Writes waiting for the current group commit leader to flush them
+        self._pending = []
+        self._leader_active = False
+        self._group_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+
+    def _file_signature(self) -> tuple:
+        """
+        Describe the current state of the data files on disk
+        Returns:
+            Tuple of (path, mtime, size, inode) for the snapshot and the log
+        """
+        signature = []
+        for path in (self.data_file, self.log_file):
+            try:
+                st = os.stat(path)
+                signature.append((path, st.st_mtime_ns, st.st_size, st.st_ino))
+            except OSError:
+                signature.append((path, None, None, None))
+        return tuple(signature)
+
+    def _invalidate_cache(self) -> None:
+        """
+        Drop the cached snapshot after this backend rewrites the files
+        """
+        with self._cache_lock:
+            self._cache['signature'] = None
+            self._cache['index'] = None
+
+    def cache_stats(self) -> Dict[str, Any]:
+        with self._cache_lock:
+            hits, misses = self._cache['hits'], self._cache['misses']
+        total = hits + misses
+        return {'hits': hits, 'misses': misses, 'hit_ratio': hits / total if total else 0.0}
+
+    def reset_cache(self) -> None:
+        with self._cache_lock:
+            self._cache.update(signature=None, index=None, hits=0, misses=0)
+
+    def _read_log(self) -> List[Dict]:
+        """
+        Read the entries of the append log
+        Returns:
+            List of log entries in write order
+        """
+        entries = []
+        if not os.path.exists(self.log_file):
+            return entries
+
+        with open(self.log_file, 'r') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    # A torn last line from an interrupted append is ignored
+                    logger.warning(f"Skipping unreadable log entry: {line[:80]}")
+        return entries
+
+    def _append_log(self, entries: List[Dict]) -> None:
+        """
+        Append writes to the log in one go and update the cached indexes; the caller holds the write lock
+        Args:
+            entries: Log entries to append, in order
+        """
+        with self._cache_lock:
+            # The indexes can only be patched in place if they matched the files before this write
+            fresh = self._cache['index'] is not None and self._cache['signature'] == self._file_signature()
+            # An interrupted append can leave a torn last line; starting on a new line
+            # keeps this write from being glued onto it and discarded with it
+            separator = '' if self._log_ends_cleanly() else '\n'
+            with open(self.log_file, 'a') as f:
+                f.write(separator + ''.join(json.dumps(entry, default=str) + '\n' for entry in entries))
+                if self.durability != 'none':
+                    f.flush()
+                    os.fsync(f.fileno())
+            if fresh:
+                # Patched in place: readers on other threads wait for the write as a whole
+                self._cache['index'].apply(entries)
+                self._cache['signature'] = self._file_signature()
+            else:
+                self._cache['signature'] = None
+                self._cache['index'] = None
+
+    def _log_ends_cleanly(self) -> bool:
+        """
+        Check the append log is empty or ends with a complete line
+        Returns:
+            bool: False if the last append was interrupted mid-line
+        """
+        try:
+            with open(self.log_file, 'rb') as f:
+                f.seek(0, os.SEEK_END)
+                if f.tell() == 0:
+                    return True
+                f.seek(-1, os.SEEK_END)
+                return f.read(1) == b'\n'
+        except FileNotFoundError:
+            return True
+
+    def _last_id(self) -> int:
+        """
+        Read the persisted ID counter; the caller holds the write lock
+        Returns:
+            Highest ID handed out so far
+        """
+        if os.path.exists(self.seq_file):
+            with open(self.seq_file, 'r') as f:
+                last_id = int(f.read().strip() or 0)
+        else:
+            # First run against an existing data file: seed the counter once from every
+            # ID ever written, including ones whose date was deleted in the log since
+            expenses = []
+            if os.path.exists(self.data_file):
+                with open(self.data_file, 'r') as f:
+                    expenses = json.load(f)
+            written = [exp['id'] for exp in expenses]
+            written += [entry['record']['id'] for entry in self._read_log() if entry['op'] == 'insert']
+            last_id = max(written, default=0)
+        return last_id
+
+    def _next_id(self, count: int = 1) -> int:
+        """
+        Allocate a range of expense IDs from the persisted counter; the caller holds the write lock
+        Args:
+            count: Number of IDs to allocate
+        Returns:
+            First ID of the range
+        """
+        last_id = self._last_id()
+        atomic_write(self.seq_file, str(last_id + count), fsync=self.durability != 'none')
+        return last_id + 1
+
+    def _bump_version(self) -> None:
+        """
+        Advance the data version after a write; the caller holds the write lock
+        """
+        atomic_write(self.version_file, str(self.data_version() + 1), fsync=self.durability != 'none')
+
+    def data_version(self) -> int:
+        try:
+            with open(self.version_file, 'r') as f:
+                return int(f.read().strip() or 0)
+        except FileNotFoundError:
+            return 0
+
+    def _insert_entries(self, expenses: List[Dict], first_id: int) -> List[Dict]:
+        """
+        Build insert log entries for a batch with consecutive IDs
+        Args:
+            expenses: Expenses with expense_date, amount, category and notes
+            first_id: ID of the first expense
+        Returns:
+            List of log entries
+        """
+        return [
+            {'op': 'insert', 'record': {
+                'id': first_id + i,
+                'expense_date': str(expense['expense_date']),
+                'amount': expense['amount'],
+                'category': expense['category'],
+                'notes': expense.get('notes', '')
+            }}
+            for i, expense in enumerate(expenses)
+        ]
+
+    def _flush(self, writes: List[tuple]) -> List[List[int]]:
+        """
+        Apply a group of writes under the cross-process lock with one ID range,
+        one log append and at most one fsync
+        Args:
+            writes: List of (dates to clear, expenses to insert)
+        Returns:
+            List of new IDs for each write
+        """
+        with self._write_lock, locked(self.lock_file):
+            total = sum(len(expenses) for _, expenses in writes)
+            next_id = self._next_id(total) if total else 0
+
+            entries = []
+            results = []
+            for days, expenses in writes:
+                entries += [{'op': 'delete', 'expense_date': day} for day in days]
+                inserts = self._insert_entries(expenses, next_id)
+                next_id += len(expenses)
+                entries += inserts
+                results.append([entry['record']['id'] for entry in inserts])
+
+            if entries:
+                self._append_log(entries)
+                self._bump_version()
+            if os.path.exists(self.log_file) and os.path.getsize(self.log_file) >= self.compact_threshold:
+                self._compact_locked()
+        return results
+
+    def _write(self, days: List[str], expenses: List[Dict]) -> List[int]:
+        """
+        Clear dates and insert expenses, joining a group commit when enabled
+        Args:
+            days: Dates to clear
+            expenses: Expenses to insert
+        Returns:
+            IDs of the new expenses, in order
+        """
+        if self.group_commit_ms <= 0 or self.durability == 'always':
+            return self._flush([(days, expenses)])[0]
+
+        request = {'write': (days, expenses), 'done': threading.Event(), 'result': None, 'error': None}
+        with self._group_lock:
+            self._pending.append(request)
+            leader = not self._leader_active
+            self._leader_active = True
+
+        if leader:
+            # The first writer waits out the window, then flushes everything that queued up behind it
+            time.sleep(self.group_commit_ms / 1000)
+            with self._group_lock:
+                group, self._pending = self._pending, []
+                self._leader_active = False
+            try:
+                for member, result in zip(group, self._flush([member['write'] for member in group])):
+                    member['result'] = result
+            except Exception as e:
+                for member in group:
+                    member['error'] = e
+            for member in group:
+                member['done'].set()
+
+        request['done'].wait()
+        if request['error'] is not None:
+            raise request['error']
+        return request['result']
+
+    def _fresh_index(self) -> Optional[ExpenseIndex]:
+        """
+        Return the cached index only if it still matches the files
+        Returns:
+            Expense index or None
+        """
+        signature = self._file_signature()
+        with self._cache_lock:
+            if self._cache['index'] is not None and self._cache['signature'] == signature:
+                self._cache['hits'] += 1
+                return self._cache['index']
+        return None
+
+    def _data_source(self) -> Optional[list]:
+        """
+        Tag of the JSON snapshot stored in the columnar copy built from it
+        Returns:
+            List of [mtime, size] or None if there is no snapshot
+        """
+        try:
+            st = os.stat(self.data_file)
+            return [st.st_mtime_ns, st.st_size]
+        except OSError:
+            return None
+
+    def _columnar_snapshot(self) -> Optional[columnar_snapshot.ColumnarSnapshot]:
+        """
+        Open the columnar snapshot if it was built from the current JSON snapshot
+        Returns:
+            Columnar snapshot or None
+        """
+        if self.columnar_file is None:
+            return None
+        try:
+            st = os.stat(self.columnar_file)
+        except OSError:
+            return None
+
+        signature = (st.st_mtime_ns, st.st_size, st.st_ino)
+        with self._columnar_lock:
+            if self._columnar['signature'] != signature:
+                # The replaced snapshot is not closed: another thread may still be
+                # summing its arrays, and its mapping is released once unreferenced
+                try:
+                    snapshot = columnar_snapshot.open_snapshot(self.columnar_file)
+                except Exception as e:
+                    logger.error(f"Error opening columnar snapshot: {e}")
+                    snapshot = None
+                self._columnar.update(signature=signature, snapshot=snapshot)
+            snapshot = self._columnar['snapshot']
+        if snapshot is None or snapshot.source != self._data_source():
+            return None
+        return snapshot
+
+    def _columnar_view(self) -> Optional[tuple]:
+        """
+        Pair the current columnar snapshot with the log written after it,
+        reading both under the shared lock so a compaction cannot split them
+        Returns:
+            Tuple of (snapshot, overlay) or None if there is no usable snapshot
+        """
+        if self.columnar_file is None:
+            return None
+        with locked(self.lock_file, shared=True):
+            snapshot = self._columnar_snapshot()
+            if snapshot is None:
+                return None
+            return snapshot, self._log_overlay(snapshot)
+
+    def _log_overlay(self, snapshot: columnar_snapshot.ColumnarSnapshot) -> tuple:
+        """
+        Summarize the append log as changes on top of the columnar snapshot
+        Args:
+            snapshot: Snapshot the log applies to
+        Returns:
+            Tuple of (dates whose snapshot rows are deleted, {date: records inserted since})
+        """
+        signature = self._file_signature()
+        with self._columnar_lock:
+            if self._overlay['signature'] == signature:
+                return self._overlay['deleted'], self._overlay['inserted']
+
+        deleted = set()
+        inserted = {}
+        entries = self._read_log()
+        insert_ids = [entry['record']['id'] for entry in entries if entry['op'] == 'insert']
+        # Inserts already in the snapshot come from a log that was folded in before a crash;
+        # everything up to the last of them is in the snapshot, deletes included
+        folded = set(i for i, present in zip(insert_ids, snapshot.contains_ids(insert_ids)) if present)
+        start = 0
+        for position, entry in enumerate(entries):
+            if entry['op'] == 'insert' and entry['record']['id'] in folded:
+                start = position + 1
+        for entry in entries[start:]:
+            if entry['op'] == 'insert':
+                inserted.setdefault(entry['record']['expense_date'], []).append(entry['record'])
+            elif entry['op'] == 'delete':
+                deleted.add(entry['expense_date'])
+                inserted.pop(entry['expense_date'], None)
+
+        with self._columnar_lock:
+            self._overlay.update(signature=signature, deleted=deleted, inserted=inserted)
+        return deleted, inserted
+
+    def _columnar_totals(self, view: tuple, start: str, end: str) -> Dict[str, float]:
+        """
+        Category totals from the columnar snapshot corrected by the append log
+        Args:
+            view: Tuple of (snapshot, overlay) from _columnar_view
+            start: First date of the range
+            end: Last date of the range
+        Returns:
+            Dictionary of category -> total
+        """
+        snapshot, (deleted, inserted) = view
+        totals = snapshot.category_totals(start, end)
+
+        for day in deleted:
+            if start <= day <= end:
+                for cat, (total, count) in snapshot.category_totals(day, day).items():
+                    totals[cat][0] -= total
+                    totals[cat][1] -= count
+        for day, records in inserted.items():
+            if start <= day <= end:
+                for expense in records:
+                    values = totals.setdefault(expense['category'], [0, 0])
+                    values[0] += expense['amount']
+                    values[1] += 1
+
+        return {cat: total for cat, (total, count) in totals.items() if count > 0}
+
+    def _columnar_daily_totals(self, view: tuple, start: str, end: str) -> Dict[str, Dict[str, float]]:
+        """
+        Per-day category totals from the columnar snapshot corrected by the append log
+        Args:
+            view: Tuple of (snapshot, overlay) from _columnar_view
+            start: First date of the range
+            end: Last date of the range
+        Returns:
+            Dictionary of ISO date -> {category: total}
+        """
+        snapshot, (deleted, inserted) = view
+        totals = {day: cats for day, cats in snapshot.daily_totals(start, end).items() if day not in deleted}
+        for day, records in inserted.items():
+            if start <= day <= end:
+                for expense in records:
+                    cats = totals.setdefault(day, {})
+                    cats[expense['category']] = cats.get(expense['category'], 0) + expense['amount']
+        return totals
+
+    def _load_index(self, lock: bool = True) -> ExpenseIndex:
+        """
+        Return the indexed expenses, reusing the cached copy while the files are unchanged
+        Args:
+            lock: Take the shared lock while reading; False when the caller already holds the write lock
+        Returns:
+            Expense index (shared with the cache, do not modify it)
+        """
+        # Stat before reading: if the files change mid-read the stored signature
+        # is stale and the next call simply reloads
+        signature = self._file_signature()
+        with self._cache_lock:
+            if self._cache['index'] is not None and self._cache['signature'] == signature:
+                self._cache['hits'] += 1
+                return self._cache['index']
+            self._cache['misses'] += 1
+
+        if lock:
+            # The shared lock keeps a compaction from swapping the files between
+            # reading the snapshot and reading the log
+            with locked(self.lock_file, shared=True):
+                index = self._read_index()
+        else:
+            index = self._read_index()
+        with self._cache_lock:
+            self._cache['signature'] = signature
+            self._cache['index'] = index
+        return index
+
+    def _read_index(self) -> ExpenseIndex:
+        """
+        Parse the JSON snapshot, replay the append log and build the indexes
+        Returns:
+            Expense index
+        """
+        try:
+            expenses = []
+            if os.path.exists(self.data_file):
+                with open(self.data_file, 'r') as f:
+                    expenses = json.load(f)
+            index = ExpenseIndex(expenses)
+            index.apply(self._read_log())
+            return index
+        except Exception as e:
+            logger.error(f"Error loading data: {e}")
+            return ExpenseIndex([])
+
+    def all_expenses(self) -> List[Dict]:
+        return self._load_index().records()
+
+    def by_date(self, day: str) -> List[Dict]:
+        return self._load_index().on_date(day)
+
+    def by_date_range(self, start: str, end: str) -> List[Dict]:
+        return self._load_index().range(start, end)
+
+    def iter_range(self, start: str, end: str, category: Optional[str] = None) -> Iterator[Dict]:
+        index = self._load_index()
+        # One day at a time under the read lock, so a long export never holds back writers
+        for day in index.days(start, end, category):
+            for expense in index.on_date(day):
+                if category is None or expense['category'] == category:
+                    yield expense
+
+    def by_id(self, expense_id: int) -> Optional[Dict]:
+        return self._load_index().get(expense_id)
+
+    def insert(self, day: str, amount: float, category: str, notes: str) -> int:
+        return self.insert_many([{'expense_date': day, 'amount': amount, 'category': category, 'notes': notes}])[0]
+
+    def insert_many(self, expenses: List[Dict]) -> List[int]:
+        return self._write([], expenses) if expenses else []
+
+    def delete_date(self, day: str) -> None:
+        self._write([day], [])
+
+    def replace_days(self, days: List[str], expenses: List[Dict]) -> List[int]:
+        return self._write(days, expenses)
+
+    def _replace_all_locked(self, expenses: List[Dict]) -> None:
+        """
+        Atomically write a new snapshot and clear the log; the caller holds the write lock
+        Args:
+            expenses: Complete list of expenses
+        """
+        # The new records may carry IDs above the counter; move it past them so they are never
+        # handed out again. Seeding a missing counter needs the old files, so read it first, and
+        # always write it so the next insert does not have to parse the new snapshot
+        last_id = max(self._last_id(), max((exp['id'] for exp in expenses), default=0))
+        atomic_write(self.data_file, json.dumps(expenses, indent=2, default=str), fsync=self.durability != 'none')
+        atomic_write(self.seq_file, str(last_id), fsync=self.durability != 'none')
+        if self.columnar_file is not None:
+            columnar_snapshot.write_snapshot(self.columnar_file, expenses, source=self._data_source())
+        # The snapshot now holds everything, so the log can start over
+        open(self.log_file, 'w').close()
+        self._invalidate_cache()
+
+    def _compact_locked(self) -> None:
+        """
+        Fold the log into the snapshot; the caller holds the write lock
+        """
+        logger.info('Compacting expense log')
+        self._replace_all_locked(list(self._load_index(lock=False).records()))
+
+    def replace_all(self, expenses: List[Dict]) -> None:
+        with self._write_lock, locked(self.lock_file):
+            self._replace_all_locked(expenses)
+            self._bump_version()
+
+    def compact(self) -> None:
+        with self._write_lock, locked(self.lock_file):
+            self._compact_locked()
+
+    def _totals_source(self):
+        """
+        Pick what answers range aggregates: a loaded index is cheapest, then the
+        columnar snapshot, and parsing the JSON is the last resort
+        Returns:
+            Function of (start, end) returning category totals
+        """
+        index = self._fresh_index()
+        if index is None:
+            view = self._columnar_view()
+            if view is not None:
+                return lambda start, end: self._columnar_totals(view, start, end)
+            index = self._load_index()
+        return index.category_totals
+
+    def category_totals(self, start: str, end: str) -> Dict[str, float]:
+        return self._totals_source()(start, end)
+
+    def daily_totals(self, start: str, end: str) -> Dict[str, Dict[str, float]]:
+        index = self._fresh_index()
+        if index is None:
+            view = self._columnar_view()
+            if view is not None:
+                return self._columnar_daily_totals(view, start, end)
+            index = self._load_index()
+        return index.daily_totals(start, end)
+
+    def month_totals(self, year: int) -> Dict[int, float]:
+        category_totals = self._totals_source()
+
+        monthly_totals = {}
+        for month in range(1, 13):
+            last_day = calendar.monthrange(year, month)[1]
+            totals = category_totals(f'{year:04d}-{month:02d}-01', f'{year:04d}-{month:02d}-{last_day:02d}')
+            if totals:
+                monthly_totals[month] = sum(totals.values())
+        return monthly_totals
+
+    def check_consistency(self) -> bool:
+        index = self._load_index()
+        if not index.check_consistency():
+            return False
+
+        # The columnar snapshot plus the log must agree with the parsed records too
+        view = self._columnar_view()
+        span = index.span()
+        if view is None or span is None:
+            return True
+        expected = index.category_totals(*span)
+        actual = self._columnar_totals(view, *span)
+        return actual.keys() == expected.keys() and all(
+            math.isclose(actual[cat], expected[cat], abs_tol=1e-6) for cat in expected
+        )
+
+    def close(self) -> None:
+        with self._columnar_lock:
+            if self._columnar['snapshot'] is not None:
+                self._columnar['snapshot'].close()
+            self._columnar.update(signature=None, snapshot=None)
@@ -1,15 +1,94 @@
+import atexit
 import logging
+import logging.handlers
+import os
+import queue
+import threading
 
+# Level used when setup_logging is not given one: EXPENSE_LOG_LEVEL, INFO by default
+LOG_LEVEL = os.getenv('EXPENSE_LOG_LEVEL', 'INFO').upper()
 
-def setup_logging(name, log_file='server.log', level=logging.DEBUG):
+# 'size' rolls the file over at EXPENSE_LOG_MAX_BYTES, 'time' at midnight. Both rotate from inside
+# the process and are only safe with a single writing process: API workers sharing the file race
+# to rename it on rollover and can lose or mix up lines. With several workers use 'external': every
+# process only appends, and reopens the file once an outside rotator such as logrotate moves it.
+LOG_ROTATION = os.getenv('EXPENSE_LOG_ROTATION', 'size')
+LOG_MAX_BYTES = int(os.getenv('EXPENSE_LOG_MAX_BYTES', 5 * 1024 * 1024))
+LOG_BACKUPS = int(os.getenv('EXPENSE_LOG_BACKUPS', 5))
+
+FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# log file path -> (queue, listener); one writer thread per file
+_listeners = {}
+_lock = threading.Lock()
+
+
+def _file_handler(log_file):
+    if LOG_ROTATION == 'external':
+        handler = logging.handlers.WatchedFileHandler(log_file)
+    elif LOG_ROTATION == 'time':
+        handler = logging.handlers.TimedRotatingFileHandler(log_file, when='midnight', backupCount=LOG_BACKUPS)
+    else:
+        handler = logging.handlers.RotatingFileHandler(log_file, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUPS)
+    handler.setFormatter(logging.Formatter(FORMAT))
+    return handler
+
+
+def _queue_for(path):
+    """
+    The queue feeding log_file (an absolute path), starting its listener thread on first use
+    """
+    with _lock:
+        if path not in _listeners:
+            records = queue.SimpleQueue()
+            listener = logging.handlers.QueueListener(records, _file_handler(path), respect_handler_level=True)
+            listener.start()
+            _listeners[path] = (records, listener)
+        return _listeners[path][0]
+
+
+def setup_logging(name, log_file='server.log', level=None):
+    """
+    Get a logger whose records are written to log_file by a background thread.
+    Calling it again for the same name returns the same logger without adding handlers.
+    Args:
+        name: Logger name
+        log_file: File the records go to
+        level: Logging level, LOG_LEVEL if None
+    Returns:
+        The configured logger
+    """
     # Create a custom logger
     logger = logging.getLogger(name)
+    logger.setLevel(level if level is not None else LOG_LEVEL)
+
+    path = os.path.abspath(log_file)
+    records = _queue_for(path)
+    with _lock:
+        existing = [handler for handler in logger.handlers if getattr(handler, 'log_file', None) == path]
+        if existing:
+            # Re-attach to the current queue in case logging was shut down and restarted
+            existing[0].queue = records
+        else:
+            # The calling thread only formats the record and enqueues it
+            handler = logging.handlers.QueueHandler(records)
+            handler.log_file = path
+            logger.addHandler(handler)
+
+    return logger
+
+
+def shutdown_logging():
+    """
+    Write out everything still queued and stop the listener threads
+    """
+    with _lock:
+        listeners = list(_listeners.values())
+        _listeners.clear()
+    for records, listener in listeners:
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
 
-    # Configure the custom logger
-    logger.setLevel(level)
-    file_handler = logging.FileHandler(log_file)
-    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-    file_handler.setFormatter(formatter)
-    logger.addHandler(file_handler)
 
-    return logger
\ No newline at end of file
+atexit.register(shutdown_logging)
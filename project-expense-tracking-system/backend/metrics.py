@@ -0,0 +1,175 @@
+from typing import List, Dict, Optional
+import bisect
+import functools
+import inspect
+import threading
+import time
+
+# Upper bounds of the latency buckets, in seconds
+BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+           0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_BOUNDS_NS = [int(bound * 1e9) for bound in BUCKETS]
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class FunctionStats:
+    """
+    Latency histogram and call/error counters of one instrumented function
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        # One slot per bucket plus the +Inf overflow; counts are not cumulative here
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.sum_ns = 0
+        self.calls = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def observe(self, elapsed_ns: int, failed: bool) -> None:
+        slot = bisect.bisect_left(_BOUNDS_NS, elapsed_ns)
+        with self._lock:
+            self.counts[slot] += 1
+            self.sum_ns += elapsed_ns
+            self.calls += 1
+            if failed:
+                self.errors += 1
+
+    def snapshot(self) -> Dict:
+        """
+        Returns:
+            Consistent copy of the counters: counts, sum_ns, calls and errors
+        """
+        with self._lock:
+            return {'counts': list(self.counts), 'sum_ns': self.sum_ns, 'calls': self.calls, 'errors': self.errors}
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Estimate a latency quantile the way Prometheus' histogram_quantile does,
+        interpolating linearly inside the bucket it falls in
+        Args:
+            q: Quantile between 0 and 1
+        Returns:
+            Latency in seconds, None if nothing was recorded
+        """
+        counts = self.snapshot()['counts']
+        total = sum(counts)
+        if total == 0:
+            return None
+        rank = q * total
+        seen = 0
+        for slot, count in enumerate(counts):
+            if count and seen + count >= rank:
+                if slot == len(BUCKETS):
+                    return BUCKETS[-1]
+                lower = BUCKETS[slot - 1] if slot else 0.0
+                return lower + (BUCKETS[slot] - lower) * (rank - seen) / count
+            seen += count
+        return BUCKETS[-1]
+
+
+# function name -> stats
+_registry = {}
+_registry_lock = threading.Lock()
+
+
+def get_stats(name: str) -> FunctionStats:
+    stats = _registry.get(name)
+    if stats is None:
+        with _registry_lock:
+            stats = _registry.setdefault(name, FunctionStats(name))
+    return stats
+
+
+def timer(func):
+    """
+    Record the latency and outcome of every call of func.
+    Works on plain functions, coroutine functions and generator functions
+    (a generator is timed until it is exhausted or closed).
+    Args:
+        func: Function to instrument
+    Returns:
+        The wrapped function
+    """
+    stats = get_stats(f'{func.__module__}.{func.__qualname__}')
+
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            start = time.perf_counter_ns()
+            failed = True
+            try:
+                result = await func(*args, **kwargs)
+                failed = False
+                return result
+            finally:
+                stats.observe(time.perf_counter_ns() - start, failed)
+    elif inspect.isgeneratorfunction(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter_ns()
+            failed = True
+            try:
+                yield from func(*args, **kwargs)
+                failed = False
+            except GeneratorExit:
+                # The consumer stopping early is not an error
+                failed = False
+                raise
+            finally:
+                stats.observe(time.perf_counter_ns() - start, failed)
+    else:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter_ns()
+            failed = True
+            try:
+                result = func(*args, **kwargs)
+                failed = False
+                return result
+            finally:
+                stats.observe(time.perf_counter_ns() - start, failed)
+    return wrapper
+
+
+def reset() -> None:
+    """
+    Forget everything recorded so far
+    """
+    with _registry_lock:
+        stats = list(_registry.values())
+    # Decorated functions keep their stats objects, so they are zeroed rather than dropped
+    for entry in stats:
+        with entry._lock:
+            entry.counts = [0] * (len(BUCKETS) + 1)
+            entry.sum_ns = entry.calls = entry.errors = 0
+
+
+def render() -> str:
+    """
+    All recorded metrics in the Prometheus text exposition format
+    Returns:
+        Text for a /metrics response
+    """
+    with _registry_lock:
+        names = sorted(_registry)
+    lines: List[str] = [
+        '# HELP expense_call_duration_seconds Latency of instrumented calls',
+        '# TYPE expense_call_duration_seconds histogram'
+    ]
+    snapshots = {name: _registry[name].snapshot() for name in names}
+    for name, snap in snapshots.items():
+        cumulative = 0
+        for bound, count in zip(BUCKETS, snap['counts']):
+            cumulative += count
+            lines.append(f'expense_call_duration_seconds_bucket{{function="{name}",le="{bound}"}} {cumulative}')
+        lines.append(f'expense_call_duration_seconds_bucket{{function="{name}",le="+Inf"}} {snap["calls"]}')
+        lines.append(f'expense_call_duration_seconds_sum{{function="{name}"}} {snap["sum_ns"] / 1e9}')
+        lines.append(f'expense_call_duration_seconds_count{{function="{name}"}} {snap["calls"]}')
+    lines += ['# HELP expense_calls_total Calls of instrumented functions', '# TYPE expense_calls_total counter']
+    lines += [f'expense_calls_total{{function="{name}"}} {snap["calls"]}' for name, snap in snapshots.items()]
+    lines += ['# HELP expense_call_errors_total Calls that raised', '# TYPE expense_call_errors_total counter']
+    lines += [f'expense_call_errors_total{{function="{name}"}} {snap["errors"]}' for name, snap in snapshots.items()]
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,102 @@
+from datetime import date
+from typing import List, Dict
+import numpy as np
+from columnar_snapshot import EPOCH_ORDINAL
+
+GRANULARITIES = ('day', 'week', 'month', 'quarter', 'year')
+
+
+def parse_days(days: List[str]) -> np.ndarray:
+    """
+    Parse ISO dates in one vectorized call
+    Args:
+        days: ISO date strings
+    Returns:
+        Array of date ordinals (int64)
+    """
+    return np.array(days, dtype='datetime64[D]').astype('<i8') + EPOCH_ORDINAL
+
+
+def bucket_starts(days: np.ndarray, granularity: str) -> np.ndarray:
+    """
+    Map date ordinals to the ordinal of the first day of their bucket
+    Args:
+        days: Array of date ordinals
+        granularity: One of GRANULARITIES; weeks start on Monday
+    Returns:
+        Array of bucket start ordinals
+    """
+    if granularity == 'day':
+        return days
+    if granularity == 'week':
+        # Ordinal 1 (0001-01-01) was a Monday
+        return days - (days - 1) % 7
+
+    months = (days - EPOCH_ORDINAL).astype('datetime64[D]').astype('datetime64[M]').astype('<i8')
+    if granularity == 'quarter':
+        months -= months % 3
+    elif granularity == 'year':
+        months -= months % 12
+    elif granularity != 'month':
+        raise ValueError(f"Unknown granularity: {granularity}")
+    return months.astype('datetime64[M]').astype('datetime64[D]').astype('<i8') + EPOCH_ORDINAL
+
+
+def bucket_label(start: date, granularity: str) -> str:
+    """
+    Args:
+        start: First day of a bucket
+        granularity: One of GRANULARITIES
+    Returns:
+        Label such as '2024-08-05', '2024-W32', '2024-08', '2024-Q3' or '2024'
+    """
+    if granularity == 'day':
+        return start.isoformat()
+    if granularity == 'week':
+        year, week, _ = start.isocalendar()
+        return f'{year}-W{week:02d}'
+    if granularity == 'month':
+        return f'{start.year}-{start.month:02d}'
+    if granularity == 'quarter':
+        return f'{start.year}-Q{(start.month - 1) // 3 + 1}'
+    return str(start.year)
+
+
+def rollup(daily_totals: Dict[str, Dict[str, float]], granularity: str) -> List[Dict]:
+    """
+    Total per bucket and category in one vectorized pass over per-day totals
+    Args:
+        daily_totals: Dictionary of ISO date -> {category: total}
+        granularity: One of GRANULARITIES
+    Returns:
+        List of {period, start, category, total} ordered by period, then category
+    """
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"Unknown granularity: {granularity}")
+    if not daily_totals:
+        return []
+
+    # Bucket keys are computed once per distinct day, then spread over its categories
+    day_keys = list(daily_totals)
+    buckets = bucket_starts(parse_days(day_keys), granularity)
+    categories = sorted({cat for totals in daily_totals.values() for cat in totals})
+    codes = {cat: i for i, cat in enumerate(categories)}
+
+    per_day = np.fromiter((len(daily_totals[day]) for day in day_keys), dtype='<i8', count=len(day_keys))
+    cat_codes = np.fromiter((codes[cat] for day in day_keys for cat in daily_totals[day]), dtype='<i8')
+    amounts = np.fromiter((total for day in day_keys for total in daily_totals[day].values()), dtype='<f8')
+
+    keys = np.repeat(buckets, per_day) * len(categories) + cat_codes
+    unique, inverse = np.unique(keys, return_inverse=True)
+    totals = np.bincount(inverse.ravel(), weights=amounts)
+
+    labels = {}
+    result = []
+    for key, total in zip(unique.tolist(), totals.tolist()):
+        start_ordinal, code = divmod(key, len(categories))
+        if start_ordinal not in labels:
+            start = date.fromordinal(start_ordinal)
+            labels[start_ordinal] = (bucket_label(start, granularity), start.isoformat())
+        period, start = labels[start_ordinal]
+        result.append({'period': period, 'start': start, 'category': categories[code], 'total': total})
+    return result
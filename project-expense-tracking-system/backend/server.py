@@ -2,10 +2,11 @@ import streamlit as st
 from datetime import date
 import pandas as pd
 from typing import List, Dict
+from session_store import SessionStore
 
-# Initialize session state for storing expenses if it doesn't exist
-if 'expenses' not in st.session_state:
-    st.session_state.expenses = []
+# Initialize the session store if it doesn't exist
+if 'store' not in st.session_state:
+    st.session_state.store = SessionStore()
 
 # Function to get expenses by date
 def get_by_date(expense_date: date) -> List[Dict]:
@@ -16,7 +17,7 @@ def get_by_date(expense_date: date) -> List[Dict]:
     Returns:
         List of expenses for the specified date
     """
-    return [exp for exp in st.session_state.expenses if exp['date'] == expense_date]
+    return st.session_state.store.get_by_date(expense_date)
 
 # Function to add or update expenses
 def add_or_update(expense_date: date, expenses_data: List[Dict]):
@@ -26,17 +27,7 @@ def add_or_update(expense_date: date, expenses_data: List[Dict]):
         expense_date: The date for the expenses
         expenses_data: List of expense items to add/update
     """
-    # Remove existing expenses for this date
-    st.session_state.expenses = [exp for exp in st.session_state.expenses if exp['date'] != expense_date]
-    
-    # Add new expenses
-    for expense in expenses_data:
-        st.session_state.expenses.append({
-            'date': expense_date,
-            'amount': expense['amount'],
-            'category': expense['category'],
-            'notes': expense['notes']
-        })
+    st.session_state.store.add_or_update(expense_date, expenses_data)
 
 # Function to get expenses summary by date range
 def fetch_sum_date(start_date: date, end_date: date) -> Dict:
@@ -48,26 +39,7 @@ def fetch_sum_date(start_date: date, end_date: date) -> Dict:
     Returns:
         Dictionary with category-wise expense summary
     """
-    filtered_expenses = [exp for exp in st.session_state.expenses 
-                        if start_date <= exp['date'] <= end_date]
-    
-    if not filtered_expenses:
-        return {}
-    
-    # Calculate totals by category
-    df = pd.DataFrame(filtered_expenses)
-    category_totals = df.groupby('category')['amount'].sum()
-    total_amount = category_totals.sum()
-    
-    # Calculate percentages
-    result = {}
-    for category, amount in category_totals.items():
-        result[category] = {
-            'Total': float(amount),
-            'Percentage': float((amount / total_amount) * 100)
-        }
-    
-    return result
+    return st.session_state.store.fetch_sum_date(start_date, end_date)
 
 # Function to get monthly expense summary
 def fetch_sum_months() -> Dict:
@@ -76,21 +48,7 @@ def fetch_sum_months() -> Dict:
     Returns:
         Dictionary with monthly expense totals
     """
-    if not st.session_state.expenses:
-        return {}
-    
-    df = pd.DataFrame(st.session_state.expenses)
-    df['month'] = pd.to_datetime(df['date']).dt.month
-    monthly_totals = df.groupby('month')['amount'].sum()
-    
-    month_names = {
-        1: "January", 2: "February", 3: "March", 4: "April",
-        5: "May", 6: "June", 7: "July", 8: "August",
-        9: "September", 10: "October", 11: "November", 12: "December"
-    }
-    
-    return {month_names[month]: {'Total': float(total)} 
-            for month, total in monthly_totals.items()}
+    return st.session_state.store.fetch_sum_months()
 
 # Streamlit UI
 st.title('Expense Tracking System')
@@ -155,16 +113,19 @@ else:  # Analytics page
     st.subheader("Category-wise Summary")
     summary = fetch_sum_date(start_date, end_date)
     if summary:
-        df_summary = pd.DataFrame.from_dict(summary, orient='index')
+        # Frames are kept with the summaries until the next save
+        df_summary, chart_data = st.session_state.store.cached(('category_frames', start_date, end_date), lambda: (
+            pd.DataFrame.from_dict(summary, orient='index'),
+            pd.DataFrame({
+                'Category': list(summary.keys()),
+                'Amount': [data['Total'] for data in summary.values()]
+            }).set_index('Category')
+        ))
         st.dataframe(df_summary)
         
         # Show pie chart
         st.subheader("Expense Distribution")
-        chart_data = pd.DataFrame({
-            'Category': list(summary.keys()),
-            'Amount': [data['Total'] for data in summary.values()]
-        })
-        st.bar_chart(chart_data.set_index('Category'))
+        st.bar_chart(chart_data)
     else:
         st.info("No expenses found for the selected date range")
     
@@ -172,15 +133,29 @@ else:  # Analytics page
     st.subheader("Monthly Summary")
     monthly_summary = fetch_sum_months()
     if monthly_summary:
-        df_monthly = pd.DataFrame.from_dict(monthly_summary, orient='index')
+        df_monthly, chart_data = st.session_state.store.cached(('month_frames',), lambda: (
+            pd.DataFrame.from_dict(monthly_summary, orient='index'),
+            pd.DataFrame({
+                'Month': list(monthly_summary.keys()),
+                'Amount': [data['Total'] for data in monthly_summary.values()]
+            }).set_index('Month')
+        ))
         st.dataframe(df_monthly)
         
         # Show bar chart
         st.subheader("Monthly Expense Trend")
-        chart_data = pd.DataFrame({
-            'Month': list(monthly_summary.keys()),
-            'Amount': [data['Total'] for data in monthly_summary.values()]
-        })
-        st.bar_chart(chart_data.set_index('Month'))
+        st.bar_chart(chart_data)
     else:
-        st.info("No monthly data available")
\ No newline at end of file
+        st.info("No monthly data available")
+    
+    # Show totals per period across years
+    st.subheader("Trends")
+    granularity = st.selectbox("Group By", ["day", "week", "month", "quarter", "year"], index=2)
+    periods = st.session_state.store.rollup(start_date, end_date, granularity)
+    if periods:
+        trend_data = st.session_state.store.cached(('trend_frame', start_date, end_date, granularity), lambda: (
+            pd.DataFrame(periods).pivot_table(index='period', columns='category', values='total', aggfunc='sum', fill_value=0.0)
+        ))
+        st.bar_chart(trend_data)
+    else:
+        st.info("No expenses found for the selected date range")
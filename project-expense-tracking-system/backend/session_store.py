@@ -0,0 +1,193 @@
+from datetime import date, timedelta
+from typing import List, Dict, Callable, Any
+import bisect
+import calendar
+import rollup
+
+
+def _month_end(day: date) -> date:
+    return day.replace(day=calendar.monthrange(day.year, day.month)[1])
+
+
+class SessionStore:
+    """
+    Expenses of one Streamlit session, partitioned by date: a dict of day ->
+    rows, a sorted list of the dates for range queries, and running per-day
+    and per-month category totals that every write keeps up to date, so no
+    operation has to walk the whole history
+    """
+
+    def __init__(self):
+        # date -> expenses of that day
+        self.days = {}
+        # Sorted keys of self.days
+        self.dates = []
+        # date -> {category: [total, count]}
+        self.day_totals = {}
+        # (year, month) -> {category: [total, count]}
+        self.month_totals = {}
+        # Summaries and frames built since the last write
+        self._cache = {}
+
+    def __len__(self) -> int:
+        return sum(len(rows) for rows in self.days.values())
+
+    def _add_month_totals(self, day: date, totals: Dict[str, list], sign: int) -> None:
+        """
+        Fold the totals of one day into (or out of) its month
+        Args:
+            day: Date the totals belong to
+            totals: Dictionary of category -> [total, count]
+            sign: 1 to add them, -1 to remove them
+        """
+        key = (day.year, day.month)
+        categories = self.month_totals.setdefault(key, {})
+        for category, (total, count) in totals.items():
+            entry = categories.setdefault(category, [0.0, 0])
+            entry[0] += sign * total
+            entry[1] += sign * count
+            if entry[1] == 0:
+                del categories[category]
+        if not categories:
+            del self.month_totals[key]
+
+    def get_by_date(self, expense_date: date) -> List[Dict]:
+        """
+        Args:
+            expense_date: The date to filter expenses
+        Returns:
+            List of expenses for the specified date
+        """
+        return list(self.days.get(expense_date, ()))
+
+    def add_or_update(self, expense_date: date, expenses_data: List[Dict]) -> None:
+        """
+        Replace the expenses of a date; costs O(rows of that day), plus a shift
+        of the date list when a day is added or emptied
+        Args:
+            expense_date: The date for the expenses
+            expenses_data: List of expense items with amount, category and notes
+        """
+        if expense_date in self.days:
+            self._add_month_totals(expense_date, self.day_totals.pop(expense_date), -1)
+            del self.days[expense_date]
+            if not expenses_data:
+                del self.dates[bisect.bisect_left(self.dates, expense_date)]
+        elif expenses_data:
+            bisect.insort(self.dates, expense_date)
+
+        if expenses_data:
+            rows = [
+                {'date': expense_date, 'amount': expense['amount'], 'category': expense['category'], 'notes': expense['notes']}
+                for expense in expenses_data
+            ]
+            totals = {}
+            for row in rows:
+                entry = totals.setdefault(row['category'], [0.0, 0])
+                entry[0] += row['amount']
+                entry[1] += 1
+            self.days[expense_date] = rows
+            self.day_totals[expense_date] = totals
+            self._add_month_totals(expense_date, totals, 1)
+        self._cache.clear()
+
+    def category_totals(self, start_date: date, end_date: date) -> Dict[str, float]:
+        """
+        Total per category in a date range: whole months come from the month
+        totals and only the days of the partial months at the edges are visited
+        Args:
+            start_date: Start date of the range
+            end_date: End date of the range
+        Returns:
+            Dictionary of category -> total
+        """
+        if start_date > end_date:
+            return {}
+        # The whole months inside the range run from whole_start to whole_end
+        whole_start = start_date if start_date.day == 1 else _month_end(start_date) + timedelta(days=1)
+        whole_end = end_date if end_date == _month_end(end_date) else end_date.replace(day=1) - timedelta(days=1)
+
+        totals = {}
+        edges = [(start_date, end_date)]
+        if whole_start <= whole_end:
+            for (year, month), categories in self.month_totals.items():
+                if (whole_start.year, whole_start.month) <= (year, month) <= (whole_end.year, whole_end.month):
+                    for category, (total, _) in categories.items():
+                        totals[category] = totals.get(category, 0.0) + total
+            edges = [(start_date, whole_start - timedelta(days=1)), (whole_end + timedelta(days=1), end_date)]
+
+        for edge_start, edge_end in edges:
+            first = bisect.bisect_left(self.dates, edge_start)
+            last = bisect.bisect_right(self.dates, edge_end)
+            for day in self.dates[first:last]:
+                for category, (total, _) in self.day_totals[day].items():
+                    totals[category] = totals.get(category, 0.0) + total
+        return totals
+
+    def fetch_sum_date(self, start_date: date, end_date: date) -> Dict:
+        """
+        Get expense summary by category for a date range
+        Args:
+            start_date: Start date of the range
+            end_date: End date of the range
+        Returns:
+            Dictionary with category-wise expense summary
+        """
+        return self.cached(('sum_date', start_date, end_date), lambda: self._sum_date(start_date, end_date))
+
+    def _sum_date(self, start_date: date, end_date: date) -> Dict:
+        category_totals = self.category_totals(start_date, end_date)
+        total_amount = sum(category_totals.values())
+        return {
+            category: {'Total': float(amount), 'Percentage': float((amount / total_amount) * 100) if total_amount else 0.0}
+            for category, amount in category_totals.items()
+        }
+
+    def fetch_sum_months(self) -> Dict:
+        """
+        Get monthly expense summary, one entry per month of each year
+        Returns:
+            Dictionary of 'Month YYYY' -> {Total}, in date order
+        """
+        return self.cached(('sum_months',), self._sum_months)
+
+    def _sum_months(self) -> Dict:
+        return {
+            f'{calendar.month_name[month]} {year}': {'Total': float(sum(total for total, _ in categories.values()))}
+            for (year, month), categories in sorted(self.month_totals.items())
+        }
+
+    def rollup(self, start_date: date, end_date: date, granularity: str) -> List[Dict]:
+        """
+        Totals per period and category from the per-day totals
+        Args:
+            start_date: Start date of the range
+            end_date: End date of the range
+            granularity: 'day', 'week', 'month', 'quarter' or 'year'
+        Returns:
+            List of {period, start, category, total} ordered by period
+        """
+        return self.cached(('rollup', start_date, end_date, granularity),
+                           lambda: self._rollup(start_date, end_date, granularity))
+
+    def _rollup(self, start_date: date, end_date: date, granularity: str) -> List[Dict]:
+        first = bisect.bisect_left(self.dates, start_date)
+        last = bisect.bisect_right(self.dates, end_date)
+        daily = {
+            day.isoformat(): {cat: total for cat, (total, _) in self.day_totals[day].items()}
+            for day in self.dates[first:last]
+        }
+        return rollup.rollup(daily, granularity)
+
+    def cached(self, key: tuple, build: Callable[[], Any]) -> Any:
+        """
+        Memoize a value derived from the store until the next write
+        Args:
+            key: Cache key
+            build: Function producing the value
+        Returns:
+            Cached or newly built value
+        """
+        if key not in self._cache:
+            self._cache[key] = build()
+        return self._cache[key]
@@ -0,0 +1,230 @@
+from typing import List, Dict, Iterator, Optional
+import sqlite3
+import threading
+from logging_setup import setup_logging
+from storage_backend import ExpenseBackend
+from file_lock import DURABILITY_LEVELS
+
+# Setup logger
+logger = setup_logging('sqlite_backend')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS expenses (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    expense_date TEXT NOT NULL,
+    amount REAL NOT NULL,
+    category TEXT NOT NULL,
+    notes TEXT
+);
+-- Covers date lookups and lets the range aggregates run from the index alone
+CREATE INDEX IF NOT EXISTS idx_expenses_date ON expenses (expense_date, category, amount);
+CREATE INDEX IF NOT EXISTS idx_expenses_category ON expenses (category);
+-- Data version, bumped in the same transaction as every write
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO meta (key, value) VALUES ('version', 0);
+"""
+
+COLUMNS = 'id, expense_date, amount, category, notes'
+
+# PRAGMA synchronous for each durability level; in WAL mode NORMAL syncs at checkpoints
+SYNCHRONOUS = {'none': 'OFF', 'batch': 'NORMAL', 'always': 'FULL'}
+
+
+class SqliteBackend(ExpenseBackend):
+    """
+    Expenses in an embedded SQLite database with the aggregates done in SQL
+    """
+
+    name = 'sqlite'
+
+    def __init__(self, db_file: str, durability: str = 'batch'):
+        """
+        Args:
+            db_file: Path of the SQLite database, created if missing
+            durability: 'none', 'batch' or 'always', mapped onto PRAGMA synchronous
+        """
+        if durability not in DURABILITY_LEVELS:
+            raise ValueError(f"Unknown durability level: {durability}")
+        self.db_file = db_file
+        self.durability = durability
+        # One connection per thread; WAL lets readers run while a write commits
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        """
+        Return the connection of the calling thread, opening it on first use
+        Returns:
+            SQLite connection
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_file, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(f'PRAGMA synchronous={SYNCHRONOUS[self.durability]}')
+            conn.execute('PRAGMA busy_timeout=5000')
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    def _query(self, sql: str, params: tuple = ()) -> List[Dict]:
+        """
+        Run a SELECT and return the rows as dictionaries
+        Args:
+            sql: Query to run
+            params: Query parameters
+        Returns:
+            List of rows
+        """
+        return [dict(row) for row in self._connect().execute(sql, params)]
+
+    def _bump_version(self, conn: sqlite3.Connection) -> None:
+        """
+        Advance the data version inside an open write transaction
+        Args:
+            conn: Connection running the write
+        """
+        conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'version'")
+
+    def data_version(self) -> int:
+        (version,) = self._connect().execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        return version
+
+    def all_expenses(self) -> List[Dict]:
+        return self._query(f'SELECT {COLUMNS} FROM expenses ORDER BY id')
+
+    def by_date(self, day: str) -> List[Dict]:
+        return self._query(f'SELECT {COLUMNS} FROM expenses WHERE expense_date = ? ORDER BY id', (day,))
+
+    def by_date_range(self, start: str, end: str) -> List[Dict]:
+        return self._query(
+            f'SELECT {COLUMNS} FROM expenses WHERE expense_date BETWEEN ? AND ? ORDER BY expense_date, id',
+            (start, end)
+        )
+
+    def iter_range(self, start: str, end: str, category: Optional[str] = None) -> Iterator[Dict]:
+        sql = f'SELECT {COLUMNS} FROM expenses WHERE expense_date BETWEEN ? AND ?'
+        params = (start, end)
+        if category is not None:
+            sql += ' AND category = ?'
+            params += (category,)
+        # A connection of its own: the consumer may resume the generator from any thread,
+        # and closing it when the generator ends or is dropped releases the read snapshot
+        conn = sqlite3.connect(self.db_file, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        try:
+            for row in conn.execute(sql + ' ORDER BY expense_date, id', params):
+                yield dict(row)
+        finally:
+            conn.close()
+
+    def by_id(self, expense_id: int) -> Optional[Dict]:
+        rows = self._query(f'SELECT {COLUMNS} FROM expenses WHERE id = ?', (expense_id,))
+        return rows[0] if rows else None
+
+    def insert(self, day: str, amount: float, category: str, notes: str) -> int:
+        with self._connect() as conn:
+            cursor = conn.execute(
+                'INSERT INTO expenses (expense_date, amount, category, notes) VALUES (?, ?, ?, ?)',
+                (day, amount, category, notes)
+            )
+            self._bump_version(conn)
+        return cursor.lastrowid
+
+    def _insert_batch(self, conn: sqlite3.Connection, expenses: List[Dict]) -> List[int]:
+        """
+        Insert a batch inside an open write transaction, with one ID range for all rows
+        Args:
+            conn: Connection holding the write lock
+            expenses: Expenses with expense_date, amount, category and notes
+        Returns:
+            IDs of the new expenses, in order
+        """
+        # AUTOINCREMENT never reuses IDs, so continue from the highest one ever handed out
+        (last_id,) = conn.execute(
+            "SELECT MAX(COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'expenses'), 0), "
+            "COALESCE((SELECT MAX(id) FROM expenses), 0))"
+        ).fetchone()
+        ids = list(range(last_id + 1, last_id + 1 + len(expenses)))
+        conn.executemany(
+            'INSERT INTO expenses (id, expense_date, amount, category, notes) VALUES (?, ?, ?, ?, ?)',
+            [(new_id, str(exp['expense_date']), exp['amount'], exp['category'], exp.get('notes', ''))
+             for new_id, exp in zip(ids, expenses)]
+        )
+        return ids
+
+    def insert_many(self, expenses: List[Dict]) -> List[int]:
+        conn = self._connect()
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            self._bump_version(conn)
+            return self._insert_batch(conn, expenses)
+
+    def replace_days(self, days: List[str], expenses: List[Dict]) -> List[int]:
+        conn = self._connect()
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            conn.executemany('DELETE FROM expenses WHERE expense_date = ?', [(day,) for day in days])
+            self._bump_version(conn)
+            return self._insert_batch(conn, expenses)
+
+    def delete_date(self, day: str) -> None:
+        with self._connect() as conn:
+            conn.execute('DELETE FROM expenses WHERE expense_date = ?', (day,))
+            self._bump_version(conn)
+
+    def replace_all(self, expenses: List[Dict]) -> None:
+        # One transaction: either the whole list is stored or nothing changes
+        with self._connect() as conn:
+            conn.execute('DELETE FROM expenses')
+            conn.executemany(
+                'INSERT INTO expenses (id, expense_date, amount, category, notes) VALUES (?, ?, ?, ?, ?)',
+                [(exp['id'], str(exp['expense_date']), exp['amount'], exp['category'], exp.get('notes'))
+                 for exp in expenses]
+            )
+            self._bump_version(conn)
+
+    def compact(self) -> None:
+        logger.info('Vacuuming expense database')
+        self._connect().execute('VACUUM')
+
+    def category_totals(self, start: str, end: str) -> Dict[str, float]:
+        rows = self._connect().execute(
+            'SELECT category, SUM(amount) FROM expenses WHERE expense_date BETWEEN ? AND ? GROUP BY category',
+            (start, end)
+        )
+        return {category: total for category, total in rows}
+
+    def daily_totals(self, start: str, end: str) -> Dict[str, Dict[str, float]]:
+        rows = self._connect().execute(
+            'SELECT expense_date, category, SUM(amount) FROM expenses WHERE expense_date BETWEEN ? AND ? '
+            'GROUP BY expense_date, category',
+            (start, end)
+        )
+        totals = {}
+        for day, category, total in rows:
+            totals.setdefault(day, {})[category] = total
+        return totals
+
+    def month_totals(self, year: int) -> Dict[int, float]:
+        rows = self._connect().execute(
+            'SELECT CAST(substr(expense_date, 6, 2) AS INTEGER) AS month, SUM(amount) FROM expenses '
+            'WHERE expense_date BETWEEN ? AND ? GROUP BY month ORDER BY month',
+            (f'{year:04d}-01-01', f'{year:04d}-12-31')
+        )
+        return {month: total for month, total in rows}
+
+    def close(self) -> None:
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections = []
+        self._local = threading.local()
@@ -0,0 +1,184 @@
+from abc import ABC, abstractmethod
+from typing import List, Dict, Iterator, Optional, Any
+
+
+class ExpenseBackend(ABC):
+    """
+    Storage interface behind the db_helper functions.
+    Dates are passed as ISO strings ('YYYY-MM-DD'); errors are raised and
+    turned into log messages and fallback values by db_helper.
+    """
+
+    name = 'base'
+
+    @abstractmethod
+    def all_expenses(self) -> List[Dict]:
+        """
+        Returns:
+            List of all expenses
+        """
+
+    @abstractmethod
+    def by_date(self, day: str) -> List[Dict]:
+        """
+        Args:
+            day: Date to fetch expenses for
+        Returns:
+            List of expenses on that date
+        """
+
+    @abstractmethod
+    def by_date_range(self, start: str, end: str) -> List[Dict]:
+        """
+        Args:
+            start: First date of the range
+            end: Last date of the range
+        Returns:
+            List of expenses in the range, ordered by date
+        """
+
+    def iter_range(self, start: str, end: str, category: Optional[str] = None) -> Iterator[Dict]:
+        """
+        Stream the expenses of a date range; backends override this to avoid building the whole list
+        Args:
+            start: First date of the range
+            end: Last date of the range
+            category: Only yield this category, None for all
+        Returns:
+            Iterator over the expenses, ordered by date
+        """
+        for expense in self.by_date_range(start, end):
+            if category is None or expense['category'] == category:
+                yield expense
+
+    @abstractmethod
+    def by_id(self, expense_id: int) -> Optional[Dict]:
+        """
+        Args:
+            expense_id: ID of the expense
+        Returns:
+            Expense record if found, None otherwise
+        """
+
+    @abstractmethod
+    def insert(self, day: str, amount: float, category: str, notes: str) -> int:
+        """
+        Args:
+            day: Date of the expense
+            amount: Amount of the expense
+            category: Category of the expense
+            notes: Additional notes
+        Returns:
+            ID of the new expense
+        """
+
+    def insert_many(self, expenses: List[Dict]) -> List[int]:
+        """
+        Insert a batch of expenses; backends override this to store it in one write
+        Args:
+            expenses: Expenses with expense_date, amount, category and notes
+        Returns:
+            IDs of the new expenses, in order
+        """
+        return [
+            self.insert(str(exp['expense_date']), exp['amount'], exp['category'], exp.get('notes', ''))
+            for exp in expenses
+        ]
+
+    def replace_days(self, days: List[str], expenses: List[Dict]) -> List[int]:
+        """
+        Delete every expense on the given dates, then insert a batch
+        Args:
+            days: Dates to clear
+            expenses: Expenses with expense_date, amount, category and notes
+        Returns:
+            IDs of the new expenses, in order
+        """
+        for day in days:
+            self.delete_date(day)
+        return self.insert_many(expenses)
+
+    @abstractmethod
+    def delete_date(self, day: str) -> None:
+        """
+        Args:
+            day: Date to delete expenses for
+        """
+
+    @abstractmethod
+    def replace_all(self, expenses: List[Dict]) -> None:
+        """
+        Replace the stored expenses, keeping their IDs
+        Args:
+            expenses: Complete list of expenses
+        """
+
+    @abstractmethod
+    def category_totals(self, start: str, end: str) -> Dict[str, float]:
+        """
+        Args:
+            start: First date of the range
+            end: Last date of the range
+        Returns:
+            Dictionary of category -> total
+        """
+
+    @abstractmethod
+    def month_totals(self, year: int) -> Dict[int, float]:
+        """
+        Args:
+            year: Calendar year
+        Returns:
+            Dictionary of month number -> total, only for months with expenses
+        """
+
+    def daily_totals(self, start: str, end: str) -> Dict[str, Dict[str, float]]:
+        """
+        Per-day category totals; backends override this to aggregate without loading the records
+        Args:
+            start: First date of the range
+            end: Last date of the range
+        Returns:
+            Dictionary of ISO date -> {category: total}, only for dates with expenses
+        """
+        totals = {}
+        for exp in self.by_date_range(start, end):
+            day = totals.setdefault(str(exp['expense_date']), {})
+            day[exp['category']] = day.get(exp['category'], 0) + exp['amount']
+        return totals
+
+    @abstractmethod
+    def data_version(self) -> int:
+        """
+        Returns:
+            Counter that grows with every write, shared by all processes using the store
+        """
+
+    def compact(self) -> None:
+        """
+        Reorganize storage; nothing to do unless the backend needs it
+        """
+
+    def check_consistency(self) -> bool:
+        """
+        Returns:
+            bool: True if derived aggregates match the stored records
+        """
+        return True
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """
+        Returns:
+            Dictionary with hits, misses and hit_ratio of the read cache
+        """
+        return {'hits': 0, 'misses': 0, 'hit_ratio': 0.0}
+
+    def reset_cache(self) -> None:
+        """
+        Drop any cached state and zero the counters
+        """
+
+    def close(self) -> None:
+        """
+        Release files or connections held by the backend
+        """
@@ -0,0 +1,168 @@
+from typing import List, Dict, Iterable
+import heapq
+import math
+
+
+class TopN:
+    """
+    The n largest expenses seen so far, kept in a bounded min-heap
+    """
+
+    def __init__(self, n: int):
+        self.n = n
+        self._heap = []
+
+    def add(self, expense: Dict) -> None:
+        # The ID breaks ties so records themselves are never compared
+        item = (expense['amount'], expense['id'], expense)
+        if len(self._heap) < self.n:
+            heapq.heappush(self._heap, item)
+        elif item[:2] > self._heap[0][:2]:
+            heapq.heapreplace(self._heap, item)
+
+    def merge(self, other: 'TopN') -> None:
+        for _, _, expense in other._heap:
+            self.add(expense)
+
+    def items(self) -> List[Dict]:
+        """
+        Returns:
+            The kept expenses, largest first
+        """
+        return [expense for _, _, expense in sorted(self._heap, key=lambda item: item[:2], reverse=True)]
+
+
+class QuantileSketch:
+    """
+    Mergeable quantile sketch with relative error guarantees (DDSketch):
+    values fall into logarithmic buckets, so any quantile is returned within
+    `relative_accuracy` of the true value and memory depends on the spread
+    of the values, not on how many were added
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01, max_buckets: int = 2048):
+        """
+        Args:
+            relative_accuracy: Maximum relative error of a returned quantile
+            max_buckets: Bucket limit per sign; beyond it the smallest magnitudes are merged
+        """
+        self.relative_accuracy = relative_accuracy
+        self.max_buckets = max_buckets
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        # key -> count, for positive values and for the magnitude of negative ones
+        self.positive = {}
+        self.negative = {}
+        self.zeros = 0
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def _key(self, magnitude: float) -> int:
+        return math.ceil(math.log(magnitude) / self._log_gamma)
+
+    def _value(self, key: int) -> float:
+        return 2 * self.gamma ** key / (self.gamma + 1)
+
+    def _collapse(self, buckets: Dict[int, int]) -> None:
+        """
+        Fold the lowest buckets into one once there are too many
+        """
+        if len(buckets) <= self.max_buckets:
+            return
+        keys = sorted(buckets)
+        excess = keys[:len(keys) - self.max_buckets + 1]
+        buckets[excess[-1]] = sum(buckets.pop(key) for key in excess[:-1]) + buckets[excess[-1]]
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        if value > 0:
+            key = self._key(value)
+            self.positive[key] = self.positive.get(key, 0) + 1
+            self._collapse(self.positive)
+        elif value < 0:
+            key = self._key(-value)
+            self.negative[key] = self.negative.get(key, 0) + 1
+            self._collapse(self.negative)
+        else:
+            self.zeros += 1
+
+    def merge(self, other: 'QuantileSketch') -> None:
+        """
+        Add everything another sketch has seen; both must use the same accuracy
+        Args:
+            other: Sketch to fold in
+        """
+        if other.gamma != self.gamma:
+            raise ValueError('Sketches with different accuracy cannot be merged')
+        for mine, theirs in ((self.positive, other.positive), (self.negative, other.negative)):
+            for key, count in theirs.items():
+                mine[key] = mine.get(key, 0) + count
+            self._collapse(mine)
+        self.zeros += other.zeros
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def quantile(self, q: float) -> float:
+        """
+        Args:
+            q: Quantile between 0 and 1
+        Returns:
+            Estimated value at that quantile, NaN if the sketch is empty
+        """
+        if self.count == 0:
+            return math.nan
+        rank = q * (self.count - 1)
+        seen = 0
+        # Walk from the most negative value up to the largest positive one
+        for key in sorted(self.negative, reverse=True):
+            seen += self.negative[key]
+            if seen > rank:
+                return max(-self._value(key), self.min)
+        seen += self.zeros
+        if seen > rank:
+            return 0.0
+        for key in sorted(self.positive):
+            seen += self.positive[key]
+            if seen > rank:
+                return min(self._value(key), self.max)
+        return self.max
+
+
+def top_n_by_category(expenses: Iterable[Dict], n: int) -> Dict[str, List[Dict]]:
+    """
+    The n largest expenses of each category, in one pass
+    Args:
+        expenses: Expenses to scan, consumed lazily
+        n: How many to keep per category
+    Returns:
+        Dictionary of category -> expenses, largest first
+    """
+    tops = {}
+    for expense in expenses:
+        top = tops.get(expense['category'])
+        if top is None:
+            top = tops[expense['category']] = TopN(n)
+        top.add(expense)
+    return {category: top.items() for category, top in sorted(tops.items())}
+
+
+def sketch_by_category(expenses: Iterable[Dict], relative_accuracy: float = 0.01) -> Dict[str, QuantileSketch]:
+    """
+    A quantile sketch of the amounts of each category, in one pass
+    Args:
+        expenses: Expenses to scan, consumed lazily
+        relative_accuracy: Accuracy of the sketches
+    Returns:
+        Dictionary of category -> sketch
+    """
+    sketches = {}
+    for expense in expenses:
+        sketch = sketches.get(expense['category'])
+        if sketch is None:
+            sketch = sketches[expense['category']] = QuantileSketch(relative_accuracy)
+        sketch.add(expense['amount'])
+    return dict(sorted(sketches.items()))
@@ -0,0 +1,45 @@
+from typing import List, Dict, Iterator, Sequence
+from datetime import date
+import numpy as np
+
+CATEGORIES = ['Food', 'Rent', 'Shopping', 'Entertainment', 'Other', 'Big Toy Shop']
+
+# Rows drawn per batch; fixed so the output depends only on the seed, not on how it is consumed
+BATCH_SIZE = 100000
+
+_LETTERS = np.frombuffer(b'abcdefghijklmnopqrstuvwxyz     ', dtype=np.uint8)
+
+
+def generate_expenses(rows: int, start: date = date(2024, 1, 1), days: int = 3 * 365,
+                      categories: Sequence[str] = CATEGORIES, skew: float = 1.0, note_length: int = 20,
+                      seed: int = 0) -> Iterator[List[Dict]]:
+    """
+    Deterministic synthetic expenses, produced in batches so millions of rows never sit in memory at once
+    Args:
+        rows: Number of expenses
+        start: First possible expense date
+        days: Number of days the dates are spread over
+        categories: Category names, most frequent first
+        skew: Zipf exponent of the category frequencies, 0 for uniform
+        note_length: Characters per note
+        seed: Random seed; the same arguments always give the same expenses
+    Returns:
+        Iterator over lists of at most BATCH_SIZE expenses with expense_date, amount, category and notes
+    """
+    rng = np.random.default_rng(seed)
+    weights = 1.0 / np.arange(1, len(categories) + 1) ** skew
+    weights /= weights.sum()
+    names = np.array(categories, dtype=object)
+    first_day = np.datetime64(start.isoformat(), 'D')
+
+    for offset in range(0, rows, BATCH_SIZE):
+        n = min(BATCH_SIZE, rows - offset)
+        day = (first_day + rng.integers(0, days, n)).astype(str)
+        amount = np.round(rng.lognormal(3.0, 1.0, n), 2)
+        category = names[rng.choice(len(categories), n, p=weights)]
+        letters = _LETTERS[rng.integers(0, len(_LETTERS), (n, note_length))]
+        notes = letters.view(f'S{note_length}').ravel().astype(str) if note_length else np.full(n, '')
+        yield [
+            {'expense_date': d, 'amount': a, 'category': c, 'notes': s}
+            for d, a, c, s in zip(day.tolist(), amount.tolist(), category.tolist(), notes.tolist())
+        ]
@@ -0,0 +1,217 @@
+"""
+Time the db_helper storage calls against synthetic datasets and compare with a stored baseline.
+
+    python benchmarks/run_benchmarks.py --rows 10000 100000 --backend json sqlite
+    python benchmarks/run_benchmarks.py --rows 10000 100000 1000000 --update-baseline
+
+Exits with status 1 when an operation's median latency regresses past the baseline.
+"""
+from typing import Callable, List, Dict, Optional
+from datetime import date, timedelta
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend')))
+
+import numpy as np
+import db_helper
+import synthetic
+from json_backend import JsonBackend
+from sqlite_backend import SqliteBackend
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+# Operations timed by each run, in the order they run
+OPERATIONS = ['insert_data', 'get_by_date', 'get_by_id', 'fetch_sum_date', 'fetch_sum_months', 'delete_data']
+
+
+def open_backend(name: str, directory: str):
+    """
+    A fresh backend of the given kind, configured like db_helper.create_backend, inside directory
+    """
+    if name == 'json':
+        return JsonBackend(os.path.join(directory, 'expenses.json'), compact_threshold=db_helper.COMPACT_THRESHOLD,
+                           columnar_file=os.path.join(directory, 'expenses.col'),
+                           durability=db_helper.DURABILITY, group_commit_ms=db_helper.GROUP_COMMIT_MS)
+    if name == 'sqlite':
+        return SqliteBackend(os.path.join(directory, 'expenses.db'), durability=db_helper.DURABILITY)
+    raise ValueError(f"Unknown storage backend: {name}")
+
+
+def summarize(samples_ns: List[int]) -> Dict:
+    """
+    Args:
+        samples_ns: Latency of each call in nanoseconds
+    Returns:
+        Dictionary with calls and mean/p50/p99/max in milliseconds
+    """
+    samples = np.array(samples_ns, dtype=np.float64) / 1e6
+    return {
+        'calls': len(samples),
+        'mean_ms': round(float(samples.mean()), 4),
+        'p50_ms': round(float(np.percentile(samples, 50)), 4),
+        'p99_ms': round(float(np.percentile(samples, 99)), 4),
+        'max_ms': round(float(samples.max()), 4)
+    }
+
+
+def timed(func, arguments: List[tuple], between: Optional[Callable] = None) -> List[int]:
+    """
+    Call func once per argument tuple
+    Args:
+        func: Operation to time
+        arguments: One argument tuple per call
+        between: Called untimed after each call, e.g. a read that warms the cache again
+    Returns:
+        Latency of each call in nanoseconds
+    """
+    samples = []
+    for args in arguments:
+        start = time.perf_counter_ns()
+        func(*args)
+        samples.append(time.perf_counter_ns() - start)
+        if between is not None:
+            between()
+    return samples
+
+
+def run(backend_name: str, rows: int, ops: int, seed: int, start: date, days: int, skew: float,
+        note_length: int) -> Dict:
+    """
+    Load a synthetic dataset into a new backend and time each operation
+    Args:
+        backend_name: 'json' or 'sqlite'
+        rows: Rows to load before timing
+        ops: Timed calls per point operation
+        seed, start, days, skew, note_length: Passed to synthetic.generate_expenses
+    Returns:
+        Dictionary with load throughput and one summary per operation
+    """
+    rng = np.random.default_rng(seed + 1)
+    with tempfile.TemporaryDirectory() as directory:
+        backend = open_backend(backend_name, directory)
+        db_helper.set_backend(backend)
+        try:
+            ids = []
+            # Compacting the JSON log after nearly every batch makes the load quadratic,
+            # so the log grows for the whole load and is folded in once at the end
+            if backend_name == 'json':
+                backend.compact_threshold = float('inf')
+            load_started = time.perf_counter()
+            for batch in synthetic.generate_expenses(rows, start, days, skew=skew, note_length=note_length, seed=seed):
+                ids += backend.insert_many(batch)
+            backend.compact()
+            load_seconds = time.perf_counter() - load_started
+            if backend_name == 'json':
+                backend.compact_threshold = db_helper.COMPACT_THRESHOLD
+
+            day_list = [start + timedelta(days=int(offset)) for offset in rng.integers(0, days, ops)]
+            id_list = [ids[int(i)] for i in rng.integers(0, len(ids), ops)]
+            ranges = [(day, day + timedelta(days=30)) for day in day_list[:max(1, ops // 10)]]
+            # Deletes run last so every read above sees the full dataset
+            delete_days = [start + timedelta(days=int(offset)) for offset in rng.choice(days, min(ops, days), replace=False)]
+
+            # Served traffic mixes reads and writes, so writes are timed against a warm cache:
+            # a read before the first write and after each one keeps the index loaded
+            def warm():
+                db_helper.get_by_id(id_list[0])
+
+            warm()
+            samples = {
+                'insert_data': timed(db_helper.insert_data, [(day, 12.5, 'Food', 'benchmark') for day in day_list],
+                                     between=warm),
+                'get_by_date': timed(db_helper.get_by_date, [(day,) for day in day_list]),
+                'get_by_id': timed(db_helper.get_by_id, [(expense_id,) for expense_id in id_list]),
+                'fetch_sum_date': timed(db_helper.fetch_sum_date, ranges),
+                'fetch_sum_months': timed(db_helper.fetch_sum_months, [()] * len(ranges)),
+                'delete_data': timed(db_helper.delete_data, [(day,) for day in delete_days], between=warm)
+            }
+        finally:
+            # Closes the backend before its directory goes away
+            db_helper.set_backend(None)
+
+    result = {operation: summarize(samples[operation]) for operation in OPERATIONS}
+    result['load'] = {'rows': rows, 'seconds': round(load_seconds, 3), 'rows_per_sec': round(rows / load_seconds)}
+    return result
+
+
+def find_regressions(results: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """
+    Compare median latencies with the baseline
+    Args:
+        results: Output of a run, {backend: {rows: {operation: summary}}}
+        baseline: Same shape, as stored by --update-baseline
+        tolerance: Allowed slowdown as a fraction, 0.5 lets an operation get 50% slower
+    Returns:
+        One message per operation slower than baseline * (1 + tolerance)
+    """
+    regressions = []
+    for backend_name, by_rows in results.items():
+        for rows, operations in by_rows.items():
+            for operation in OPERATIONS:
+                reference = baseline.get(backend_name, {}).get(rows, {}).get(operation)
+                if reference is None or operation not in operations:
+                    continue
+                current = operations[operation]['p50_ms']
+                if current > reference['p50_ms'] * (1 + tolerance):
+                    regressions.append(f"{backend_name} {rows} rows {operation}: p50 {current} ms "
+                                       f"vs baseline {reference['p50_ms']} ms")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Benchmark the expense storage backends')
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000], help='Dataset sizes, 10k up to 10M')
+    parser.add_argument('--backend', nargs='+', choices=['json', 'sqlite'], default=['json', 'sqlite'])
+    parser.add_argument('--ops', type=int, default=200, help='Timed calls per operation')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--start', type=date.fromisoformat, default=date(2024, 1, 1))
+    parser.add_argument('--days', type=int, default=3 * 365)
+    parser.add_argument('--skew', type=float, default=1.0, help='Zipf exponent of the category mix')
+    parser.add_argument('--note-length', type=int, default=20)
+    parser.add_argument('--output', default='benchmark_results.json')
+    parser.add_argument('--baseline', default=BASELINE_FILE)
+    parser.add_argument('--tolerance', type=float, default=0.5)
+    parser.add_argument('--update-baseline', action='store_true', help='Store this run as the new baseline')
+    args = parser.parse_args(argv)
+
+    results = {}
+    for backend_name in args.backend:
+        for rows in args.rows:
+            result = run(backend_name, rows, args.ops, args.seed, args.start, args.days, args.skew, args.note_length)
+            results.setdefault(backend_name, {})[str(rows)] = result
+            print(f"{backend_name} {rows} rows: load {result['load']['rows_per_sec']} rows/s, " +
+                  ', '.join(f"{operation} p50 {result[operation]['p50_ms']} ms" for operation in OPERATIONS))
+
+    report = {
+        'meta': {'python': platform.python_version(), 'platform': platform.platform(), 'seed': args.seed,
+                 'ops': args.ops, 'skew': args.skew, 'note_length': args.note_length,
+                 'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S')},
+        'results': results
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    if args.update_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f'Baseline written to {args.baseline}')
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f'No baseline at {args.baseline}, nothing to compare')
+        return 0
+    with open(args.baseline) as f:
+        regressions = find_regressions(results, json.load(f), args.tolerance)
+    for message in regressions:
+        print(f'REGRESSION {message}')
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,15 +1,13 @@
 import streamlit as st
 from datetime import datetime
 import requests
-
-API_URL = 'http://localhost:8000'
+import api_client
 
 def add_update_tab():
     selected_date = st.date_input('Enter Date', datetime(2024, 8, 2), label_visibility='collapsed')
-    response = requests.get(f'{API_URL}/expenses/{selected_date}')
-    if response.status_code == 200:
-        existing_expenses = response.json()
-    else:
+    try:
+        existing_expenses = api_client.fetch(f'/expenses/{selected_date}')
+    except requests.RequestException:
         st.error('Failed to retrieve expenses')
         existing_expenses = []
 
@@ -56,8 +54,10 @@ def add_update_tab():
         if submit_button:
             filter_expense = [data for data in expense if data['amount'] > 0]
 
-            response = requests.post(f'{API_URL}/expenses/{selected_date}', json=filter_expense)
+            response = api_client.post(f'/expenses/{selected_date}', json=filter_expense)
             if response.status_code == 200:
+                # The write bumped the data version; drop local copies instead of waiting to revalidate them
+                api_client.invalidate()
                 st.success('Expenses Update Successfully')
             else:
                 st.error('Failed To Update')
\ No newline at end of file
@@ -1,9 +1,16 @@
 import streamlit as st
 from datetime import datetime
-import requests
 import pandas as pd
+import api_client
 
-API_URL = 'http://localhost:8000'
+
+def category_frame(response):
+    df = pd.DataFrame({
+        'Category': list(response.keys()),
+        'Total': [response[data]['Total'] for data in response],
+        'Percentage': [response[data]['Percentage'] for data in response]
+    })
+    return df.sort_values(by='Percentage', ascending=False)
 
 
 def analytic_category_tab():
@@ -19,21 +26,14 @@ def analytic_category_tab():
             'end_date': end_date.strftime('%Y-%m-%d')
         }
 
-        response = requests.post(f'{API_URL}/analytic/date',json=payload)
-        response = response.json()
-
-        df = pd.DataFrame({
-            'Category': list(response.keys()),
-            'Total': [response[data]['Total'] for data in response],
-            'Percentage': [response[data]['Percentage'] for data in response]
-        })
-
-        df_sorted = df.sort_values(by='Percentage', ascending=False)
+        df_sorted = api_client.fetch('/analytic/date', params=payload, build=category_frame)
 
         st.title('Breakdown By Category')
 
         st.bar_chart(data=df_sorted.set_index('Category')['Percentage'])
 
+        # The cached frame is shared, so format a copy
+        df_sorted = df_sorted.copy()
         df_sorted['Total'] = df_sorted['Total'].map('{:.2f}'.format)
         df_sorted['Percentage'] = df_sorted['Percentage'].map('{:.2f}'.format)
 
@@ -1,22 +1,22 @@
 import streamlit as st
-import requests
 import pandas as pd
+import api_client
 
-API_URL = 'http://localhost:8000'
-
-def analytics_month_tab():
-    response = requests.get(f'{API_URL}/analytic/month')
-    response = response.json()
-
+def month_frame(response):
     df = pd.DataFrame({
         'Month': list(response.keys()),
         'Total': [response[data]['Total'] for data in response]
     })
-    
+
     month_order = ['January', 'February', 'March', 'April', 'May', 'June', 'July', 'August', 'September', 'October',
                    'November', 'December']
     df['Month'] = pd.Categorical(df['Month'], categories=month_order, ordered=True)
-    df = df.sort_values('Month')
+    return df.sort_values('Month')
+
+def analytics_month_tab(prefetched=None):
+    # app.py starts this request before rendering the category tab so it overlaps with it;
+    # when the data has not changed the cached DataFrame comes back without being rebuilt
+    df = prefetched.result() if prefetched is not None else api_client.fetch('/analytic/month', build=month_frame)
 
     st.title('Breakdown By Monthly')
     
@@ -0,0 +1,39 @@
+import streamlit as st
+from datetime import datetime
+import pandas as pd
+import api_client
+
+
+def rollup_frame(response):
+    df = pd.DataFrame(response, columns=['period', 'start', 'category', 'total'])
+    # One row per period, one column per category, periods in time order
+    return df.pivot_table(index=['start', 'period'], columns='category', values='total', aggfunc='sum', fill_value=0.0) \
+        .reset_index(level='start', drop=True)
+
+
+def analytic_rollup_tab():
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        start_date = st.date_input('From', datetime(2024, 1, 1), key='rollup_start')
+    with col2:
+        end_date = st.date_input('To', datetime(2024, 12, 31), key='rollup_end')
+    with col3:
+        granularity = st.selectbox('Group By', ['day', 'week', 'month', 'quarter', 'year'], index=2)
+
+    params = {
+        'start_date': start_date.strftime('%Y-%m-%d'),
+        'end_date': end_date.strftime('%Y-%m-%d'),
+        'granularity': granularity
+    }
+    df = api_client.fetch('/analytic/rollup', params=params, build=rollup_frame)
+
+    st.title(f'Breakdown By {granularity.capitalize()}')
+    if df.empty:
+        st.info('No expenses in this range')
+        return
+
+    st.bar_chart(data=df)
+
+    table_df = df.copy()
+    table_df['Total'] = table_df.sum(axis=1)
+    st.table(table_df.map('{:.2f}'.format))
@@ -0,0 +1,164 @@
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+import threading
+import streamlit as st
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+API_URL = 'http://localhost:8000'
+
+# (connect, read) timeout in seconds for every call
+TIMEOUT = (3.05, 10)
+
+# GETs are retried on connection, read and gateway errors. POST /expenses/bulk appends rows,
+# so a POST is only retried when the connection failed before the request was sent
+RETRIES = Retry(
+    total=3,
+    backoff_factor=0.2,
+    status_forcelist=(502, 503, 504),
+    allowed_methods=frozenset({'GET'}),
+    raise_on_status=False
+)
+
+# Responses kept for conditional requests
+CACHE_SIZE = 64
+
+
+@st.cache_resource
+def get_session() -> requests.Session:
+    """
+    One keep-alive session for the whole Streamlit process, shared by every rerun and tab
+    Returns:
+        Session with pooled connections and retries
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=RETRIES)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+@st.cache_resource
+def get_executor() -> ThreadPoolExecutor:
+    """
+    Worker threads for requests issued in parallel
+    Returns:
+        Shared thread pool
+    """
+    return ThreadPoolExecutor(max_workers=8, thread_name_prefix='api')
+
+
+class ResponseCache:
+    """
+    Decoded (and optionally transformed) responses keyed by URL, each with the ETag it came with
+    """
+
+    def __init__(self, size: int = CACHE_SIZE):
+        self.size = size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple) -> Optional[tuple]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: tuple, etag: str, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (etag, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+@st.cache_resource
+def get_response_cache() -> ResponseCache:
+    """
+    Returns:
+        Response cache shared by every session of the process
+    """
+    return ResponseCache()
+
+
+def request(method: str, path: str, session: Optional[requests.Session] = None, **kwargs) -> requests.Response:
+    """
+    Call the API through the shared session
+    Args:
+        method: HTTP method
+        path: Path below API_URL, starting with '/'
+        session: Session to use, get_session() if None
+        kwargs: Passed on to requests (json, headers, ...)
+    Returns:
+        Response
+    """
+    kwargs.setdefault('timeout', TIMEOUT)
+    return (session or get_session()).request(method, f'{API_URL}{path}', **kwargs)
+
+
+def get(path: str, **kwargs) -> requests.Response:
+    return request('GET', path, **kwargs)
+
+
+def post(path: str, **kwargs) -> requests.Response:
+    return request('POST', path, **kwargs)
+
+
+def fetch(path: str, params: Optional[Dict] = None, build: Optional[Callable] = None,
+          session: Optional[requests.Session] = None, cache: Optional[ResponseCache] = None) -> Any:
+    """
+    GET a resource, revalidating the cached copy with If-None-Match.
+    On 304 the cached value is returned as is, without decoding JSON or calling build again.
+    Args:
+        path: Path below API_URL
+        params: Query parameters
+        build: Turns the decoded JSON into the value to cache, e.g. a DataFrame
+        session: Session to use, get_session() if None
+        cache: Response cache to use, get_response_cache() if None
+    Returns:
+        The built value; callers must not modify it in place
+    Raises:
+        requests.RequestException: On connection errors or an error status
+    """
+    cache = cache if cache is not None else get_response_cache()
+    key = (path, tuple(sorted((params or {}).items())))
+    cached = cache.get(key)
+    headers = {'If-None-Match': cached[0]} if cached is not None else {}
+
+    response = request('GET', path, session=session, params=params, headers=headers)
+    if response.status_code == 304 and cached is not None:
+        return cached[1]
+    response.raise_for_status()
+
+    data = response.json()
+    value = build(data) if build is not None else data
+    etag = response.headers.get('ETag')
+    if etag:
+        cache.put(key, etag, value)
+    return value
+
+
+def prefetch(path: str, params: Optional[Dict] = None, build: Optional[Callable] = None) -> Future:
+    """
+    Start fetch() in the background
+    Returns:
+        Future resolving to the built value
+    """
+    # st.cache_resource needs the script thread, so the session and cache are looked up
+    # here and handed to the worker instead of being fetched from inside it
+    return get_executor().submit(fetch, path, params, build, get_session(), get_response_cache())
+
+
+def invalidate() -> None:
+    """
+    Forget every cached response, e.g. after this session changed the data
+    """
+    get_response_cache().clear()
+
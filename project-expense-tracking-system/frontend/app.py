@@ -1,17 +1,26 @@
 import streamlit as st
+import api_client
 from add_update_UI  import add_update_tab
 from analytic_category_UI import analytic_category_tab
-from analytic_moth_UI import analytics_month_tab
+from analytic_moth_UI import analytics_month_tab, month_frame
+from analytic_rollup_UI import analytic_rollup_tab
 
 st.title('Expense Tracking System')
 
-tab1, tab2, tab3 = st.tabs(['Add/Update', 'Analytics By Category','Analytics By Months'])
+tab1, tab2, tab3, tab4 = st.tabs(['Add/Update', 'Analytics By Category','Analytics By Months', 'Trends'])
 
 with tab1:
     add_update_tab()
 
+# Start the monthly analytics call once a submitted form has been saved, so it never
+# reads the data from before the write, and let it run while the other tabs render
+month_response = api_client.prefetch('/analytic/month', build=month_frame)
+
 with tab2:
     analytic_category_tab()
 
 with tab3:
-    analytics_month_tab()
\ No newline at end of file
+    analytics_month_tab(month_response)
+
+with tab4:
+    analytic_rollup_tab()
\ No newline at end of file
@@ -0,0 +1,152 @@
+import pytest
+import asyncio
+import threading
+import sys
+import os
+
+# Add project root to Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
+sys.path.insert(0, project_root)
+
+import httpx
+from fastapi.testclient import TestClient
+import db_helper
+from json_backend import JsonBackend
+import api
+
+
+# Serve the API from a temporary JSON store
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(db_helper, '_backend', JsonBackend(str(tmp_path / 'expenses.json')))
+    return TestClient(api.app)
+
+
+# Test posting a day replaces its expenses in a single log append
+def test_post_expenses_replaces_day(client, tmp_path):
+    day = [{'amount': 10.0, 'category': 'Food', 'notes': 'Lunch'}, {'amount': 5.0, 'category': 'Other'}]
+    assert client.post('/expenses/2024-08-01', json=day).status_code == 200
+    assert client.post('/expenses/2024-08-01', json=day[:1]).status_code == 200
+
+    expenses = db_helper.get_by_date('2024-08-01')
+    assert [(exp['id'], exp['notes']) for exp in expenses] == [(3, 'Lunch')]
+    # Two posts: one delete and two inserts, then one delete and one insert
+    assert len((tmp_path / 'expenses.log').read_text().splitlines()) == 5
+    assert (tmp_path / 'expenses.seq').read_text() == '3'
+
+
+# Test the bulk endpoint imports many dates with one ID range
+def test_bulk_import(client, tmp_path):
+    rows = [
+        {'expense_date': f'2024-08-{day:02d}', 'amount': float(day), 'category': 'Food', 'notes': ''}
+        for day in range(1, 31)
+    ]
+    response = client.post('/expenses/bulk', json=rows)
+    assert response.status_code == 200
+    assert response.json()['inserted'] == 30
+
+    assert db_helper.get_by_id(30)['expense_date'] == '2024-08-30'
+    assert len(db_helper.get_by_date_range('2024-08-01', '2024-08-31')) == 30
+    assert (tmp_path / 'expenses.seq').read_text() == '30'
+
+
+# Test invalid rows are rejected before anything is written
+def test_bulk_import_validation(client):
+    response = client.post('/expenses/bulk', json=[{'expense_date': 'not-a-date', 'amount': 1, 'category': 'Food'}])
+    assert response.status_code == 422
+    assert db_helper.get_all_data() == []
+
+
+# Test the read routes return the shapes the frontend tabs expect
+def test_read_routes(client):
+    year = db_helper.date.today().year
+    client.post(f'/expenses/{year}-01-05', json=[{'amount': 30.0, 'category': 'Food', 'notes': 'Lunch'},
+                                                 {'amount': 10.0, 'category': 'Other', 'notes': ''}])
+    client.post(f'/expenses/{year}-02-01', json=[{'amount': 60.0, 'category': 'Rent', 'notes': ''}])
+
+    expenses = client.get(f'/expenses/{year}-01-05').json()
+    assert [(exp['amount'], exp['category'], exp['notes']) for exp in expenses] == [(30.0, 'Food', 'Lunch'), (10.0, 'Other', '')]
+
+    by_category = client.post('/analytic/date', json={'start_date': f'{year}-01-01', 'end_date': f'{year}-12-31'}).json()
+    assert by_category == {
+        'Food': {'Total': 30.0, 'Percentage': 30.0},
+        'Other': {'Total': 10.0, 'Percentage': 10.0},
+        'Rent': {'Total': 60.0, 'Percentage': 60.0}
+    }
+    assert client.post('/analytic/date', json={'start_date': '1999-01-01', 'end_date': '1999-12-31'}).json() == {}
+    assert client.get('/analytic/month').json() == {'January': {'Total': 40.0}, 'February': {'Total': 60.0}}
+
+
+# Test a slow storage call does not hold up other requests
+def test_slow_call_does_not_block(client, monkeypatch):
+    release = threading.Event()
+
+    def slow_get_by_date(expense_date):
+        assert release.wait(timeout=5)
+        return []
+
+    def fast_fetch_sum_months():
+        release.set()
+        return []
+
+    monkeypatch.setattr(db_helper, 'get_by_date', slow_get_by_date)
+    monkeypatch.setattr(db_helper, 'fetch_sum_months', fast_fetch_sum_months)
+
+    async def both():
+        transport = httpx.ASGITransport(app=api.app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://test') as http:
+            return await asyncio.wait_for(asyncio.gather(
+                http.get('/expenses/2024-08-01'), http.get('/analytic/month')
+            ), timeout=5)
+
+    slow, fast = asyncio.run(both())
+    assert slow.status_code == 200 and fast.status_code == 200
+
+
+# Test reads carry an ETag from the data version and answer 304 until the data changes
+def test_etag_revalidation(client):
+    client.post('/expenses/2024-08-01', json=[{'amount': 10.0, 'category': 'Food', 'notes': ''}])
+    first = client.get('/expenses/2024-08-01')
+    etag = first.headers['ETag']
+    assert first.headers['Cache-Control'] == 'no-cache'
+
+    assert client.get('/expenses/2024-08-01', headers={'If-None-Match': etag}).status_code == 304
+    params = {'start_date': '2024-08-01', 'end_date': '2024-08-31'}
+    by_category = client.get('/analytic/date', params=params, headers={'If-None-Match': etag})
+    assert by_category.status_code == 304
+    month = client.get('/analytic/month')
+    assert client.get('/analytic/month', headers={'If-None-Match': month.headers['ETag']}).status_code == 304
+
+    client.post('/expenses/2024-08-01', json=[{'amount': 20.0, 'category': 'Food', 'notes': ''}])
+    changed = client.get('/analytic/date', params=params, headers={'If-None-Match': etag})
+    assert changed.status_code == 200
+    assert changed.headers['ETag'] != etag
+    assert changed.json() == {'Food': {'Total': 20.0, 'Percentage': 100.0}}
+
+
+# Test the rollup route groups across years and rejects unknown granularities
+def test_rollup_route(client):
+    client.post('/expenses/2023-12-31', json=[{'amount': 10.0, 'category': 'Food', 'notes': ''}])
+    client.post('/expenses/2024-01-01', json=[{'amount': 5.0, 'category': 'Food', 'notes': ''}])
+
+    params = {'start_date': '2023-01-01', 'end_date': '2024-12-31', 'granularity': 'year'}
+    assert client.get('/analytic/rollup', params=params).json() == [
+        {'period': '2023', 'start': '2023-01-01', 'category': 'Food', 'total': 10.0},
+        {'period': '2024', 'start': '2024-01-01', 'category': 'Food', 'total': 5.0}
+    ]
+    params['granularity'] = 'decade'
+    assert client.get('/analytic/rollup', params=params).status_code == 422
+
+
+# Test the top-N and percentile routes
+def test_top_and_percentile_routes(client):
+    client.post('/expenses/2024-08-01', json=[{'amount': float(amount), 'category': 'Food', 'notes': ''} for amount in range(1, 11)])
+    params = {'start_date': '2024-08-01', 'end_date': '2024-08-31'}
+
+    top = client.get('/analytic/top', params={**params, 'n': 2}).json()
+    assert [exp['amount'] for exp in top['Food']] == [10.0, 9.0]
+    assert client.get('/analytic/top', params={**params, 'n': 0}).status_code == 422
+
+    percentiles = client.get('/analytic/percentiles', params=params).json()
+    assert percentiles['Food']['count'] == 10
+    assert percentiles['Food']['p50'] == pytest.approx(5.0, rel=0.01)
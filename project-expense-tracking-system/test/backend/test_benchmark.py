@@ -0,0 +1,58 @@
+import pytest
+import json
+import sys
+import os
+from collections import Counter
+
+# Add project root to Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
+sys.path.insert(0, project_root)
+sys.path.insert(0, os.path.join(project_root, 'benchmarks'))
+
+import db_helper
+import synthetic
+import run_benchmarks
+
+
+# Test the generator is deterministic, batched and follows the requested shape
+def test_generate_expenses(monkeypatch):
+    monkeypatch.setattr(synthetic, 'BATCH_SIZE', 1000)
+    batches = list(synthetic.generate_expenses(2500, days=10, skew=2.0, note_length=8, seed=3))
+    assert [len(batch) for batch in batches] == [1000, 1000, 500]
+    assert batches == list(synthetic.generate_expenses(2500, days=10, skew=2.0, note_length=8, seed=3))
+    assert batches != list(synthetic.generate_expenses(2500, days=10, skew=2.0, note_length=8, seed=4))
+
+    expenses = [exp for batch in batches for exp in batch]
+    assert {exp['expense_date'] for exp in expenses} == {f'2024-01-{day:02d}' for day in range(1, 11)}
+    assert all(len(exp['notes']) == 8 and exp['amount'] > 0 for exp in expenses)
+    counts = Counter(exp['category'] for exp in expenses).most_common()
+    assert [category for category, _ in counts[:2]] == ['Food', 'Rent']
+    assert counts[0][1] > 2 * counts[1][1]
+
+
+# Test a small run writes results for every operation and fails against a faster baseline
+def test_benchmark_run(tmp_path, monkeypatch):
+    monkeypatch.setattr(db_helper, '_backend', None)
+    output = tmp_path / 'results.json'
+    baseline = tmp_path / 'baseline.json'
+    args = ['--rows', '300', '--ops', '5', '--output', str(output), '--baseline', str(baseline)]
+
+    assert run_benchmarks.main(args + ['--update-baseline']) == 0
+    results = json.loads(output.read_text())['results']
+    for backend_name in ('json', 'sqlite'):
+        assert set(results[backend_name]['300']) == set(run_benchmarks.OPERATIONS) | {'load'}
+        assert results[backend_name]['300']['get_by_id']['calls'] == 5
+
+    stored = json.loads(baseline.read_text())
+    assert run_benchmarks.find_regressions(stored, stored, 0.5) == []
+    stored['sqlite']['300']['get_by_date']['p50_ms'] = 1e-6
+    baseline.write_text(json.dumps(stored))
+    assert run_benchmarks.main(args + ['--backend', 'sqlite']) == 1
+
+
+# Test the untimed call between samples is left out of the latencies
+def test_timed_between():
+    calls = []
+    samples = run_benchmarks.timed(calls.append, [('write',)] * 3, between=lambda: calls.append('read'))
+    assert len(samples) == 3
+    assert calls == ['write', 'read'] * 3
@@ -0,0 +1,115 @@
+import pytest
+import sys
+import os
+
+# Add project root to Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
+sys.path.insert(0, project_root)
+
+pytest.importorskip('numpy')
+
+from backend import db_helper
+from json_backend import JsonBackend
+import columnar_snapshot
+
+EXPENSES = [
+    {'id': 1, 'expense_date': '2024-08-02', 'amount': 50.0, 'category': 'Entertainment', 'notes': 'Movie tickets'},
+    {'id': 2, 'expense_date': '2024-08-01', 'amount': 1200.0, 'category': 'Rent', 'notes': 'Monthly rent'},
+    {'id': 3, 'expense_date': '2024-09-01', 'amount': 300.0, 'category': 'Food', 'notes': 'Groceries'},
+    {'id': 4, 'expense_date': '2024-08-02', 'amount': 25.5, 'category': 'Food', 'notes': 'Café'},
+]
+
+
+# Test a snapshot round trip keeps rows sorted by date and answers range totals
+def test_write_and_open(tmp_path):
+    path = str(tmp_path / 'expenses.col')
+    columnar_snapshot.write_snapshot(path, EXPENSES, source=[1, 2])
+
+    snapshot = columnar_snapshot.ColumnarSnapshot(path)
+    assert snapshot.rows == 4
+    assert snapshot.source == [1, 2]
+    assert snapshot.ids.tolist() == [2, 1, 4, 3]
+    assert snapshot.record(2) == EXPENSES[3]
+    assert snapshot.category_totals('2024-08-01', '2024-08-31') == {
+        'Entertainment': [50.0, 1], 'Food': [25.5, 1], 'Rent': [1200.0, 1]
+    }
+    assert snapshot.category_totals('2025-01-01', '2025-12-31') == {}
+    assert snapshot.contains_ids([4, 9]) == [True, False]
+    snapshot.close()
+
+
+# Test summaries read the columnar copy, corrected by writes made after compaction
+def test_backend_uses_snapshot(tmp_path, monkeypatch):
+    data_file = str(tmp_path / 'expenses.json')
+    col_file = str(tmp_path / 'expenses.col')
+    writer = JsonBackend(data_file, columnar_file=col_file)
+    writer.replace_all(EXPENSES)
+    assert os.path.exists(col_file)
+
+    # A fresh backend never parses the JSON to answer the summaries
+    backend = JsonBackend(data_file, columnar_file=col_file)
+    monkeypatch.setattr(db_helper, '_backend', backend)
+    summary = {row['category']: row['Total'] for row in db_helper.fetch_sum_date('2024-08-01', '2024-12-31')}
+    assert summary == {'Entertainment': 50.0, 'Rent': 1200.0, 'Food': 325.5}
+    assert backend.cache_stats()['misses'] == 0
+
+    # Deletes and inserts still in the log are applied on top of the snapshot
+    writer.delete_date('2024-08-02')
+    writer.insert('2024-08-02', 10.0, 'Other', 'Bus')
+    writer.insert('2024-09-03', 5.0, 'Food', 'Tea')
+    summary = {row['category']: row['Total'] for row in db_helper.fetch_sum_date('2024-08-01', '2024-12-31')}
+    assert summary == {'Rent': 1200.0, 'Food': 305.0, 'Other': 10.0}
+    assert backend.month_totals(2024) == {8: 1210.0, 9: 305.0}
+    assert backend.cache_stats()['misses'] == 0
+
+    assert db_helper.check_consistency() is True
+    backend.close()
+    writer.close()
+
+
+# Test a columnar copy left over from an older JSON snapshot is ignored
+def test_stale_snapshot_ignored(tmp_path):
+    data_file = str(tmp_path / 'expenses.json')
+    col_file = str(tmp_path / 'expenses.col')
+    JsonBackend(data_file, columnar_file=col_file).replace_all(EXPENSES)
+    JsonBackend(data_file).replace_all(EXPENSES[:1])
+
+    backend = JsonBackend(data_file, columnar_file=col_file)
+    assert backend.category_totals('2024-01-01', '2024-12-31') == {'Entertainment': 50.0}
+    assert backend.cache_stats()['misses'] == 1
+    backend.close()
+
+
+# Test a log already folded into the snapshot before a crash is not applied again
+def test_folded_log_after_crash(tmp_path):
+    data_file = str(tmp_path / 'expenses.json')
+    col_file = str(tmp_path / 'expenses.col')
+    writer = JsonBackend(data_file, columnar_file=col_file)
+    writer.replace_all(EXPENSES)
+    writer.replace_days(['2024-09-01'], [{'expense_date': '2024-09-01', 'amount': 80.0, 'category': 'Food', 'notes': ''}])
+    with open(writer.log_file, 'r') as f:
+        log = f.read()
+    # Crash after the compacted snapshot was renamed into place but before the log was truncated
+    writer.compact()
+    with open(writer.log_file, 'w') as f:
+        f.write(log)
+
+    backend = JsonBackend(data_file, columnar_file=col_file)
+    assert backend.category_totals('2024-09-01', '2024-09-30') == {'Food': 80.0}
+    assert backend.check_consistency() is True
+    backend.close()
+    writer.close()
+
+
+# Test an unreadable columnar copy falls back to the parsed records
+def test_corrupt_snapshot_ignored(tmp_path):
+    data_file = str(tmp_path / 'expenses.json')
+    col_file = str(tmp_path / 'expenses.col')
+    JsonBackend(data_file, columnar_file=col_file).replace_all(EXPENSES)
+    with open(col_file, 'wb') as f:
+        f.write(b'not a snapshot')
+
+    backend = JsonBackend(data_file, columnar_file=col_file)
+    assert backend.category_totals('2024-09-01', '2024-09-30') == {'Food': 300.0}
+    assert backend.check_consistency() is True
+    backend.close()
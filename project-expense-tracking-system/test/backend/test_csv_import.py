@@ -0,0 +1,77 @@
+import pytest
+import csv
+import io
+import sys
+import os
+import time
+
+# Add project root to Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
+sys.path.insert(0, project_root)
+
+import db_helper
+import csv_import
+from json_backend import JsonBackend
+from sqlite_backend import SqliteBackend
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    backend = JsonBackend(str(tmp_path / 'expenses.json'))
+    monkeypatch.setattr(db_helper, '_backend', backend)
+    yield backend
+    backend.close()
+
+
+# Test dates, amounts and categories are normalized and bad rows reported with their line
+def test_import_validates_rows(store, tmp_path):
+    source = io.StringIO(
+        'Date,Amount,Category,Notes\n'
+        '2024-08-01,12.50,Food,lunch\n'
+        '2024-08-01, "$1,200.00" ,  rent ,\n'
+        'not a date,5,Food,\n'
+        '2024-08-02,-3,Food,\n'
+        '2024-08-02,abc,,\n'
+        '2024-08-03,7,Travel,\n'
+    )
+    report = tmp_path / 'rejected.csv'
+    summary = csv_import.import_csv(source, chunk_size=4, categories=['Food', 'Rent', 'Shopping'],
+                                    report_file=str(report))
+
+    assert (summary['rows'], summary['imported'], summary['rejected'], summary['failed']) == (6, 2, 4, 0)
+    assert [(exp['expense_date'], exp['amount'], exp['category']) for exp in db_helper.get_all_data()] == \
+        [('2024-08-01', 12.5, 'Food'), ('2024-08-01', 1200.0, 'Rent')]
+
+    rows = list(csv.DictReader(report.open()))
+    assert [int(row['line']) for row in rows] == [4, 5, 6, 7]
+    assert rows[0]['reason'] == 'invalid date'
+    assert rows[1]['reason'] == 'amount must be a positive number'
+    assert rows[2]['reason'] == 'amount must be a positive number; unknown category'
+    assert rows[3]['expense_date'] == '2024-08-03' and rows[3]['reason'] == 'unknown category'
+    assert summary['samples'][0]['line'] == 4
+
+    with pytest.raises(ValueError):
+        csv_import.import_csv(io.StringIO('date,amount\n2024-08-01,1\n'))
+
+
+# Test each chunk is stored with a single write and a large file imports quickly
+def test_import_one_write_per_chunk(tmp_path, monkeypatch):
+    backend = SqliteBackend(str(tmp_path / 'expenses.db'))
+    monkeypatch.setattr(db_helper, '_backend', backend)
+    writes = []
+    insert_many = backend.insert_many
+    monkeypatch.setattr(backend, 'insert_many', lambda expenses: writes.append(len(expenses)) or insert_many(expenses))
+
+    path = tmp_path / 'expenses.csv'
+    with path.open('w') as f:
+        f.write('expense_date,amount,category,notes\n')
+        for i in range(100000):
+            f.write(f'2024-{i % 12 + 1:02d}-{i % 28 + 1:02d},{i % 500 + 1}.25,Food,row {i}\n')
+
+    started = time.perf_counter()
+    summary = csv_import.import_csv(str(path), chunk_size=25000)
+    assert time.perf_counter() - started < 30
+    assert summary['imported'] == 100000 and summary['rejected'] == 0
+    assert writes == [25000] * 4
+    assert len(db_helper.get_by_date('2024-01-01')) == len(range(0, 100000, 84))
+    backend.close()
@@ -2,6 +2,7 @@ import pytest
 from unittest.mock import patch, MagicMock
 import sys
 import os
+import json
 
 # Add project root to Python path
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
@@ -13,6 +14,7 @@ sys.modules['logging_setup'].setup_logging = MagicMock(return_value=MagicMock())
 
 # Now import db_helper
 from backend import db_helper
+from json_backend import JsonBackend
 from datetime import datetime
 
 
@@ -173,4 +175,148 @@ def test_get_category_summary(mock_get_category_summary):
     # Verify data for each category
     for category in category_data:
         assert 'Total' in category_data[category]
-        assert isinstance(category_data[category]['Total'], (int, float))
\ No newline at end of file
+        assert isinstance(category_data[category]['Total'], (int, float))
+
+# Point the file storage at a temporary directory
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(db_helper, '_backend', JsonBackend(str(tmp_path / 'expenses.json')))
+    return tmp_path
+
+
+# Test inserts go to the append log and not the snapshot
+def test_insert_appends_to_log(store):
+    assert db_helper.insert_data('2024-08-01', 10.0, 'Food', 'Lunch') is True
+    assert db_helper.insert_data('2024-08-02', 20.0, 'Rent', 'Room') is True
+
+    assert not (store / 'expenses.json').exists()
+    assert len((store / 'expenses.log').read_text().splitlines()) == 2
+
+    expenses = db_helper.get_all_data()
+    assert [exp['id'] for exp in expenses] == [1, 2]
+    assert db_helper.get_by_date('2024-08-02')[0]['category'] == 'Rent'
+
+
+# Test IDs come from the persisted counter and are never reused after a delete
+def test_ids_survive_delete(store):
+    db_helper.insert_data('2024-08-01', 10.0, 'Food', 'Lunch')
+    db_helper.insert_data('2024-08-02', 20.0, 'Rent', 'Room')
+    db_helper.delete_data('2024-08-01')
+    db_helper.insert_data('2024-08-03', 30.0, 'Other', 'Bus')
+
+    assert [exp['id'] for exp in db_helper.get_all_data()] == [2, 3]
+    assert (store / 'expenses.seq').read_text() == '3'
+
+
+# Test compaction folds the log into the snapshot
+def test_compact(store):
+    db_helper.get_backend().compact_threshold = 1
+    db_helper.insert_data('2024-08-01', 10.0, 'Food', 'Lunch')
+
+    assert (store / 'expenses.log').read_text() == ''
+    assert json.loads((store / 'expenses.json').read_text())[0]['notes'] == 'Lunch'
+    assert db_helper.get_by_id(1)['amount'] == 10.0
+
+
+# Test an existing data file seeds the counter and replaying a folded log is harmless
+def test_existing_snapshot(store):
+    (store / 'expenses.json').write_text(json.dumps([
+        {'id': 7, 'expense_date': '2024-08-01', 'amount': 5.0, 'category': 'Food', 'notes': ''}
+    ]))
+    db_helper.insert_data('2024-08-01', 10.0, 'Food', 'Lunch')
+    assert db_helper.get_by_id(8) is not None
+
+    # Simulate a crash after the snapshot was written but before the log was cleared
+    log = (store / 'expenses.log').read_text()
+    db_helper.compact()
+    (store / 'expenses.log').write_text(log)
+    assert len(db_helper.get_all_data()) == 2
+
+
+# Test repeated reads are served from the cache and our own writes patch it in place
+def test_cache_hits_and_invalidation(store):
+    db_helper.insert_data('2024-08-01', 10.0, 'Food', 'Lunch')
+    db_helper.reset_cache()
+
+    db_helper.get_all_data()
+    db_helper.get_by_date('2024-08-01')
+    db_helper.get_by_id(1)
+    assert db_helper.cache_stats()['misses'] == 1
+    assert db_helper.cache_stats()['hits'] == 2
+
+    db_helper.insert_data('2024-08-01', 20.0, 'Food', 'Dinner')
+    assert len(db_helper.get_by_date('2024-08-01')) == 2
+    assert db_helper.cache_stats()['misses'] == 1
+
+
+# Test a change made by another process is picked up
+def test_cache_sees_external_change(store):
+    db_helper.insert_data('2024-08-01', 10.0, 'Food', 'Lunch')
+    assert len(db_helper.get_all_data()) == 1
+
+    (store / 'expenses.json').write_text(json.dumps([
+        {'id': 1, 'expense_date': '2024-08-01', 'amount': 10.0, 'category': 'Food', 'notes': 'Lunch'},
+        {'id': 2, 'expense_date': '2024-08-02', 'amount': 99.0, 'category': 'Rent', 'notes': ''}
+    ]))
+    assert db_helper.get_by_id(2)['amount'] == 99.0
+
+
+# Test the id and date indexes follow inserts and deletes
+def test_indexes(store):
+    for day, amount in [('2024-08-03', 30.0), ('2024-08-01', 10.0), ('2024-08-02', 20.0), ('2024-08-01', 15.0)]:
+        db_helper.insert_data(day, amount, 'Food', '')
+
+    assert db_helper.get_by_id(4)['amount'] == 15.0
+    assert db_helper.get_by_id(99) is None
+    assert [exp['amount'] for exp in db_helper.get_by_date_range('2024-08-01', '2024-08-02')] == [10.0, 15.0, 20.0]
+
+    db_helper.delete_data('2024-08-01')
+    assert db_helper.get_by_id(2) is None
+    assert db_helper.get_by_date('2024-08-01') == []
+    assert [exp['id'] for exp in db_helper.get_by_date_range('2024-07-01', '2024-12-31')] == [3, 1]
+
+    # A fresh parse of the files agrees with the patched indexes
+    db_helper.reset_cache()
+    assert [exp['id'] for exp in db_helper.get_all_data()] == [1, 3]
+
+
+# Test range and monthly summaries come from the rollup and stay consistent
+def test_rollup_summaries(store):
+    year = datetime.now().year
+    rows = [
+        (f'{year}-01-05', 10.0, 'Food'), (f'{year}-01-20', 5.0, 'Rent'),
+        (f'{year}-02-01', 7.5, 'Food'), (f'{year}-02-10', 0.0, 'Other'),
+        (f'{year - 1}-12-31', 100.0, 'Food')
+    ]
+    for day, amount, category in rows:
+        db_helper.insert_data(day, amount, category, '')
+
+    summary = {row['category']: row['Total'] for row in db_helper.fetch_sum_date(f'{year}-01-10', f'{year}-02-28')}
+    assert summary == {'Rent': 5.0, 'Food': 7.5, 'Other': 0.0}
+    assert db_helper.fetch_sum_date(f'{year}-03-01', f'{year}-03-31') == []
+    assert db_helper.fetch_sum_months() == [{'month': 1, 'total': 15.0}, {'month': 2, 'total': 7.5}]
+
+    # Deleting a day in the middle drops the prefix sums after it
+    db_helper.delete_data(f'{year}-01-20')
+    db_helper.insert_data(f'{year}-01-21', 2.0, 'Food', '')
+    summary = {row['category']: row['Total'] for row in db_helper.fetch_sum_date(f'{year}-01-01', f'{year}-12-31')}
+    assert summary == {'Food': 19.5, 'Other': 0.0}
+    assert db_helper.check_consistency() is True
+
+    # A corrupted rollup is reported
+    db_helper.get_backend()._load_index().day_totals[f'{year}-02-01']['Food'][0] = 1.0
+    assert db_helper.check_consistency() is False
+
+
+# Test the data version grows with each write, is shared by instances and survives compaction
+def test_data_version(store):
+    assert db_helper.data_version() == 0
+    db_helper.insert_data('2024-08-01', 10.0, 'Food', 'Lunch')
+    db_helper.replace_day('2024-08-01', [{'amount': 5.0, 'category': 'Food', 'notes': ''}])
+    assert db_helper.data_version() == 2
+
+    db_helper.compact()
+    assert db_helper.data_version() == 2
+    assert JsonBackend(str(store / 'expenses.json')).data_version() == 2
+    db_helper.save_data([])
+    assert db_helper.data_version() == 3
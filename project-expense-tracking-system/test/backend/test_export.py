@@ -0,0 +1,97 @@
+import pytest
+import csv
+import gzip
+import io
+import json
+import zlib
+import time
+import sys
+import os
+from datetime import date
+
+# Add project root to Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
+sys.path.insert(0, project_root)
+
+from fastapi.testclient import TestClient
+import db_helper
+import api
+import metrics
+from json_backend import JsonBackend
+from sqlite_backend import SqliteBackend
+
+
+@pytest.fixture(params=['json', 'sqlite'])
+def filled_store(request, tmp_path, monkeypatch):
+    if request.param == 'json':
+        backend = JsonBackend(str(tmp_path / 'expenses.json'))
+    else:
+        backend = SqliteBackend(str(tmp_path / 'expenses.db'))
+    monkeypatch.setattr(db_helper, '_backend', backend)
+    db_helper.insert_many([
+        {'expense_date': f'2024-08-{day:02d}', 'amount': float(i), 'category': 'Food' if i % 3 else 'Rent',
+         'notes': f'note, "{i}"'}
+        for day in range(1, 31) for i in range(10)
+    ])
+    yield backend
+    backend.close()
+
+
+# Test records come in fixed-size chunks, filtered by date range and category
+def test_chunks(filled_store):
+    chunks = list(db_helper.iter_expense_chunks(date(2024, 8, 2), date(2024, 8, 11), chunk_size=32))
+    assert [len(chunk) for chunk in chunks] == [32, 32, 32, 4]
+    assert {exp['expense_date'] for chunk in chunks for exp in chunk} == {f'2024-08-{day:02d}' for day in range(2, 12)}
+
+    rent = [exp for chunk in db_helper.iter_expense_chunks(date(2024, 8, 1), date(2024, 8, 31), 'Rent') for exp in chunk]
+    assert len(rent) == 120 and {exp['category'] for exp in rent} == {'Rent'}
+
+
+# Test CSV and NDJSON output, plain and gzipped, parse back to the same records
+def test_formats(filled_store):
+    expected = [exp for chunk in db_helper.iter_expense_chunks(date(2024, 8, 1), date(2024, 8, 5)) for exp in chunk]
+
+    text = b''.join(db_helper.export_expenses(date(2024, 8, 1), date(2024, 8, 5), chunk_size=7)).decode('utf-8')
+    rows = list(csv.DictReader(io.StringIO(text)))
+    assert [(int(row['id']), float(row['amount']), row['notes']) for row in rows] == \
+        [(exp['id'], exp['amount'], exp['notes']) for exp in expected]
+
+    blocks = list(db_helper.export_expenses(date(2024, 8, 1), date(2024, 8, 5), fmt='ndjson', compress=True, chunk_size=7))
+    assert len(blocks) > 2
+    # The first chunk can be decompressed before the rest of the stream exists
+    partial = zlib.decompressobj(16 + zlib.MAX_WBITS).decompress(blocks[0])
+    assert partial.decode('utf-8').count('\n') == 7
+    lines = gzip.decompress(b''.join(blocks)).decode('utf-8').splitlines()
+    assert [json.loads(line)['id'] for line in lines] == [exp['id'] for exp in expected]
+
+    with pytest.raises(ValueError):
+        db_helper.export_expenses(date(2024, 8, 1), date(2024, 8, 5), fmt='xml')
+
+
+# Test the export timers run until the stream is consumed, not just while it is set up
+def test_export_timed_while_streaming(filled_store):
+    metrics.reset()
+    blocks = db_helper.export_expenses(date(2024, 8, 1), date(2024, 8, 31), chunk_size=7)
+    assert metrics.get_stats('db_helper._export_stream').calls == 0
+    next(blocks)
+    time.sleep(0.05)
+    list(blocks)
+
+    stats = metrics.get_stats('db_helper._export_stream')
+    assert stats.calls == 1 and stats.errors == 0
+    assert stats.sum_ns >= 50_000_000
+    assert metrics.get_stats('db_helper.iter_expense_chunks').calls == 1
+
+
+# Test the export route streams an attachment
+def test_export_route(filled_store):
+    client = TestClient(api.app)
+    params = {'start_date': '2024-08-01', 'end_date': '2024-08-31', 'category': 'Rent', 'format': 'ndjson', 'gzip': 'true'}
+    response = client.get('/expenses/export', params=params)
+    assert response.status_code == 200
+    assert response.headers['content-type'] == 'application/gzip'
+    assert 'expenses_2024-08-01_2024-08-31.ndjson.gz' in response.headers['content-disposition']
+    assert len(gzip.decompress(response.content).splitlines()) == 120
+
+    params.update(format='xml')
+    assert client.get('/expenses/export', params=params).status_code == 422
@@ -0,0 +1,221 @@
+import pytest
+import multiprocessing
+import threading
+import time
+import sys
+import os
+
+# Add project root to Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
+sys.path.insert(0, project_root)
+
+from json_backend import JsonBackend
+
+
+def _insert_rows(data_file, worker, count):
+    backend = JsonBackend(data_file, compact_threshold=2048, durability='none')
+    for i in range(count):
+        backend.insert(f'2024-08-{worker + 1:02d}', float(i), 'Food', f'worker {worker}')
+
+
+# Test writers in separate processes neither lose rows nor share IDs, even across compactions
+@pytest.mark.skipif(sys.platform == 'win32', reason='uses fork')
+def test_multi_process_writers(tmp_path):
+    data_file = str(tmp_path / 'expenses.json')
+    context = multiprocessing.get_context('fork')
+    workers = [context.Process(target=_insert_rows, args=(data_file, worker, 40)) for worker in range(4)]
+    for process in workers:
+        process.start()
+    for process in workers:
+        process.join()
+        assert process.exitcode == 0
+
+    expenses = JsonBackend(data_file).all_expenses()
+    assert len(expenses) == 160
+    assert sorted(exp['id'] for exp in expenses) == list(range(1, 161))
+
+
+# Test group commit coalesces concurrent writes into one flush
+def test_group_commit(tmp_path, monkeypatch):
+    backend = JsonBackend(str(tmp_path / 'expenses.json'), group_commit_ms=50)
+    flushes = []
+    flush = backend._flush
+    monkeypatch.setattr(backend, '_flush', lambda writes: flushes.append(len(writes)) or flush(writes))
+
+    results = {}
+    def write(worker):
+        results[worker] = backend.insert_many([
+            {'expense_date': '2024-08-01', 'amount': 1.0, 'category': 'Food', 'notes': str(worker)}
+        ] * 2)
+
+    threads = [threading.Thread(target=write, args=(worker,)) for worker in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sum(flushes) == 8
+    assert len(flushes) < 8
+    assert sorted(i for ids in results.values() for i in ids) == list(range(1, 17))
+    assert all(ids[1] == ids[0] + 1 for ids in results.values())
+    assert len(backend.by_date('2024-08-01')) == 16
+
+
+# Test a failed flush is reported to every writer of the group
+def test_group_commit_error(tmp_path, monkeypatch):
+    backend = JsonBackend(str(tmp_path / 'expenses.json'), group_commit_ms=1)
+    def fail(writes):
+        raise OSError('disk full')
+    monkeypatch.setattr(backend, '_flush', fail)
+
+    with pytest.raises(OSError):
+        backend.insert('2024-08-01', 1.0, 'Food', '')
+
+
+# Test snapshots are replaced by rename, leaving no temporary files behind
+def test_atomic_snapshot(tmp_path):
+    backend = JsonBackend(str(tmp_path / 'expenses.json'), durability='always')
+    backend.insert('2024-08-01', 1.0, 'Food', '')
+    backend.compact()
+
+    assert not [name for name in os.listdir(tmp_path) if name.endswith('.tmp')]
+    assert JsonBackend(str(tmp_path / 'expenses.json')).by_id(1)['amount'] == 1.0
+
+
+# Test unknown durability levels are rejected
+def test_durability_validation(tmp_path):
+    with pytest.raises(ValueError):
+        JsonBackend(str(tmp_path / 'expenses.json'), durability='sometimes')
+
+
+# Test replacing the data moves the ID counter past the new records
+def test_replace_all_advances_ids(tmp_path):
+    backend = JsonBackend(str(tmp_path / 'expenses.json'))
+    backend.insert('2024-08-01', 1.0, 'Food', '')
+    backend.replace_all([{'id': 5, 'expense_date': '2024-08-01', 'amount': 5.0, 'category': 'Rent', 'notes': ''}])
+
+    new_id = backend.insert('2024-08-02', 2.0, 'Food', '')
+    assert new_id == 6
+    assert backend.by_id(5)['category'] == 'Rent'
+    assert len(JsonBackend(str(tmp_path / 'expenses.json')).all_expenses()) == 2
+
+
+# Test a rewrite without an ID counter leaves one behind for the next insert
+def test_replace_all_writes_counter(tmp_path):
+    backend = JsonBackend(str(tmp_path / 'expenses.json'))
+    backend.replace_all([{'id': 9, 'expense_date': '2024-08-01', 'amount': 5.0, 'category': 'Rent', 'notes': ''}])
+    with open(backend.seq_file) as f:
+        assert f.read() == '9'
+
+    # Still seeded from the old files, so IDs written before the rewrite are not reused either
+    os.remove(backend.seq_file)
+    backend.replace_all([])
+    assert backend.insert('2024-08-02', 2.0, 'Food', '') == 10
+
+
+# Test a write after an interrupted append starts on a new line and survives a reload
+def test_append_after_torn_line(tmp_path):
+    backend = JsonBackend(str(tmp_path / 'expenses.json'))
+    backend.insert('2024-08-01', 1.0, 'Food', '')
+    with open(backend.log_file, 'a') as f:
+        f.write('{"op": "insert", "id": 2, "da')
+
+    new_id = backend.insert('2024-08-02', 2.0, 'Food', '')
+    reloaded = JsonBackend(str(tmp_path / 'expenses.json'))
+    assert reloaded.by_id(new_id)['amount'] == 2.0
+    assert len(reloaded.all_expenses()) == 2
+
+
+# Test readers never see a write half-applied while other threads replace and delete days
+def test_reads_during_writes(tmp_path):
+    backend = JsonBackend(str(tmp_path / 'expenses.json'), compact_threshold=10 ** 9, durability='none')
+    backend.insert_many([{'expense_date': f'2024-08-{day:02d}', 'amount': 1.0, 'category': 'Food', 'notes': ''}
+                         for day in range(1, 29) for _ in range(5)])
+    backend._load_index()
+    stop = threading.Event()
+    errors = []
+
+    def read():
+        while not stop.is_set():
+            try:
+                days = {}
+                for expense in backend.by_date_range('2024-08-01', '2024-08-28'):
+                    days.setdefault(expense['expense_date'], []).append((expense['category'], expense['amount']))
+                # Every day is as it was, replaced, or deleted: never in between
+                for rows in days.values():
+                    assert rows in ([('Food', 1.0)] * 5, [('Rent', 2.0)]), rows
+                backend.daily_totals('2024-08-01', '2024-08-28')
+            except Exception as e:
+                errors.append(e)
+
+    readers = [threading.Thread(target=read) for _ in range(4)]
+    for reader in readers:
+        reader.start()
+    for i in range(60):
+        day = f'2024-08-{i % 28 + 1:02d}'
+        if i % 2:
+            backend.delete_date(day)
+        else:
+            backend.replace_days([day], [{'expense_date': day, 'amount': 2.0, 'category': 'Rent', 'notes': ''}])
+    stop.set()
+    for reader in readers:
+        reader.join()
+
+    assert errors == []
+    assert backend.check_consistency()
+
+
+# Test a write against a warm cache patches the index instead of copying it
+def test_warm_write_cost_is_flat(tmp_path):
+    def write_ms(rows):
+        backend = JsonBackend(str(tmp_path / f'{rows}.json'), compact_threshold=10 ** 9, durability='none')
+        backend.insert_many([{'expense_date': f'2024-{i % 12 + 1:02d}-{i % 28 + 1:02d}', 'amount': 1.0,
+                              'category': 'Food', 'notes': ''} for i in range(rows)])
+        index = backend._load_index()
+        timings = []
+        for _ in range(30):
+            started = time.perf_counter()
+            backend.insert('2024-08-01', 1.0, 'Food', '')
+            timings.append(time.perf_counter() - started)
+            backend.by_id(1)
+        assert backend._load_index() is index
+        return sorted(timings)[len(timings) // 2]
+
+    small, large = write_ms(1000), write_ms(100000)
+    # A copy of the index would make the large store about 100 times slower
+    assert large < small * 5
+
+
+# Test concurrent readers building the prefix sums of a fresh index agree with a full scan
+def test_concurrent_category_totals(tmp_path):
+    # Switch threads as often as possible so unsynchronized prefix building would interleave
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        _check_concurrent_category_totals(tmp_path)
+    finally:
+        sys.setswitchinterval(interval)
+
+
+def _check_concurrent_category_totals(tmp_path):
+    backend = JsonBackend(str(tmp_path / 'expenses.json'), compact_threshold=10 ** 9, durability='none')
+    backend.insert_many([{'expense_date': f'2024-{i % 12 + 1:02d}-{i % 28 + 1:02d}', 'amount': float(i % 7),
+                          'category': ('Food', 'Rent')[i % 2], 'notes': ''} for i in range(2000)])
+    for _ in range(5):
+        backend.reset_cache()
+        index = backend._load_index()
+        barrier = threading.Barrier(4)
+        results = []
+
+        def read():
+            barrier.wait()
+            results.append(index.category_totals('2024-01-01', '2024-12-31'))
+
+        readers = [threading.Thread(target=read) for _ in range(4)]
+        for reader in readers:
+            reader.start()
+        for reader in readers:
+            reader.join()
+        assert len(index._prefix) <= len(index.dates)
+        assert index.check_consistency()
+        assert all(result == results[0] for result in results)
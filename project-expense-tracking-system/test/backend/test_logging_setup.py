@@ -0,0 +1,80 @@
+import pytest
+import importlib.util
+import logging
+import logging.handlers
+import threading
+import sys
+import os
+
+# Add project root to Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
+sys.path.insert(0, project_root)
+
+
+@pytest.fixture
+def logging_setup():
+    # conftest replaces logging_setup with a mock, so load the real module from its file
+    spec = importlib.util.spec_from_file_location('real_logging_setup', os.path.join(project_root, 'backend', 'logging_setup.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    yield module
+    module.shutdown_logging()
+
+
+# Test repeated setup adds a single queue handler and records reach the file from the listener thread
+def test_setup_logging(logging_setup, tmp_path):
+    log_file = str(tmp_path / 'server.log')
+    logger = logging_setup.setup_logging('test_queue_logger', log_file)
+    assert logging_setup.setup_logging('test_queue_logger', log_file) is logger
+    assert [type(handler) for handler in logger.handlers] == [logging.handlers.QueueHandler]
+    assert logger.level == logging.INFO
+
+    writers = set()
+    listener_handler = logging_setup._listeners[os.path.abspath(log_file)][1].handlers[0]
+    emit = listener_handler.emit
+    listener_handler.emit = lambda record: writers.add(threading.current_thread()) or emit(record)
+
+    logger.debug('hidden')
+    logger.info('stored %s', 42)
+    logging_setup.shutdown_logging()
+    lines = open(log_file).read().splitlines()
+    assert len(lines) == 1 and lines[0].endswith('test_queue_logger - INFO - stored 42')
+    assert threading.current_thread() not in writers and len(writers) == 1
+
+    # After a restart the existing handler follows the new listener
+    logging_setup.setup_logging('test_queue_logger', log_file, logging.DEBUG).debug('again')
+    logging_setup.shutdown_logging()
+    assert len(logger.handlers) == 1
+    assert open(log_file).read().splitlines()[-1].endswith('DEBUG - again')
+
+
+# Test the file rolls over once it passes the size limit
+def test_size_rotation(logging_setup, tmp_path, monkeypatch):
+    monkeypatch.setattr(logging_setup, 'LOG_MAX_BYTES', 200)
+    monkeypatch.setattr(logging_setup, 'LOG_BACKUPS', 2)
+    log_file = tmp_path / 'server.log'
+    logger = logging_setup.setup_logging('test_rotating_logger', str(log_file))
+    for i in range(20):
+        logger.info('message %d', i)
+    logging_setup.shutdown_logging()
+    assert sorted(path.name for path in tmp_path.iterdir()) == ['server.log', 'server.log.1', 'server.log.2']
+    assert log_file.stat().st_size <= 200
+
+
+# Test external rotation only appends and follows the file when it is moved away
+def test_external_rotation(logging_setup, tmp_path, monkeypatch):
+    monkeypatch.setattr(logging_setup, 'LOG_ROTATION', 'external')
+    log_file = tmp_path / 'server.log'
+    logger = logging_setup.setup_logging('test_watched_logger', str(log_file))
+    listener = logging_setup._listeners[str(log_file)][1]
+    assert isinstance(listener.handlers[0], logging.handlers.WatchedFileHandler)
+
+    logger.info('before')
+    # Wait for the listener to write it, then rotate the file the way logrotate would
+    listener.stop()
+    os.rename(log_file, tmp_path / 'server.log.1')
+    listener.start()
+    logger.info('after')
+    logging_setup.shutdown_logging()
+    assert (tmp_path / 'server.log.1').read_text().endswith('INFO - before\n')
+    assert log_file.read_text().endswith('INFO - after\n')
@@ -0,0 +1,85 @@
+import pytest
+import asyncio
+import threading
+import sys
+import os
+
+# Add project root to Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
+sys.path.insert(0, project_root)
+
+from fastapi.testclient import TestClient
+import metrics
+import db_helper
+import api
+from json_backend import JsonBackend
+
+
+@metrics.timer
+def square(n):
+    if n < 0:
+        raise ValueError('negative')
+    return n * n
+
+
+@metrics.timer
+async def async_square(n):
+    return n * n
+
+
+@metrics.timer
+def countdown(n):
+    while n:
+        yield n
+        n -= 1
+
+
+# Test calls and errors are counted for plain, async and generator functions, also across threads
+def test_timer_counts():
+    metrics.reset()
+    threads = [threading.Thread(target=lambda: [square(i) for i in range(1000)]) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    with pytest.raises(ValueError):
+        square(-1)
+    assert asyncio.run(async_square(3)) == 9
+    assert list(countdown(3)) == [3, 2, 1]
+    stopped = countdown(5)
+    next(stopped)
+    stopped.close()
+
+    stats = metrics.get_stats(f'{__name__}.square').snapshot()
+    assert (stats['calls'], stats['errors'], sum(stats['counts'])) == (8001, 1, 8001)
+    assert metrics.get_stats(f'{__name__}.async_square').calls == 1
+    assert metrics.get_stats(f'{__name__}.countdown').snapshot()['errors'] == 0
+    assert square.__name__ == 'square'
+
+
+# Test quantiles interpolate inside the histogram buckets
+def test_quantile():
+    stats = metrics.FunctionStats('test')
+    assert stats.quantile(0.5) is None
+    for _ in range(99):
+        stats.observe(300_000, False)
+    stats.observe(2_000_000_000, False)
+    assert metrics.BUCKETS[2] < stats.quantile(0.5) <= metrics.BUCKETS[3]
+    assert stats.quantile(0.999) == pytest.approx(1.0 + 1.5 * 0.9)
+
+
+# Test /metrics exposes histograms of the storage calls and handlers in Prometheus text format
+def test_metrics_route(tmp_path, monkeypatch):
+    monkeypatch.setattr(db_helper, '_backend', JsonBackend(str(tmp_path / 'expenses.json')))
+    metrics.reset()
+    client = TestClient(api.app)
+    assert client.get('/expenses/2024-08-01').status_code == 200
+
+    response = client.get('/metrics')
+    assert response.headers['content-type'].startswith('text/plain; version=0.0.4')
+    lines = response.text.splitlines()
+    assert '# TYPE expense_call_duration_seconds histogram' in lines
+    assert 'expense_calls_total{function="db_helper.get_by_date"} 1' in lines
+    assert 'expense_calls_total{function="api.get_expenses"} 1' in lines
+    assert 'expense_call_duration_seconds_bucket{function="db_helper.get_by_date",le="+Inf"} 1' in lines
+    assert 'expense_call_errors_total{function="api.get_expenses"} 0' in lines
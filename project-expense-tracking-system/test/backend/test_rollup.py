@@ -0,0 +1,85 @@
+import pytest
+import random
+import sys
+import os
+from datetime import date, timedelta
+
+# Add project root to Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
+sys.path.insert(0, project_root)
+
+import pandas as pd
+import db_helper
+import rollup
+from json_backend import JsonBackend
+from sqlite_backend import SqliteBackend
+
+
+def _expenses(count=500, seed=3):
+    rng = random.Random(seed)
+    start = date(2022, 11, 20)
+    return [
+        {'expense_date': str(start + timedelta(days=rng.randrange(800))), 'amount': float(rng.randint(1, 100)),
+         'category': rng.choice(['Food', 'Rent', 'Fun']), 'notes': ''}
+        for _ in range(count)
+    ]
+
+
+# Test every granularity against pandas, across year boundaries
+@pytest.mark.parametrize('granularity,freq', [
+    ('day', 'D'), ('week', 'W-SUN'), ('month', 'M'), ('quarter', 'Q'), ('year', 'Y')
+])
+def test_rollup_matches_pandas(granularity, freq):
+    expenses = _expenses()
+    daily = {}
+    for exp in expenses:
+        day = daily.setdefault(exp['expense_date'], {})
+        day[exp['category']] = day.get(exp['category'], 0) + exp['amount']
+
+    frame = pd.DataFrame(expenses)
+    frame['start'] = pd.to_datetime(frame['expense_date']).dt.to_period(freq).dt.start_time.dt.strftime('%Y-%m-%d')
+    expected = frame.groupby(['start', 'category'])['amount'].sum()
+
+    result = rollup.rollup(daily, granularity)
+    assert [(row['start'], row['category']) for row in result] == list(expected.index)
+    assert [row['total'] for row in result] == pytest.approx(list(expected))
+
+
+# Test the period labels
+def test_bucket_labels():
+    daily = {'2024-12-30': {'Food': 1.0}, '2025-01-02': {'Food': 2.0}}
+    assert [row['period'] for row in rollup.rollup(daily, 'week')] == ['2025-W01']
+    assert [row['period'] for row in rollup.rollup(daily, 'month')] == ['2024-12', '2025-01']
+    assert [row['period'] for row in rollup.rollup(daily, 'quarter')] == ['2024-Q4', '2025-Q1']
+    assert [row['period'] for row in rollup.rollup(daily, 'year')] == ['2024', '2025']
+    with pytest.raises(ValueError):
+        rollup.rollup(daily, 'decade')
+
+
+# Test every storage path gives the same per-day totals and rollup
+def test_daily_totals_backends(tmp_path, monkeypatch):
+    expenses = _expenses(300)
+    json_backend = JsonBackend(str(tmp_path / 'expenses.json'), columnar_file=str(tmp_path / 'expenses.col'))
+    json_backend.insert_many(expenses)
+    json_backend.compact()
+    json_backend.delete_date(expenses[0]['expense_date'])
+    json_backend.insert('2023-06-15', 7.0, 'Travel', '')
+    sqlite_backend = SqliteBackend(str(tmp_path / 'expenses.db'))
+    sqlite_backend.insert_many(json_backend.all_expenses())
+
+    start, end = '2023-01-10', '2024-08-20'
+    from_index = json_backend.daily_totals(start, end)
+    json_backend.reset_cache()
+    from_columnar = JsonBackend(str(tmp_path / 'expenses.json'), columnar_file=str(tmp_path / 'expenses.col'))
+    for totals in (from_columnar.daily_totals(start, end), sqlite_backend.daily_totals(start, end)):
+        assert totals.keys() == from_index.keys()
+        for day, categories in from_index.items():
+            assert totals[day] == pytest.approx(categories)
+    assert from_index['2023-06-15']['Travel'] == 7.0
+
+    monkeypatch.setattr(db_helper, '_backend', sqlite_backend)
+    quarters = db_helper.fetch_rollup(date(2023, 1, 1), date(2024, 12, 31), 'quarter')
+    assert {row['period'] for row in quarters} == {f'{year}-Q{q}' for year in (2023, 2024) for q in range(1, 5)}
+    assert db_helper.fetch_rollup(date(2023, 1, 1), date(2024, 12, 31), 'decade') == []
+    from_columnar.close()
+    sqlite_backend.close()
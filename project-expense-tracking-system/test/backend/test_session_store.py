@@ -0,0 +1,87 @@
+import pytest
+import random
+import sys
+import os
+from datetime import date, timedelta
+
+# Add project root to Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
+sys.path.insert(0, project_root)
+
+import pandas as pd
+from session_store import SessionStore
+
+
+def _fill(store, days=400, seed=7):
+    rng = random.Random(seed)
+    start = date(2023, 6, 10)
+    expected = {}
+    for offset in rng.sample(range(days), 150):
+        day = start + timedelta(days=offset)
+        rows = [{'amount': float(rng.randint(1, 50)), 'category': rng.choice(['Food', 'Rent', 'Fun']), 'notes': ''}
+                for _ in range(rng.randint(0, 3))]
+        store.add_or_update(day, rows)
+        expected[day] = rows
+    return expected
+
+
+# Test the running totals match a full groupby, including after days are replaced
+def test_summaries_match_groupby():
+    store = SessionStore()
+    expected = _fill(store)
+    # Replace some days with different rows and clear others
+    for day in list(expected)[:40]:
+        rows = [{'amount': 5.0, 'category': 'Travel', 'notes': 'x'}] if day.day % 2 else []
+        store.add_or_update(day, rows)
+        expected[day] = rows
+
+    frame = pd.DataFrame([dict(row, date=day) for day, rows in expected.items() for row in rows])
+    assert len(store) == len(frame)
+
+    for start, end in [(date(2023, 6, 15), date(2024, 3, 3)), (date(2023, 7, 1), date(2023, 12, 31)),
+                       (date(2024, 2, 5), date(2024, 2, 20)), (date(2020, 1, 1), date(2030, 1, 1))]:
+        in_range = frame[(frame['date'] >= start) & (frame['date'] <= end)]
+        totals = in_range.groupby('category')['amount'].sum()
+        summary = store.fetch_sum_date(start, end)
+        assert summary.keys() == set(totals.index)
+        for category, total in totals.items():
+            assert summary[category]['Total'] == pytest.approx(total)
+            assert summary[category]['Percentage'] == pytest.approx(total / totals.sum() * 100)
+
+    # Months of different years are kept apart
+    dates = pd.to_datetime(frame['date'])
+    months = frame.groupby([dates.dt.year, dates.dt.month])['amount'].sum()
+    monthly = store.fetch_sum_months()
+    assert list(monthly) == [f'{pd.Timestamp(year, month, 1).month_name()} {year}' for year, month in months.index]
+    assert [value['Total'] for value in monthly.values()] == pytest.approx(list(months))
+
+
+# Test day lookups and the summary cache being dropped on a write
+def test_get_by_date_and_cache():
+    store = SessionStore()
+    store.add_or_update(date(2024, 8, 1), [{'amount': 10.0, 'category': 'Food', 'notes': 'Lunch'}])
+    assert store.get_by_date(date(2024, 8, 1)) == [
+        {'date': date(2024, 8, 1), 'amount': 10.0, 'category': 'Food', 'notes': 'Lunch'}
+    ]
+    assert store.get_by_date(date(2024, 8, 2)) == []
+
+    first = store.fetch_sum_months()
+    assert store.fetch_sum_months() is first
+    store.add_or_update(date(2024, 8, 1), [])
+    assert store.fetch_sum_months() == {}
+    assert store.month_totals == {}
+
+
+# Test the date partitions and sorted date list follow replaced and emptied days
+def test_date_partitions():
+    store = SessionStore()
+    for day in [date(2024, 8, 3), date(2024, 8, 1), date(2024, 8, 2)]:
+        store.add_or_update(day, [{'amount': 1.0, 'category': 'Food', 'notes': ''}])
+    assert store.dates == [date(2024, 8, 1), date(2024, 8, 2), date(2024, 8, 3)]
+
+    store.add_or_update(date(2024, 8, 2), [{'amount': 2.0, 'category': 'Rent', 'notes': ''}] * 2)
+    store.add_or_update(date(2024, 8, 1), [])
+    assert store.dates == [date(2024, 8, 2), date(2024, 8, 3)]
+    assert store.day_totals[date(2024, 8, 2)] == {'Rent': [4.0, 2]}
+    assert store.category_totals(date(2024, 8, 1), date(2024, 8, 2)) == {'Rent': 4.0}
+    assert [row['amount'] for row in store.get_by_date(date(2024, 8, 2))] == [2.0, 2.0]
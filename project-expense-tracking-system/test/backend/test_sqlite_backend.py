@@ -0,0 +1,109 @@
+import pytest
+import json
+import sys
+import os
+
+# Add project root to Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
+sys.path.insert(0, project_root)
+
+from backend import db_helper
+from sqlite_backend import SqliteBackend
+
+
+# Run the db_helper functions against a temporary SQLite database
+@pytest.fixture
+def sqlite_store(tmp_path, monkeypatch):
+    backend = SqliteBackend(str(tmp_path / 'expenses.db'))
+    monkeypatch.setattr(db_helper, '_backend', backend)
+    yield backend
+    backend.close()
+
+
+# Test inserts, lookups and deletes go through SQLite
+def test_crud(sqlite_store):
+    assert db_helper.insert_data('2024-08-01', 10.0, 'Food', 'Lunch') is True
+    assert db_helper.insert_data('2024-08-02', 20.0, 'Rent', 'Room') is True
+    assert db_helper.insert_data('2024-08-02', 5.0, 'Food', 'Snack') is True
+
+    assert db_helper.get_by_id(2)['category'] == 'Rent'
+    assert db_helper.get_by_id(42) is None
+    assert [exp['id'] for exp in db_helper.get_by_date('2024-08-02')] == [2, 3]
+    assert [exp['id'] for exp in db_helper.get_by_date_range('2024-08-01', '2024-08-01')] == [1]
+
+    assert db_helper.delete_data('2024-08-02') is True
+    assert [exp['id'] for exp in db_helper.get_all_data()] == [1]
+
+
+# Test the aggregates are computed in SQL with the same output shape as the JSON store
+def test_aggregates(sqlite_store):
+    year = db_helper.date.today().year
+    db_helper.insert_data(f'{year}-01-05', 10.0, 'Food', '')
+    db_helper.insert_data(f'{year}-01-20', 5.0, 'Rent', '')
+    db_helper.insert_data(f'{year}-02-01', 7.5, 'Food', '')
+    db_helper.insert_data(f'{year - 1}-12-31', 100.0, 'Food', '')
+
+    summary = {row['category']: row['Total'] for row in db_helper.fetch_sum_date(f'{year}-01-10', f'{year}-12-31')}
+    assert summary == {'Food': 7.5, 'Rent': 5.0}
+    assert db_helper.fetch_sum_months() == [{'month': 1, 'total': 15.0}, {'month': 2, 'total': 7.5}]
+
+
+# Test range queries use the expense_date index
+def test_date_index_used(sqlite_store):
+    plan = sqlite_store._connect().execute(
+        'EXPLAIN QUERY PLAN SELECT category, SUM(amount) FROM expenses '
+        'WHERE expense_date BETWEEN ? AND ? GROUP BY category', ('2024-01-01', '2024-12-31')
+    ).fetchall()
+    assert any('idx_expenses_date' in row[-1] for row in plan)
+
+
+# Test an existing JSON store, log included, is copied with its IDs
+def test_migrate_json_to_sqlite(tmp_path):
+    (tmp_path / 'expenses.json').write_text(json.dumps([
+        {'id': 7, 'expense_date': '2024-08-01', 'amount': 5.0, 'category': 'Food', 'notes': 'Tea'}
+    ]))
+    (tmp_path / 'expenses.log').write_text(json.dumps({
+        'op': 'insert',
+        'record': {'id': 8, 'expense_date': '2024-08-02', 'amount': 9.0, 'category': 'Other', 'notes': ''}
+    }) + '\n')
+
+    count = db_helper.migrate_json_to_sqlite(str(tmp_path / 'expenses.json'), str(tmp_path / 'expenses.db'))
+    assert count == 2
+
+    backend = SqliteBackend(str(tmp_path / 'expenses.db'))
+    assert backend.by_id(7)['notes'] == 'Tea'
+    assert backend.insert('2024-08-03', 1.0, 'Food', '') == 9
+    backend.close()
+
+
+# Test batches are stored in one transaction and continue the ID sequence
+def test_batches(sqlite_store):
+    db_helper.insert_data('2024-08-01', 1.0, 'Food', '')
+    db_helper.delete_data('2024-08-01')
+    assert db_helper.insert_many([
+        {'expense_date': '2024-08-01', 'amount': 2.0, 'category': 'Food', 'notes': 'a'},
+        {'expense_date': '2024-08-02', 'amount': 3.0, 'category': 'Rent', 'notes': 'b'}
+    ]) is True
+    assert [exp['id'] for exp in db_helper.get_all_data()] == [2, 3]
+
+    assert db_helper.replace_days({
+        '2024-08-01': [{'amount': 4.0, 'category': 'Food', 'notes': 'c'}],
+        '2024-08-02': []
+    }) is True
+    assert [(exp['id'], exp['amount']) for exp in db_helper.get_all_data()] == [(4, 4.0)]
+
+    # A bad row rolls the whole batch back
+    assert db_helper.replace_day('2024-08-01', [{'amount': None, 'category': 'Food', 'notes': ''}]) is False
+    assert [exp['id'] for exp in db_helper.get_all_data()] == [4]
+
+
+# Test every committed write advances the data version and a rolled back one does not
+def test_data_version(sqlite_store):
+    assert db_helper.data_version() == 0
+    db_helper.insert_data('2024-08-01', 1.0, 'Food', '')
+    db_helper.replace_day('2024-08-01', [{'amount': 2.0, 'category': 'Food', 'notes': ''}])
+    db_helper.delete_data('2024-08-01')
+    assert db_helper.data_version() == 3
+
+    assert db_helper.replace_day('2024-08-01', [{'amount': None, 'category': 'Food', 'notes': ''}]) is False
+    assert db_helper.data_version() == 3
@@ -0,0 +1,86 @@
+import pytest
+import random
+import sys
+import os
+from datetime import date
+
+# Add project root to Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
+sys.path.insert(0, project_root)
+
+import numpy as np
+import db_helper
+from json_backend import JsonBackend
+from sqlite_backend import SqliteBackend
+from stream_stats import QuantileSketch, TopN, top_n_by_category
+
+
+# Test sketch quantiles stay within the relative accuracy, also after merging partial sketches
+def test_quantile_sketch_accuracy():
+    rng = random.Random(11)
+    values = [round(rng.lognormvariate(3, 1.5), 2) for _ in range(20000)] + [0.0] * 50 + [-12.5] * 30
+    whole = QuantileSketch(0.01)
+    parts = [QuantileSketch(0.01) for _ in range(4)]
+    for i, value in enumerate(values):
+        whole.add(value)
+        parts[i % 4].add(value)
+    merged = parts[0]
+    for part in parts[1:]:
+        merged.merge(part)
+
+    ordered = sorted(values)
+    for q in (0.0, 0.001, 0.01, 0.5, 0.9, 0.99, 1.0):
+        exact = ordered[int(q * (len(ordered) - 1))]
+        for sketch in (whole, merged):
+            assert sketch.quantile(q) == pytest.approx(exact, rel=0.0101, abs=1e-9)
+    assert merged.count == len(values)
+    assert len(whole.positive) < 2048
+    assert np.isnan(QuantileSketch().quantile(0.5))
+    with pytest.raises(ValueError):
+        whole.merge(QuantileSketch(0.05))
+
+
+# Test the bounded heap keeps exactly the largest expenses
+def test_top_n():
+    rng = random.Random(5)
+    expenses = [{'id': i, 'amount': float(rng.randint(1, 100)), 'category': rng.choice('AB')} for i in range(1000)]
+    tops = top_n_by_category(iter(expenses), 20)
+
+    for category in 'AB':
+        expected = sorted((exp for exp in expenses if exp['category'] == category),
+                          key=lambda exp: (exp['amount'], exp['id']), reverse=True)[:20]
+        assert tops[category] == expected
+
+    top = TopN(2)
+    for exp in expenses[:3]:
+        top.add(exp)
+    other = TopN(2)
+    other.add({'id': 9999, 'amount': 1000.0, 'category': 'A'})
+    top.merge(other)
+    assert top.items()[0]['id'] == 9999 and len(top.items()) == 2
+
+
+# Test the db_helper queries stream from both backends and agree
+@pytest.mark.parametrize('backend_class,file_name', [(JsonBackend, 'expenses.json'), (SqliteBackend, 'expenses.db')])
+def test_streaming_queries(tmp_path, monkeypatch, backend_class, file_name):
+    backend = backend_class(str(tmp_path / file_name))
+    monkeypatch.setattr(db_helper, '_backend', backend)
+    rng = random.Random(2)
+    db_helper.insert_many([
+        {'expense_date': f'2024-0{month}-1{day}', 'amount': float(rng.randint(1, 500)), 'category': category, 'notes': ''}
+        for month in range(1, 4) for day in range(10) for category in ('Food', 'Rent')
+    ])
+
+    assert not isinstance(backend.iter_range('2024-01-01', '2024-12-31'), list)
+    top = db_helper.fetch_top_expenses(date(2024, 2, 1), date(2024, 3, 31), 3)
+    in_range = [exp for exp in db_helper.get_all_data() if '2024-02-01' <= exp['expense_date'] <= '2024-03-31']
+    for category in ('Food', 'Rent'):
+        amounts = sorted((exp['amount'] for exp in in_range if exp['category'] == category), reverse=True)
+        assert [exp['amount'] for exp in top[category]] == amounts[:3]
+
+    percentiles = db_helper.fetch_percentiles(date(2024, 1, 1), date(2024, 12, 31))
+    food = sorted(exp['amount'] for exp in db_helper.get_all_data() if exp['category'] == 'Food')
+    assert percentiles['Food']['count'] == 30
+    assert percentiles['Food']['p50'] == pytest.approx(food[int(0.5 * 29)], rel=0.0101)
+    assert percentiles['Food']['p99'] == pytest.approx(food[int(0.99 * 29)], rel=0.0101)
+    backend.close()
@@ -1,6 +1,10 @@
+import os
 import sys
 from unittest.mock import MagicMock
 
+# Backend modules import each other by plain module name
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend')))
+
 # Create mock logging_setup module
 mock_logging_setup = MagicMock()
 mock_logging_setup.setup_logging = MagicMock(return_value=MagicMock())
@@ -0,0 +1,79 @@
+import pytest
+import functools
+import threading
+import sys
+import os
+from unittest.mock import MagicMock, patch
+from urllib3.exceptions import NewConnectionError, ReadTimeoutError
+
+# Add frontend to Python path, the tabs import api_client by plain name
+frontend_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../frontend'))
+sys.path.insert(0, frontend_root)
+
+# Streamlit is not needed here, only its resource cache: memoize like st.cache_resource does
+streamlit_mock = MagicMock()
+streamlit_mock.cache_resource = functools.lru_cache(maxsize=None)
+with patch.dict(sys.modules, {'streamlit': streamlit_mock}):
+    import api_client
+
+
+# Test every call goes through one pooled session with a timeout
+def test_shared_session():
+    session = api_client.get_session()
+    assert api_client.get_session() is session
+    assert session.get_adapter(api_client.API_URL).max_retries.total == 3
+
+    with patch.object(session, 'request') as request:
+        api_client.get('/analytic/month')
+        api_client.post('/expenses/2024-08-01', json=[])
+
+    assert request.call_args_list[0].args == ('GET', 'http://localhost:8000/analytic/month')
+    assert request.call_args_list[0].kwargs['timeout'] == api_client.TIMEOUT
+    assert request.call_args_list[1].kwargs['json'] == []
+
+
+# Test POSTs are retried only when the request never reached the server
+def test_post_retries():
+    retries = api_client.get_session().get_adapter(api_client.API_URL).max_retries
+    assert retries.is_retry('GET', 503) and not retries.is_retry('POST', 503)
+
+    read_error = ReadTimeoutError(None, '/expenses/bulk', 'read timed out')
+    with pytest.raises(ReadTimeoutError):
+        retries.increment('POST', '/expenses/bulk', error=read_error)
+    assert retries.increment('POST', '/expenses/bulk', error=NewConnectionError(None, 'refused')).total == 2
+
+
+# Test a 304 returns the cached value without decoding or rebuilding it
+def test_fetch_revalidates_cached_value():
+    api_client.invalidate()
+    ok = MagicMock(status_code=200, headers={'ETag': '"7"'})
+    ok.json.return_value = {'January': {'Total': 40.0}}
+    not_modified = MagicMock(status_code=304, headers={'ETag': '"7"'})
+    build = MagicMock(side_effect=lambda data: list(data))
+
+    with patch.object(api_client.get_session(), 'request', side_effect=[ok, not_modified]) as request:
+        first = api_client.fetch('/analytic/month', build=build)
+        second = api_client.fetch('/analytic/month', build=build)
+
+    assert first == ['January'] and second is first
+    assert build.call_count == 1
+    assert 'If-None-Match' not in request.call_args_list[0].kwargs['headers']
+    assert request.call_args_list[1].kwargs['headers'] == {'If-None-Match': '"7"'}
+    not_modified.json.assert_not_called()
+
+
+# Test prefetch looks up the cached resources on the calling thread, not on the worker
+def test_prefetch_resolves_resources_on_caller(monkeypatch):
+    api_client.invalidate()
+    callers = []
+    for name in ('get_session', 'get_response_cache'):
+        getter = getattr(api_client, name)
+        monkeypatch.setattr(api_client, name, lambda getter=getter: callers.append(threading.current_thread()) or getter())
+    ok = MagicMock(status_code=200, headers={})
+    ok.json.return_value = {'January': {'Total': 40.0}}
+
+    with patch.object(api_client.get_session(), 'request', return_value=ok):
+        callers.clear()
+        assert api_client.prefetch('/analytic/month').result() == {'January': {'Total': 40.0}}
+
+    assert len(callers) == 2 and set(callers) == {threading.current_thread()}